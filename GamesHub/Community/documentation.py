@@ -8,14 +8,19 @@ post_list_schema = extend_schema(
 
         - Requires authentication for creating posts, but listing is public (`IsAuthenticatedOrReadOnly`)
         - Supports filtering by `hashtag` and `username` query parameters
+        - `sort=hot` ranks by votes and comments against post age, `sort=trending` by activity over the last 24 hours
+        - `sort` uses limit/offset pagination and cannot be combined with `hashtag` or `username`
         - Returns paginated results with count, next, previous, and posts array
-        - Cached for performance (3600 seconds)
+        - Cached for performance (3600 seconds, 60 seconds for ranked pages)
     """,
     parameters=[
+        OpenApiParameter(name="sort", description="Rank posts instead of newest first", required=False, type=str, enum=["hot", "trending"]),
         OpenApiParameter(name="hashtag", description="Filter posts by hashtag", required=False, type=str),
         OpenApiParameter(name="username", description="Filter posts by username", required=False, type=str),
         OpenApiParameter(name="limit", description="Pagination limit", required=False, type=int),
         OpenApiParameter(name="offset", description="Pagination offset", required=False, type=int),
+        OpenApiParameter(name="pagination", description="Set to `cursor` for keyset pagination", required=False, type=str),
+        OpenApiParameter(name="cursor", description="Opaque cursor taken from the next/previous link", required=False, type=str),
     ],
     responses={
         200: {
@@ -44,7 +49,8 @@ post_list_schema = extend_schema(
                     }
                 }
             }
-        }
+        },
+        400: {"application/json": {"type": "object"}}
     },
     examples=[
         OpenApiExample(
@@ -67,6 +73,46 @@ post_list_schema = extend_schema(
             value={"error": {"code": "not_found", "detail": "No posts found"}},
             response_only=True,
             status_codes=["404"]
+        ),
+        OpenApiExample(
+            name="Invalid sort",
+            value={"error": {"code": "validation_error", "detail": {"sort": ["sort should be one of hot, trending"]}}},
+            response_only=True,
+            status_codes=["400"]
+        )
+    ]
+)
+
+
+trending_hashtags_schema = extend_schema(
+    methods=["GET"],
+    summary="Trending Hashtags",
+    description="""
+        Lists the hashtags used most over the last 24 hours, recent hours weighted higher.
+
+        - Public endpoint (`AllowAny`)
+        - `limit` defaults to 10, at most 50
+        - Scores are refreshed every 10 minutes, responses are cached for 60 seconds
+    """,
+    parameters=[
+        OpenApiParameter(name="limit", description="Number of hashtags to return", required=False, type=int),
+    ],
+    responses={
+        200: {"application/json": {"type": "object"}},
+        400: {"application/json": {"type": "object"}}
+    },
+    examples=[
+        OpenApiExample(
+            name="Trending hashtags",
+            value={"message": "trending hashtags", "hashtags": [{"tag": "#eldenring", "score": 14.3}, {"tag": "#speedrun", "score": 6.85}]},
+            response_only=True,
+            status_codes=["200"]
+        ),
+        OpenApiExample(
+            name="Invalid limit",
+            value={"error": {"code": "invalid_limit", "message": "limit should be an integer"}},
+            response_only=True,
+            status_codes=["400"]
         )
     ]
 )
@@ -81,6 +127,7 @@ post_create_schema = extend_schema(
         - Requires authentication (`IsAuthenticatedOrReadOnly`)
         - Accepts multipart/form-data for media uploads
         - Validates request body with `PostSerializer`
+        - Media is uploaded to storage in the background after the post is saved, `media_pending` counts files not yet available in `media_url`
         - Returns success message and created post data
     """,
     request={
@@ -131,7 +178,9 @@ post_create_schema = extend_schema(
                     "content": "This is a new post",
                     "user": "Batman",
                     "hashtags": ["gaming", "fun"],
-                    "created_at": "2025-12-19T20:00:00Z"
+                    "created_at": "2025-12-19T20:00:00Z",
+                    "media_url": [],
+                    "media_pending": 2
                 }
             },
             response_only=True,
@@ -159,6 +208,8 @@ comment_list_schema = extend_schema(
     parameters=[
         OpenApiParameter(name="limit", description="Pagination limit", required=False, type=int),
         OpenApiParameter(name="offset", description="Pagination offset", required=False, type=int),
+        OpenApiParameter(name="pagination", description="Set to `cursor` for keyset pagination", required=False, type=str),
+        OpenApiParameter(name="cursor", description="Opaque cursor taken from the next/previous link", required=False, type=str),
     ],
     responses={
         200: {
@@ -606,7 +657,7 @@ post_update_schema = extend_schema(
         - Requires authentication (`IsOwnerOrReadOnly`)
         - Accepts partial updates (title, body, media, upvote/downvote flags)
         - Validates that only one of `upvote_post` or `downvote_post` can be set
-        - Handles media replacement (uploads new files, deletes old ones)
+        - Handles media replacement (deletes old files, new files are uploaded in the background after the update is saved)
     """,
     request={
         "multipart/form-data": {
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Community', '0010_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postmedia',
+            name='staged_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='postmedia',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'pending'), (2, 'ready'), (3, 'failed')], default=2),
+        ),
+    ]
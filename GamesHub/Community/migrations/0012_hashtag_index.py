@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_hashtags(apps, schema_editor):
+    HashTags = apps.get_model('Community', 'HashTags')
+    Post     = apps.get_model('Community', 'Post')
+    through  = Post.hashtags.through
+    keep     = {}
+
+    for tag_id, tag in HashTags.objects.order_by('id').values_list('id', 'tag'):
+        if tag not in keep:
+            keep[tag] = tag_id
+            continue
+        post_ids = through.objects.filter(hashtags_id=tag_id).values_list('post_id', flat=True)
+        through.objects.bulk_create([through(post_id=post_id, hashtags_id=keep[tag]) for post_id in post_ids], ignore_conflicts=True)
+        HashTags.objects.filter(id=tag_id).delete()
+
+
+def count_hashtag_posts(apps, schema_editor):
+    HashTags = apps.get_model('Community', 'HashTags')
+    Post     = apps.get_model('Community', 'Post')
+    through  = Post.hashtags.through
+    counts   = through.objects.filter(hashtags_id=OuterRef('pk')).values('hashtags_id').annotate(total=Count('id')).values('total')
+    HashTags.objects.update(post_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Community', '0011_post_media_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_hashtags, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='hashtags',
+            name='tag',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+        migrations.AddField(
+            model_name='hashtags',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_hashtag_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='hashtags',
+            index=models.Index(fields=['-post_count'], name='hashtag_post_count_idx'),
+        ),
+    ]
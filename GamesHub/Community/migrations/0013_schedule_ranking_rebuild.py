@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:10
+
+from django.db import migrations
+
+
+def schedule_ranking_rebuild(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    interval, _      = IntervalSchedule.objects.get_or_create(every=10, period='minutes')
+    PeriodicTask.objects.get_or_create(name='community ranking rebuild', defaults={'task': 'rebuild_community_rankings', 'interval': interval})
+
+
+def unschedule_ranking_rebuild(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='rebuild_community_rankings').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Community', '0012_hashtag_index'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_ranking_rebuild, unschedule_ranking_rebuild),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def schedule_pending_media_sweep(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    interval, _      = IntervalSchedule.objects.get_or_create(every=1, period='minutes')
+    PeriodicTask.objects.get_or_create(name='pending post media sweep', defaults={'task': 'retry_pending_post_media', 'interval': interval})
+
+
+def unschedule_pending_media_sweep(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='retry_pending_post_media').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Community', '0013_schedule_ranking_rebuild'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postmedia',
+            name='queued_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='postmedia',
+            index=models.Index(fields=['status', 'queued_at'], name='post_media_pending_idx'),
+        ),
+        migrations.RunPython(schedule_pending_media_sweep, unschedule_pending_media_sweep),
+    ]
@@ -1,15 +1,36 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Count
 import re
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth import get_user_model
-from utills.storage_supabase import supabase
-User = get_user_model()
+from django.utils import timezone
+from utills.storage_supabase import get_signed_url
+from utills.ranking import update_post_rank, record_hashtags
+from utills.votes import pending_vote_deltas
+import logging
 
+logger = logging.getLogger("gameshub")
+User   = get_user_model()
+
+
+def safe_rank_update(func, *args, **kwargs):
+    # rankings are derived data, a redis hiccup must not fail the write that triggered it
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"community ranking update failed: {str(e)}", exc_info=True)
+
+
+HASHTAG_PATTERN = re.compile(r'#\w{1,31}', re.MULTILINE)
 
 class HashTags(models.Model):
-    tag           = models.CharField(max_length=32)
+    tag           = models.CharField(max_length=32, unique=True)
+    post_count    = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["-post_count"], name="hashtag_post_count_idx")]
 
     def __str__(self):
         return self.tag
@@ -24,21 +45,64 @@ class Post(models.Model):
     upvote        = models.PositiveBigIntegerField(default=0, editable=False)
     downvote      = models.PositiveBigIntegerField(default=0, editable=False)
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"], name="post_created_at_idx")]
 
-        pattern  = re.compile(r'#\w{1,31}', re.MULTILINE)
-        matches  = pattern.findall(self.body)
-        hashtags = []
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed_body = instance.__dict__.get("body")
+        return instance
 
-        for match in matches:
-            hashtag, _ = HashTags.objects.get_or_create(tag=match.strip().lower())
-            hashtags.append(hashtag)
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        body_changed  = getattr(self, "_indexed_body", None) != self.body and (update_fields is None or "body" in update_fields)
 
-        self.hashtags.set(hashtags)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if body_changed:
+                self.index_hashtags()
 
+        self._indexed_body = self.body
         return self
 
+    def index_hashtags(self):
+        # every tag is upserted in one statement and only the difference is linked or unlinked
+        tags    = {match.lower() for match in HASHTAG_PATTERN.findall(self.body)}
+        through = Post.hashtags.through
+
+        # the post row is locked before its links are read, so concurrent edits of one post diff
+        # one after another and each link is counted once
+        list(Post.objects.select_for_update().filter(id=self.id).values_list("id", flat=True))
+
+        if tags:
+            HashTags.objects.bulk_create([HashTags(tag=tag) for tag in tags], ignore_conflicts=True)
+        tag_ids = dict(HashTags.objects.filter(tag__in=tags).values_list("id", "tag")) if tags else {}
+        new_ids = set(tag_ids)
+        old_ids = set(through.objects.filter(post_id=self.id).values_list("hashtags_id", flat=True))
+
+        added   = new_ids - old_ids
+        removed = old_ids - new_ids
+        if removed:
+            through.objects.filter(post_id=self.id, hashtags_id__in=removed).delete()
+            HashTags.objects.filter(id__in=removed).update(post_count=F("post_count") - 1)
+        if added:
+            through.objects.bulk_create([through(post_id=self.id, hashtags_id=tag_id) for tag_id in added], ignore_conflicts=True)
+            HashTags.objects.filter(id__in=added).update(post_count=F("post_count") + 1)
+            added_tags = [tag_ids[tag_id] for tag_id in added]
+            transaction.on_commit(lambda: safe_rank_update(record_hashtags, added_tags))
+
+    def refresh_rank(self, activity=0):
+        safe_rank_update(self.update_rank, activity)
+
+    def update_rank(self, activity):
+        post = Post.objects.filter(id=self.id).annotate(comment_count=Count("comments")).values_list("upvote", "downvote", "comment_count", "created_at").first()
+        if post is None:
+            return
+        upvote, downvote, comments, created_at = post
+        pending_up, pending_down = pending_vote_deltas(ContentType.objects.get_for_model(Post).id, [self.id])[self.id]
+        update_post_rank(self.id, upvote + pending_up, downvote + pending_down, comments, created_at, activity=activity)
+
 
     def __str__(self):
         if self.user is not None:
@@ -58,18 +122,29 @@ class Comment(models.Model):
     upvote        = models.PositiveBigIntegerField(default=0, editable=False)
     downvote      = models.PositiveBigIntegerField(default=0, editable=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id", "-created_at", "-id"], name="comment_created_at_idx")]
 
     def __str__(self):
         return f"Comment for {self.parent_object.title}"
 
 class PostMedia(models.Model):
+    STATUS_CHOICES = [
+        (1, 'pending'),
+        (2, 'ready'),
+        (3, 'failed')
+        ]
     post           = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="media")
     url            = models.URLField(null=True, default=None, blank=True)
+    status         = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=2)
+    staged_path    = models.CharField(max_length=512, blank=True, default="", editable=False)
+    queued_at      = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "queued_at"], name="post_media_pending_idx")]
 
     def get_url(self):
-        media  = self.url.split("GamesHubMedia/")[1]
-        result = supabase.storage.from_("GamesHubMedia").create_signed_url(media, 600)
-        return result["signedURL"]
+        return get_signed_url(self.url, 600)
 
     def __str__(self):
         return f"media for {self.post}"
\ No newline at end of file
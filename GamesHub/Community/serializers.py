@@ -1,43 +1,83 @@
 from rest_framework.serializers import ModelSerializer, ValidationError, SerializerMethodField
 from .models import Post, Comment, PostMedia
 from rest_framework import serializers
-import re
-from utills.microservices import validate_vote_value, update_voting_field
+from utills.microservices import validate_vote_value, update_voting_field, strip_vote_fields
 from django.contrib.contenttypes.models import ContentType
-from utills.storage_supabase import upload_file_to_supabase, supabase
+from utills.moderation import validate_clean_text
+from utills.storage_supabase import stage_upload, discard_staged_file, SignedURLListSerializer, prefetch_signed_urls
+from utills.votes import PendingVotesMixin, PendingVotesListSerializer, attach_pending_votes
 from django.db import transaction
+from django.db.models import F, Window, prefetch_related_objects
+from django.db.models.functions import RowNumber
+from django.db.models.manager import BaseManager
+from celery import current_app
 
 POST_CONTENT_TYPE    = ContentType.objects.get_for_model(Post)
 COMMENT_CONTENT_TYPE = ContentType.objects.get_for_model(Comment)
-
-def get_signed_url(path):
-    return supabase.storage.from_("GamesHubMedia").create_signed_url(path, 3600)["signedURL"]
-
-class CommentSerializer(ModelSerializer):
+COMMENT_PREVIEWS     = 5
+
+
+def queue_post_media(post, staged_paths):
+    if not staged_paths:
+        return
+    PostMedia.objects.bulk_create([PostMedia(post=post, status=1, staged_path=staged_path) for staged_path in staged_paths])
+    # the post is already committed when this runs, a broker outage is left to the pending media sweep
+    transaction.on_commit(lambda: current_app.send_task("upload_post_media", args=[post.id]), robust=True)
+
+def discard_unqueued(staged_paths):
+    # files whose media rows committed belong to the upload worker now, only the rest are removed
+    queued = set(PostMedia.objects.filter(staged_path__in=staged_paths).values_list("staged_path", flat=True)) if staged_paths else set()
+    for staged_path in staged_paths:
+        if staged_path not in queued:
+            discard_staged_file(staged_path)
+
+def attach_comment_previews(posts, limit=COMMENT_PREVIEWS):
+    # newest comments of every post on the page in one query, numbered per post and cut at the limit
+    previews = {post.id: [] for post in posts}
+    if not previews:
+        return
+    comments = (Comment.objects
+                .filter(content_type=POST_CONTENT_TYPE, object_id__in=previews)
+                .annotate(row=Window(RowNumber(), partition_by=F("object_id"), order_by=(F("created_at").desc(), F("id").desc())))
+                .filter(row__lte=limit)
+                .order_by("object_id", "row"))
+    for comment in comments:
+        previews[comment.object_id].append(comment)
+    for post in posts:
+        post.comment_previews = previews[post.id]
+
+class PostListSerializer(SignedURLListSerializer):
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, BaseManager) else data)
+        attach_comment_previews(posts)
+        attach_pending_votes(posts + [comment for post in posts for comment in post.comment_previews])
+        return super().to_representation(posts)
+
+class CommentSerializer(PendingVotesMixin, ModelSerializer):
 
     class Meta:
-        model            = Comment
-        fields           = '__all__'
-        read_only_fields = ["user", "parent_object", "object_id", "content_type"]
+        model                 = Comment
+        fields                = '__all__'
+        read_only_fields      = ["user", "parent_object", "object_id", "content_type"]
+        list_serializer_class = PendingVotesListSerializer
 
     
     def validate_body(self, value):
-        for pattern in [re.compile(r"(?i)\bass\b"), re.compile(r"(?i)\bfuck\b"), re.compile(r"(?i)\bbitch\b"), re.compile(r"(?i)\basshole\b"),]:
-            if pattern.search(value):
-                raise ValidationError("body cannot have banned words")
-        
-        return value
+        return validate_clean_text(value, "body")
 
-class PostSerializer(ModelSerializer):
-    comments  = SerializerMethodField()
-    media     = serializers.ListField(child = serializers.FileField(), write_only = True, required=False, allow_empty=True)
-    media_url = SerializerMethodField(read_only = True)
-    username  = SerializerMethodField(read_only = True) 
+class PostSerializer(PendingVotesMixin, ModelSerializer):
+    comments          = SerializerMethodField()
+    media             = serializers.ListField(child = serializers.FileField(), write_only = True, required=False, allow_empty=True)
+    media_url         = SerializerMethodField(read_only = True)
+    media_pending     = SerializerMethodField(read_only = True)
+    username          = SerializerMethodField(read_only = True) 
+    signed_url_fields = {"media.url": 600}
 
     class Meta:
-        model            = Post
-        fields           = ["id", "title", "body", "created_at", "user", "username", "hashtags", "comments", "upvote", "downvote", "media", "media_url"]
-        read_only_fields = ["user"]
+        model                 = Post
+        fields                = ["id", "title", "body", "created_at", "user", "username", "hashtags", "comments", "upvote", "downvote", "media", "media_url", "media_pending"]
+        read_only_fields      = ["user"]
+        list_serializer_class = PostListSerializer
 
     def validate_media(self, media):
         if len(media) > 3:
@@ -60,40 +100,46 @@ class PostSerializer(ModelSerializer):
 
         return media
 
-    @transaction.atomic
     def create(self, validated_data):
-        files  = validated_data.pop("media", [])
-        post = Post.objects.create(**validated_data)
-
-        for f in files:            
-            url = upload_file_to_supabase(f, f"Posts/{post.id}/Media")
-            PostMedia.objects.create(post=post, url=url)
+        files = validated_data.pop("media", [])
+
+        # files are staged before the transaction opens and uploaded by a worker after it commits,
+        # so the transaction never waits on file size or storage latency
+        staged_paths = [stage_upload(f) for f in files]
+        try:
+            with transaction.atomic():
+                post = Post.objects.create(**validated_data)
+                queue_post_media(post, staged_paths)
+        except Exception:
+            discard_unqueued(staged_paths)
+            raise
 
         return post
 
     def validate_title(self, value):
-        for pattern in [re.compile(r"(?i)\bass\b"), re.compile(r"(?i)\bfuck\b"), re.compile(r"(?i)\bbitch\b"), re.compile(r"(?i)\basshole\b"),]:
-            if pattern.search(value):
-                raise ValidationError("title cannot have banned words")
-        
-        return value
+        return validate_clean_text(value, "title")
 
     def validate_body(self, value):
-        for pattern in [re.compile(r"(?i)\bass\b"), re.compile(r"(?i)\bfuck\b"), re.compile(r"(?i)\bbitch\b"), re.compile(r"(?i)\basshole\b"),]:
-            if pattern.search(value):
-                raise ValidationError("body cannot have banned words")
-        
-        return value
+        return validate_clean_text(value, "body")
     
     def get_comments(self, obj):
-        comments = obj.comments.order_by("-created_at")[:5]
+        comments = getattr(obj, "comment_previews", None)
+        if comments is None:
+            comments = obj.comments.order_by("-created_at", "-id")[:COMMENT_PREVIEWS]
         return CommentSerializer(comments, many=True).data
 
+    def to_representation(self, instance):
+        # a page is signed by PostListSerializer, a post serialized on its own signs its media in one call here
+        if self.parent is None:
+            prefetch_related_objects([instance], "media")
+            prefetch_signed_urls([instance], self.signed_url_fields)
+        return super().to_representation(instance)
+
     def get_media_url(self, obj):
-        media_objs = obj.media.all()
-        paths = [m.get_url() for m in media_objs if m.url]
+        return [m.get_url() for m in obj.media.all() if m.url]
 
-        return paths
+    def get_media_pending(self, obj):
+        return sum(1 for m in obj.media.all() if m.status == 1)
     
     def get_username(self, obj):
         return obj.user.get_username()
@@ -102,7 +148,6 @@ class PostSerializer(ModelSerializer):
 class PostDetailSerializer(PostSerializer):
     upvote_post   = serializers.CharField(write_only=True, required=False)
     downvote_post = serializers.CharField(write_only=True, required=False)
-    media_url     = SerializerMethodField(read_only = True)
 
     class Meta:
         model            = Post
@@ -115,28 +160,29 @@ class PostDetailSerializer(PostSerializer):
         return attrs
 
         
-    @transaction.atomic
     def update(self, instance, validated_data):
-        media = validated_data.pop("media", None)
-
-        if media is not None:
-            PostMedia.objects.filter(post=instance).delete()
-
-            for f in media:
-                url = upload_file_to_supabase(f, f"Posts/{instance.id}/Media")
-                PostMedia.objects.create(post=instance, url=url)     
-
-        request_user = self.context.get('request_user')
-        model_obj    = Post.objects.filter(id = instance.id)
-        instance = update_voting_field(instance, validated_data, POST_CONTENT_TYPE, "post", request_user, model_obj)
-
-        return super().update(instance, validated_data)
-    
-    def get_media_url(self, obj):
-        media_objs = obj.media.all()
-        paths = [m.get_url() for m in media_objs if m.url]
-
-        return paths
+        media        = validated_data.pop("media", None)
+        staged_paths = [stage_upload(f) for f in media] if media is not None else []
+
+        try:
+            with transaction.atomic():
+                if media is not None:
+                    PostMedia.objects.filter(post=instance).delete()
+                    queue_post_media(instance, staged_paths)
+
+                request_user = self.context.get('request_user')
+                voted        = "upvote_post" in validated_data or "downvote_post" in validated_data
+                instance = update_voting_field(instance, validated_data, POST_CONTENT_TYPE, "post", request_user)
+                if voted:
+                    transaction.on_commit(lambda: instance.refresh_rank(activity=1))
+
+                # a vote only request already wrote its counters, saving the row again would only add contention
+                if not strip_vote_fields(validated_data, "post"):
+                    return instance
+                return super().update(instance, validated_data)
+        except Exception:
+            discard_unqueued(staged_paths)
+            raise
 
 class CommentDetailSerializer(CommentSerializer):
     upvote_comment   = serializers.CharField(write_only=True, required=False)
@@ -148,9 +194,10 @@ class CommentDetailSerializer(CommentSerializer):
     
     def update(self, instance, validated_data):
         request_user = self.context.get('request_user')
-        model_obj    = Comment.objects.filter(id = instance.id)
-        instance = update_voting_field(instance, validated_data, COMMENT_CONTENT_TYPE, "comment", request_user, model_obj)
+        instance = update_voting_field(instance, validated_data, COMMENT_CONTENT_TYPE, "comment", request_user)
 
+        if not strip_vote_fields(validated_data, "comment"):
+            return instance
         return super().update(instance, validated_data)
     
     def validate(self, attrs):
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, pre_delete, post_save
+from django.db.models import F
 from django.dispatch import receiver
-from .models import PostMedia
-from utills.storage_supabase import delete_from_supabase
+from django.contrib.contenttypes.models import ContentType
+from .models import PostMedia, Post, HashTags, Comment, safe_rank_update
+from utills.storage_supabase import delete_from_supabase, discard_staged_file
+from utills.ranking import remove_post_rank
 from django.db import transaction
 
 
@@ -11,5 +14,33 @@ def delete_post_media(sender, instance, **kwargs):
         if instance.url:
             object_key = instance.url.split("GamesHubMedia/")[-1]
             delete_from_supabase(object_key)
+        if instance.staged_path:
+            discard_staged_file(instance.staged_path)
 
     transaction.on_commit(_delete)
+
+
+@receiver(pre_delete, sender=Post)
+def release_post_hashtags(sender, instance, **kwargs):
+    HashTags.objects.filter(hastags=instance).update(post_count=F("post_count") - 1)
+
+
+@receiver(post_save, sender=Post)
+def rank_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: instance.refresh_rank(activity=1))
+
+
+@receiver(post_delete, sender=Post)
+def unrank_post(sender, instance, **kwargs):
+    post_id = instance.id
+    transaction.on_commit(lambda: safe_rank_update(remove_post_rank, post_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def rank_commented_post(sender, instance, created=False, **kwargs):
+    if instance.content_type_id != ContentType.objects.get_for_model(Post).id:
+        return
+    post = Post(id=instance.object_id)
+    transaction.on_commit(lambda: post.refresh_rank(activity=1 if created else 0))
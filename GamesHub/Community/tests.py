@@ -1,3 +1,106 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from unittest import mock
+from utills.models import UpvoteDownvoteControl
+from utills.votes import apply_vote
+from .models import Post
+import threading
 
-# Create your tests here.
+User = get_user_model()
+
+
+class VoteFixture:
+    # the counter deltas apply_vote hands to redis after commit are collected here instead
+    def setUp(self):
+        self.user         = User.objects.create(username="voter", email="voter@example.com")
+        self.post         = Post.objects.create(user=self.user, title="title", body="body")
+        self.content_type = ContentType.objects.get_for_model(Post)
+        self.deltas       = []
+        self.deltas_lock  = threading.Lock()
+
+        patcher = mock.patch("utills.votes.record_vote_delta", self.record_delta)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record_delta(self, model, content_type_id, object_id, up, down):
+        with self.deltas_lock:
+            self.deltas.append((up, down))
+
+    def stored_votes(self):
+        return list(UpvoteDownvoteControl.objects.filter(content_type=self.content_type, object_id=self.post.id).values_list("user_id", "upvotedownvote"))
+
+
+class ApplyVoteTests(VoteFixture, TestCase):
+
+    def vote(self, vote):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                apply_vote(self.post, self.content_type, self.user, vote)
+
+    def test_first_vote_inserts_a_row(self):
+        self.vote(True)
+
+        self.assertEqual(self.stored_votes(), [(self.user.id, True)])
+        self.assertEqual(self.deltas, [(1, 0)])
+
+    def test_same_vote_again_takes_it_back(self):
+        self.vote(False)
+        self.vote(False)
+
+        self.assertEqual(self.stored_votes(), [])
+        self.assertEqual(self.deltas, [(0, 1), (0, -1)])
+
+    def test_opposite_vote_switches_it(self):
+        self.vote(True)
+        self.vote(False)
+
+        self.assertEqual(self.stored_votes(), [(self.user.id, False)])
+        self.assertEqual(self.deltas, [(1, 0), (-1, 1)])
+
+    def test_empty_vote_clears_the_direction(self):
+        self.vote(True)
+        self.vote(None)
+
+        self.assertEqual(self.stored_votes(), [(self.user.id, None)])
+        self.assertEqual(self.deltas, [(1, 0), (-1, 0)])
+
+
+class ConcurrentVoteTests(VoteFixture, TransactionTestCase):
+
+    def test_concurrent_first_clicks_count_once(self):
+        # the first click holds its uncommitted insert open until the second one is waiting on
+        # the unique index, which then resolves to a conflict instead of a second row
+        inserted = threading.Event()
+        results  = {}
+
+        def first_click():
+            try:
+                with transaction.atomic():
+                    apply_vote(self.post, self.content_type, self.user, True)
+                    inserted.set()
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_sleep(0.5)")
+                results["first"] = "ok"
+            finally:
+                connection.close()
+
+        def second_click():
+            try:
+                inserted.wait(5)
+                with transaction.atomic():
+                    apply_vote(self.post, self.content_type, self.user, True)
+                results["second"] = "ok"
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=first_click), threading.Thread(target=second_click)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(results, {"first": "ok", "second": "ok"})
+        self.assertEqual(self.stored_votes(), [(self.user.id, True)])
+        self.assertEqual(self.deltas, [(1, 0)])
@@ -1,10 +1,11 @@
 
 from django.urls import path
-from .views import PostListCreateView, CommentListCreateView, PostRetrieveUpdateDestroyView, CommentRetrieveUpdateDestroyView
+from .views import PostListCreateView, CommentListCreateView, PostRetrieveUpdateDestroyView, CommentRetrieveUpdateDestroyView, trending_hashtag_list
 from Support.views import PostReportCreateView, CommentReportCreateView
 
 urlpatterns = [
     path("posts", PostListCreateView.as_view()),
+    path("hashtags/trending", trending_hashtag_list),
     path("posts/<int:pk>/comments", CommentListCreateView.as_view()),
     path("posts/<int:pk>", PostRetrieveUpdateDestroyView.as_view()),
     path("posts/<int:object_id>/comments/<int:pk>", CommentRetrieveUpdateDestroyView.as_view()),
@@ -2,11 +2,20 @@ from .models import Post, Comment
 from .serializers import PostSerializer, CommentSerializer, PostDetailSerializer, CommentDetailSerializer
 from rest_framework.exceptions import NotFound
 from django.contrib.contenttypes.models import ContentType
-from utills.baseviews import BaseListCreateView, BaseRetrieveUpdateDestroyView
+from utills.baseviews import BaseListCreateView, BaseRetrieveUpdateDestroyView, CustomPagination
+from utills.ranking import RANKED_SORTS, ranked_post_ids, trending_hashtags
+from utills.cache_helper import read_through
 from rest_framework.parsers import MultiPartParser
-from .documentation import post_create_schema, post_list_schema, comment_create_schema, comment_list_schema, comment_delete_schema, comment_retrieve_schema, comment_update_schema, post_delete_schema, post_retrieve_schema, post_update_schema
+from rest_framework.exceptions import ValidationError as RestValidationError
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework import status
+from GamesHub.settings import CACHE_ENV
+from .documentation import trending_hashtags_schema, post_create_schema, post_list_schema, comment_create_schema, comment_list_schema, comment_delete_schema, comment_retrieve_schema, comment_update_schema, post_delete_schema, post_retrieve_schema, post_update_schema
 
-POST_CONTENT_TYPE = ContentType.objects.get_for_model(Post)
+POST_CONTENT_TYPE    = ContentType.objects.get_for_model(Post)
+RANKED_CACHE_TIMEOUT = 60
 
 @post_list_schema
 @post_create_schema
@@ -14,19 +23,48 @@ class PostListCreateView(BaseListCreateView):
     model            = Post
     serializer_class = PostSerializer
     parser_classes   = [MultiPartParser]
+    cursor_ordering  = ("-created_at", "-id")
 
     def get_queryset(self):
-        qs = self.model.objects.prefetch_related("media", "hashtags").order_by("-created_at")
+        qs = self.model.objects.select_related("user").prefetch_related("media", "hashtags").order_by("-created_at")
         request = self.request
         hashtag = request.query_params.get("hashtag")
         username = request.query_params.get("username")
         if hashtag:
             hashtag = hashtag.lower().strip()
-            qs = qs.filter(hashtags__tag__iexact=hashtag)
+            qs = qs.filter(hashtags__tag=hashtag)
         if username:
             qs = qs.filter(user__username__iexact=username)
         return qs.distinct()
-    
+
+    def list(self, request, *args, **kwargs):
+        sort = request.query_params.get("sort")
+        if sort is not None:
+            if sort not in RANKED_SORTS:
+                raise RestValidationError({"sort": [f"sort should be one of {', '.join(RANKED_SORTS)}"]})
+            if request.query_params.get("hashtag") or request.query_params.get("username"):
+                raise RestValidationError({"sort": ["sort cannot be combined with hashtag or username filters"]})
+            # ranked pages move with every vote, so they are only cached briefly
+            self.cache_timeout = RANKED_CACHE_TIMEOUT
+        return super().list(request, *args, **kwargs)
+
+    def get_page_data(self):
+        sort = self.request.query_params.get("sort")
+        if sort is None:
+            return super().get_page_data()
+
+        paginator            = CustomPagination()
+        paginator.model_name = self.model.__name__
+        paginator.request    = self.request
+        paginator.limit      = paginator.get_limit(self.request)
+        paginator.offset     = paginator.get_offset(self.request)
+
+        ids, paginator.count = ranked_post_ids(sort, paginator.offset, paginator.limit)
+        posts                = Post.objects.select_related("user").prefetch_related("media", "hashtags").in_bulk(ids)
+        page                 = [posts[post_id] for post_id in ids if post_id in posts]
+        serializer           = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
+
     def get_extra_save_kwargs(self, request, *args, **kwargs):
         return {}
     
@@ -36,6 +74,7 @@ class PostListCreateView(BaseListCreateView):
 class CommentListCreateView(BaseListCreateView):
     model            = Comment
     serializer_class = CommentSerializer
+    cursor_ordering  = ("-created_at", "-id")
         
     def get_queryset(self):
         try:
@@ -75,4 +114,18 @@ class CommentRetrieveUpdateDestroyView(BaseRetrieveUpdateDestroyView):
         except Comment.DoesNotExist:
             raise NotFound(f"requested Comment with pk {pk} not linked to Post {object_id}")
         self.check_object_permissions(self.request, obj)
-        return obj
\ No newline at end of file
+        return obj
+
+
+@trending_hashtags_schema
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def trending_hashtag_list(request):
+    try:
+        limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+    except ValueError:
+        return Response({"error": {"code": "invalid_limit", "message": "limit should be an integer"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = f"{CACHE_ENV}:hashtags:trending:{limit}"
+    hashtags  = read_through(cache_key, lambda: [{"tag": tag, "score": score} for tag, score in trending_hashtags(limit)], RANKED_CACHE_TIMEOUT)
+    return Response({"message": "trending hashtags", "hashtags": hashtags})
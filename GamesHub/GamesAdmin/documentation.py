@@ -8,7 +8,7 @@ games_admin_get_schema = extend_schema(
 
         - Requires authentication (`IsAdminOrReadOnly`)
         - Accepts optional `games` query parameter (list of IDs)
-        - Returns paginated catalogue of games
+        - Returns paginated catalogue of games with genre and platform facet counts
     """,
     parameters=[
         OpenApiParameter(name="games", description="List of game IDs to filter", required=False, type=int, many=True),
@@ -25,6 +25,7 @@ games_admin_get_schema = extend_schema(
                 "count": 2,
                 "next": None,
                 "previous": None,
+                "facets": {"genre": {"Action RPG": 1, "Roguelike": 1}, "platforms": {"PC": 2}},
                 "catalogue": [
                     {"id": 1, "name": "Elden Ring", "developer": "FromSoftware"},
                     {"id": 2, "name": "Hades II", "developer": "Supergiant Games"}
@@ -569,14 +570,15 @@ game_media_admin_schema = extend_schema(
     methods=["POST"],
     summary="Bulk Populate Game Media",
     description="""
-        Populates media (screenshots and trailers) for multiple games using IGDB and YouTube.
+        Queues a background job that populates media (screenshots and trailers) for multiple games using IGDB and YouTube.
 
         - Requires authentication (`IsAdminOrReadOnly`)
         - Accepts a list of game IDs in the request body
+        - IGDB lookups are batched (10 games per request) and downloads/uploads run concurrently on a Celery worker
         - For each game:
             - Adds up to 5 screenshots (if available)
             - Adds or updates a YouTube trailer (if available)
-        - Returns logs per game ID
+        - Returns a job id, poll `update_game_media/{job_id}` for progress and per game logs
     """,
     request={
         "application/json": {
@@ -591,30 +593,20 @@ game_media_admin_schema = extend_schema(
         }
     },
     responses={
-        200: {"application/json": {"type": "object"}},
+        202: {"application/json": {"type": "object"}},
         400: {"application/json": {"type": "object"}},
         500: {"application/json": {"type": "object"}}
     },
     examples=[
         OpenApiExample(
-            name="Game Media Populated",
+            name="Game Media Update Queued",
             value={
-                "message": "game media update details",
-                "details": {
-                    "5": {
-                        "game_processed": "Elden Ring",
-                        "game_trailer": "added",
-                        "screenshots_added": 5
-                    },
-                    "6": {
-                        "game_processed": "Hades II",
-                        "game_trailer": "updated",
-                        "screenshots_added": 3
-                    }
-                }
+                "message": "game media update queued",
+                "job_id": "3f1c2a9d8b7e4c6f9a0b1c2d3e4f5a6b",
+                "status_url": "https://gameshub.example/gamesadmin/update_game_media/3f1c2a9d8b7e4c6f9a0b1c2d3e4f5a6b"
             },
             response_only=True,
-            status_codes=["200"]
+            status_codes=["202"]
         ),
         OpenApiExample(
             name="Games Field Missing",
@@ -630,12 +622,58 @@ game_media_admin_schema = extend_schema(
         ),
         OpenApiExample(
             name="Internal Server Error",
+            value={"error": {"code": "auto_upload_fail", "message": "could not queue automatic game media population"}},
+            response_only=True,
+            status_codes=["500"]
+        )
+    ]
+)
+
+
+game_media_job_schema = extend_schema(
+    methods=["GET"],
+    summary="Game Media Update Status",
+    description="""
+        Returns progress of a bulk game media population job.
+
+        - Requires staff authentication
+        - `status` is one of `queued`, `running`, `completed` or `failed`
+        - `details` holds the logs of every game processed so far, keyed by game ID
+        - Jobs are kept for 24 hours
+    """,
+    responses={
+        200: {"application/json": {"type": "object"}},
+        404: {"application/json": {"type": "object"}}
+    },
+    examples=[
+        OpenApiExample(
+            name="Job Running",
             value={
-                "error": {"code": "auto_upload_fail", "message": "errors in automatic game media population"},
-                "updated_games": {"7": "game obj with id 7 does not exist"}
+                "message": "game media update status",
+                "job": {
+                    "job_id": "3f1c2a9d8b7e4c6f9a0b1c2d3e4f5a6b",
+                    "status": "running",
+                    "total": 3,
+                    "processed": 2,
+                    "started_at": "2025-07-01T10:15:00+00:00",
+                    "details": {
+                        "5": {
+                            "game_processed": "Elden Ring",
+                            "game_trailer": "added",
+                            "screenshots_added": 5
+                        },
+                        "7": "game obj with id 7 does not exist"
+                    }
+                }
             },
             response_only=True,
-            status_codes=["500"]
+            status_codes=["200"]
+        ),
+        OpenApiExample(
+            name="Job Not Found",
+            value={"error": {"code": "job_not_found", "message": "no game media update job with id 3f1c2a9d8b7e4c6f9a0b1c2d3e4f5a6b"}},
+            response_only=True,
+            status_codes=["404"]
         )
     ]
 )
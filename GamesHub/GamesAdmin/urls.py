@@ -1,10 +1,11 @@
 
 from django.urls import path
-from .views import games_admin, manage_games, manage_games_media, game_media_admin
+from .views import games_admin, manage_games, manage_games_media, game_media_admin, game_media_job
 
 urlpatterns = [
     path('manage', games_admin),
     path('manage_game/<int:pk>', manage_games),
     path('manage_game_media/<int:pk>', manage_games_media),
-    path('update_game_media', game_media_admin)
+    path('update_game_media', game_media_admin),
+    path('update_game_media/<str:job_id>', game_media_job)
 ]
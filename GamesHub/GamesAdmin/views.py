@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.response import Response
 from rest_framework import status
-from utills.permissions import IsAdminOrReadOnly
+from utills.permissions import IsAdminOrReadOnly, IsAdminuser
 from Store.models import Game, GamesMedia
 from Store.serializers import gamesSerializer, GameMediaSerializer
 from django.contrib.auth import get_user_model
@@ -11,10 +11,12 @@ from utills.storage_supabase import upload_file_to_supabase
 import re
 from rest_framework.exceptions import APIException, UnsupportedMediaType
 from django.db.models import Q
-from django.core.exceptions import ValidationError
-from utills.game_media_update import populate_gamemedia
+from utills.game_media_update import media_job_key, MEDIA_JOB_TIMEOUT
+from django.core.cache import cache
+from celery import current_app
+import uuid
 import logging
-from .documentation import games_admin_delete_schema, games_admin_get_schema, games_admin_patch_schema, games_admin_post_schema, manage_game_delete_schema, manage_game_get_schema, manage_game_patch_schema, manage_games_media_delete_schema, manage_games_media_get_schema, manage_games_media_post_schema, game_media_admin_schema
+from .documentation import games_admin_delete_schema, games_admin_get_schema, games_admin_patch_schema, games_admin_post_schema, manage_game_delete_schema, manage_game_get_schema, manage_game_patch_schema, manage_games_media_delete_schema, manage_games_media_get_schema, manage_games_media_post_schema, game_media_admin_schema, game_media_job_schema
 
 logger = logging.getLogger("gameshub") 
 User = get_user_model()
@@ -31,8 +33,8 @@ def games_admin(request):
         game_ids = request.query_params.getlist("games")
         
         try:
-            gamesSerial, get_next_link, get_previous_link, count = search(request, game_ids)
-            return Response({"message": "game catalogue", "count":count,  "next": get_next_link, "previous": get_previous_link, "catalogue":gamesSerial}, status=status.HTTP_200_OK)
+            gamesSerial, get_next_link, get_previous_link, count, facets = search(request, game_ids)
+            return Response({"message": "game catalogue", "count":count,  "next": get_next_link, "previous": get_previous_link, "facets":facets, "catalogue":gamesSerial}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"game admin get endpoint failure: {str(e)}", exc_info=True)
             return Response({"error":{"code":"game_fetch_error", "message":"internal server error"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -340,22 +342,31 @@ def game_media_admin(request):
 
     if not isinstance(game_ids, list):
         return Response({"error": {"code":"incorrect_datatype", "message":"games should be passed as a list"}}, status=status.HTTP_400_BAD_REQUEST)
-    
-    game_media_updated = {}
 
-    for id in request.data.get("games"):
-        try:
-            game =  Game.objects.get(id  = id)
-            logs = populate_gamemedia(game)
-            game_media_updated[id] = logs
-        except Game.DoesNotExist:
-            game_media_updated[id] = f"game obj with id {id} does not exist"
-        except UnsupportedMediaType as e:
-            return Response({"error": {"code": "unsupported_media_type", "message": str(e)}}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
-        except ValidationError as e:
-            game_media_updated[id] = e
-        except Exception as e:
-            logger.error(f"manage game media admin bulk endpoint failure: {str(e)}", exc_info=True)
-            return Response({"error":{"code":"auto_upload_fail", "message":"errors in automatic game media population"}, "updated_games":game_media_updated}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    return Response({"message":"game media update details", "details":game_media_updated}, status=status.HTTP_200_OK)
\ No newline at end of file
+    try:
+        game_ids = [int(id) for id in game_ids]
+    except (TypeError, ValueError):
+        return Response({"error": {"code":"incorrect_datatype", "message":"games should be a list of game ids"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    # ingestion runs on a celery worker, the admin polls the job for progress
+    job_id = uuid.uuid4().hex
+    job    = {"job_id": job_id, "status": "queued", "total": len(game_ids), "processed": 0, "details": {}}
+    try:
+        cache.set(media_job_key(job_id), job, MEDIA_JOB_TIMEOUT)
+        current_app.send_task("ingest_game_media", args=[job_id, game_ids])
+    except Exception as e:
+        logger.error(f"manage game media admin bulk endpoint failure: {str(e)}", exc_info=True)
+        return Response({"error":{"code":"auto_upload_fail", "message":"could not queue automatic game media population"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({"message":"game media update queued", "job_id":job_id, "status_url":request.build_absolute_uri(f"{request.path.rstrip('/')}/{job_id}")}, status=status.HTTP_202_ACCEPTED)
+
+@game_media_job_schema
+@api_view(["GET"])
+@permission_classes([IsAdminuser])
+def game_media_job(request, job_id):
+    job = cache.get(media_job_key(job_id))
+
+    if job is None:
+        return Response({"error": {"code":"job_not_found", "message":f"no game media update job with id {job_id}"}}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({"message":"game media update status", "job":job}, status=status.HTTP_200_OK)
@@ -9,6 +9,7 @@ purchase_schema = extend_schema(
         - Requires authentication (`IsAuthenticated`)
         - Accepts a list of game IDs in the request body
         - Returns a payload with games to be bought, invalid or already owned games, and total price
+        - Returns a `quote_token` valid for `quote_expires_in` seconds that `buy` can redeem at the quoted prices
         - Redirects to the `buy` endpoint with the payload
     """,
     request={
@@ -42,7 +43,9 @@ purchase_schema = extend_schema(
                     "7": "Game already available in library",
                     "8": "Game not available enter valid id"
                 },
-                "total_price": 7998.0
+                "total_price": 7998.0,
+                "quote_token": "q3VbX0n2c8JmTQ6k1y4r7A",
+                "quote_expires_in": 300
             },
             response_only=True,
             status_codes=["200"]
@@ -76,7 +79,8 @@ buy_schema = extend_schema(
         Completes the purchase process for one or more games.
 
         - Requires authentication (`IsAuthenticated`)
-        - Accepts a list of game IDs in the request body
+        - Accepts a list of game IDs or a `quote_token` from the purchase endpoint in the request body
+        - A quote token is single use and charges the quoted prices, a failed buy hands it back until its original expiry
         - Optionally uses wallet balance if `use_wallet` is true
         - Returns transaction IDs, errors for invalid/owned games, and a confirmation message
     """,
@@ -89,6 +93,10 @@ buy_schema = extend_schema(
                     "items": {"type": "integer"},
                     "description": "List of game IDs to purchase"
                 },
+                "quote_token": {
+                    "type": "string",
+                    "description": "Quote token returned by the purchase endpoint, replaces `id`"
+                },
                 "use_wallet": {
                     "type": "boolean",
                     "description": "Flag to use wallet balance for purchase"
@@ -136,6 +144,12 @@ buy_schema = extend_schema(
             response_only=True,
             status_codes=["400"]
         ),
+        OpenApiExample(
+            name="Invalid Quote",
+            value={"error": {"code": "invalid_quote", "message": "quote expired or not found, request a new quote"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
         OpenApiExample(
             name="Insufficient Funds",
             value={"error": {"code": "insufficient_funds", "message": "not enough fund in wallet, need Rs 500 please recharge and continue"}},
@@ -280,6 +294,7 @@ review_create_schema = extend_schema(
         - User must own the game (present in library)
         - User can only provide one review per game
         - Rating must be between 0 and 5
+        - Blocks banned words in `comment` field
     """,
     parameters=[
         OpenApiParameter(name="id", description="Primary key of the game", required=True, type=int),
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GamesBuzz', '0011_alter_gameinteraction_unique_together'),
+        ('Store', '0020_created_at_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameinteraction',
+            index=models.Index(fields=['user', 'in_library', '-purchase_date', '-transaction_id'], name='library_purchase_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['game', '-created_at', '-id'], name='review_created_at_idx'),
+        ),
+    ]
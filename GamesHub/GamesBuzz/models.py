@@ -13,6 +13,7 @@ class GameInteraction(models.Model):
 
     class Meta:
         unique_together = ('user', 'game', 'in_library') 
+        indexes         = [models.Index(fields=["user", "in_library", "-purchase_date", "-transaction_id"], name="library_purchase_date_idx")]
 
     def get_transaction_id(self):
         return self.transaction_id
@@ -39,6 +40,7 @@ class Review(models.Model):
     
     class Meta:
         unique_together = ('user', 'game') 
+        indexes         = [models.Index(fields=["game", "-created_at", "-id"], name="review_created_at_idx")]
 
     def __str__(self):
         return f"{self.user} review for {self.game}"
\ No newline at end of file
@@ -1,9 +1,12 @@
 from rest_framework.serializers import ModelSerializer, ValidationError
 from .models import GameInteraction, Review
 from rest_framework import serializers
-from utills.microservices import validate_vote_value, update_voting_field
+from utills.microservices import validate_vote_value, update_voting_field, strip_vote_fields
 from django.contrib.contenttypes.models import ContentType
 from Store.serializers import gamesSerializerSimplified
+from utills.storage_supabase import SignedURLListSerializer
+from utills.moderation import validate_clean_text
+from utills.votes import PendingVotesMixin, PendingVotesListSerializer
 
 REVIEW_CONTENT_TYPE = ContentType.objects.get_for_model(Review)
 
@@ -13,15 +16,19 @@ class GameInteractionSerializer(ModelSerializer):
         exclude = "__all__"
 
     
-class ReviewSerializer(ModelSerializer):
+class ReviewSerializer(PendingVotesMixin, ModelSerializer):
     user            = serializers.SerializerMethodField()
     upvote_review   = serializers.CharField(write_only=True, required=False)
     downvote_review = serializers.CharField(write_only=True, required=False)
 
     class Meta:
-        model = Review
-        fields = ('id', 'user', 'game', 'comment', 'rating', "upvote", "downvote", "upvote_review", "downvote_review")
-        extra_kwargs = {'game': {'read_only': True}}
+        model                 = Review
+        fields                = ('id', 'user', 'game', 'comment', 'rating', "upvote", "downvote", "upvote_review", "downvote_review")
+        extra_kwargs          = {'game': {'read_only': True}}
+        list_serializer_class = PendingVotesListSerializer
+
+    def validate_comment(self, value):
+        return validate_clean_text(value, "comment")
 
     def validate(self, attrs):
         if validate_vote_value(attrs, "review"):
@@ -31,9 +38,10 @@ class ReviewSerializer(ModelSerializer):
 
     def update(self, instance, validated_data):
         request_user = self.context.get('request_user')
-        model_obj    = Review.objects.filter(id = instance.id)
-        instance = update_voting_field(instance, validated_data, REVIEW_CONTENT_TYPE, "review", request_user, model_obj)
+        instance = update_voting_field(instance, validated_data, REVIEW_CONTENT_TYPE, "review", request_user)
 
+        if not strip_vote_fields(validated_data, "review"):
+            return instance
         return super().update(instance, validated_data)
 
     def get_user(self, obj):
@@ -41,12 +49,14 @@ class ReviewSerializer(ModelSerializer):
 
 
 class GameInteractionSerializerSimplified(ModelSerializer):
-    user   = serializers.SerializerMethodField()
-    game   = gamesSerializerSimplified(read_only=True)
+    user              = serializers.SerializerMethodField()
+    game              = gamesSerializerSimplified(read_only=True)
+    signed_url_fields = {"game.cover_picture": 900}
 
     class Meta:
-        model = GameInteraction
-        fields = ('user', 'game')
+        model                 = GameInteraction
+        fields                = ('user', 'game')
+        list_serializer_class = SignedURLListSerializer
 
     def get_user(self, obj):
         return obj.user.get_username()
@@ -3,7 +3,7 @@ from django.dispatch import receiver
 from .models import Review
 from Store.models import Game
 from Store.models import GamesMedia
-from utills.microservices import delete_cache_key
+from utills.microservices import invalidate_cache_tags
 
 @receiver(pre_save, sender=Review)
 def update_rating_change(sender, instance, **kwargs):
@@ -19,7 +19,7 @@ def update_rating_change(sender, instance, **kwargs):
             else:
                 new_rating = 0
             gameObj.set_rating_detail(new_rating, no_of_rating)
-            gameObj.save()
+            gameObj.save(update_fields=["rating", "no_of_rating"])
     except:
         pass
 
@@ -32,14 +32,16 @@ def update_game_rating(sender, instance, **kwargs):
         no_of_rating  += 1
         new_rating     = round((current_rating + instance.rating)/no_of_rating, 2)
         gameObj.set_rating_detail(new_rating, no_of_rating)
-        gameObj.save()
-        delete_cache_key("game")
+        gameObj.save(update_fields=["rating", "no_of_rating"])
 
 
 @receiver(post_save, sender=GamesMedia)
 @receiver(post_delete, sender=GamesMedia)
+def update_media_cache(sender, instance, **kwargs):
+    invalidate_cache_tags(f"game:{instance.game_id}")
+
 @receiver(post_save, sender=Game)
 @receiver(post_delete, sender=Game)
 def update_cache(sender, instance, **kwargs):
-    delete_cache_key("game")
+    invalidate_cache_tags("catalogue", f"game:{instance.pk}")
 
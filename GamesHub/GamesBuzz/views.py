@@ -5,12 +5,14 @@ from rest_framework import status
 from Store.models import Game, GamesMedia, Cart, Wishlist, WalletTransaction, Wallet
 from Store.serializers import gamesSerializerSimplified, gamesSerializer, GameMediaSerializer
 from django.urls import reverse
-from utills.microservices import mail_service, delete_cache_key
+from utills.microservices import mail_service, tagged_cache_key, invalidate_cache_tags, instance_cache_tags, in_user_library, invalidate_library_set
+from utills.cache_helper import read_through
 from .models import GameInteraction, Review
 from datetime import datetime
+import secrets
+import time
 from django.core.cache import cache
 from .serializers import ReviewSerializer
-from django.db.models import Q
 from utills.email_helper import game_bought_details
 from django.core.exceptions import ValidationError
 from django.db import transaction, IntegrityError
@@ -30,6 +32,66 @@ from .documentation import purchase_schema, buy_schema, games_detail_schema, rev
 
 logger = logging.getLogger("gameshub") 
 
+QUOTE_TIMEOUT = 300
+
+def quote_key(token):
+    return f"{CACHE_ENV}:quote:{token}"
+
+def price_games(user, ids):
+    na_list   = {}
+    requested = {}
+    seen      = set()
+
+    for id in ids:
+        try:
+            game_id = int(id)
+        except (TypeError, ValueError):
+            na_list[id]  = "Game not available enter valid id with correct format"
+            continue
+        if game_id in seen:
+            na_list[id]  = "duplicate id in request"
+            continue
+        seen.add(game_id)
+        requested[id] = game_id
+
+    # games and current ownership are resolved for the whole basket up front
+    games = Game.objects.in_bulk(list(requested.values()))
+    owned = set(GameInteraction.objects.filter(user = user, in_library = True, game_id__in = list(games)).values_list("game_id", flat=True))
+
+    items = {}
+    for id, game_id in requested.items():
+        if game_id not in games:
+            na_list[id]  = "Game not available enter valid id"
+        elif game_id in owned:
+            na_list[id]  = "Game already available in library"
+        else:
+            items[id]    = (games[game_id], Decimal(str(games[game_id].get_price())))
+
+    return items, na_list
+
+def redeem_quote(user, quote):
+    na_list  = {}
+    game_ids = [game_id for _, game_id, _, _ in quote["items"]]
+    games    = Game.objects.only("id", "name").in_bulk(game_ids)
+    owned    = set(GameInteraction.objects.filter(user = user, in_library = True, game_id__in = game_ids).values_list("game_id", flat=True))
+
+    items = {}
+    for id, game_id, name, price in quote["items"]:
+        if game_id not in games:
+            na_list[id]  = "Game not available enter valid id"
+        elif game_id in owned:
+            na_list[id]  = "Game already available in library"
+        else:
+            items[id]    = (games[game_id], price)
+
+    return items, na_list
+
+def restore_quote(token, quote):
+    # a quote handed back after a failed buy keeps its original expiry, retrying never extends the price lock
+    remaining = int(quote.get("expires_at", 0) - time.time())
+    if remaining > 0:
+        cache.add(quote_key(token), quote, timeout=remaining)
+
 @purchase_schema
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -42,121 +104,102 @@ def purchase(request):
     if not isinstance(game_ids, list):
         return Response({"error": {"code":"incorrect_datatype", "message":"games should be passed as a list"}}, status=status.HTTP_400_BAD_REQUEST)
     
-    to_buy        = {}
-    na_list       = {}
-    total_price   = 0
+    try:
+        items, na_list = price_games(request.user, game_ids)
+        gamesSerial    = gamesSerializerSimplified([gameObj for gameObj, _ in items.values()], many=True).data
+    except UnsupportedMediaType as e:
+        return Response({"error": {"code": "unsupported_media_type", "message": str(e)}}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    except Exception as e:
+        logger.error(f"purchase endpoint failure: {str(e)}", exc_info=True)
+        return Response({"error":{"code":"purchase_section_fail", "message":"errors in purchase section"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    for id in request.data.get("id"):
-        try:
-            gameObj      = Game.objects.get(id = id)
-            try:
-                GameInteraction.objects.get(game = gameObj, user = request.user)
-                na_list[id]  = "Game already available in library"
-            except GameInteraction.DoesNotExist:
-                to_buy[id]   = gamesSerializerSimplified(gameObj).data
-                total_price += gameObj.get_price()
-            except Exception as e:
-                logger.error(f"purchase endpoint failure: {str(e)}", exc_info=True)
-                return Response({"error":{"code":"purchase_section_fail", "message":"errors in purchase section"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Game.DoesNotExist:
-            na_list[id]  = "Game not available enter valid id"
-        except (ValueError, ValidationError):
-            na_list[id]  = "Game not available enter valid id with correct format"
-        except UnsupportedMediaType as e:
-            return Response({"error": {"code": "unsupported_media_type", "message": str(e)}}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
-        
-        except Exception as e:
-            logger.error(f"purchase endpoint failure: {str(e)}", exc_info=True)
-            return Response({"error":{"code":"purchase_section_fail", "message":"errors in purchase section"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    to_buy      = dict(zip(items, gamesSerial))
+    total_price = sum((price for _, price in items.values()), Decimal("0.00"))
+
+    # the priced basket is kept briefly so buy can redeem it without reading the catalogue again
+    quote_token = None
+    if items:
+        quote_token = secrets.token_urlsafe(16)
+        cache.set(quote_key(quote_token), {"user_id": request.user.id, "expires_at": time.time() + QUOTE_TIMEOUT, "items": [(id, gameObj.id, gameObj.name, price) for id, (gameObj, price) in items.items()]}, timeout=QUOTE_TIMEOUT)
      
     endpoint = reverse('buy')
 
     full_url = request.build_absolute_uri(endpoint)
     
-    return Response({"message": "redirect to endpoint with this payload except 'invalid_or_owned_games'", "url":full_url, "Games_to_be_baught":to_buy, "invalid_or_owned_games":na_list, "total_price": round(total_price, 2)}, status=status.HTTP_200_OK)
+    return Response({"message": "redirect to endpoint with this payload except 'invalid_or_owned_games'", "url":full_url, "Games_to_be_baught":to_buy, "invalid_or_owned_games":na_list, "total_price": float(total_price), "quote_token":quote_token, "quote_expires_in":QUOTE_TIMEOUT}, status=status.HTTP_200_OK)
 
 
 @transaction.atomic
-def buy_atomic(request, use_wallet, wallet):
+def buy_atomic(request, use_wallet, wallet, quote=None):
     transaction_ids  = {}
-    na_list          = {}
-    total            = 0
-    games_bought     = []
-    
-    balance    = wallet.get_balance()
-    
-    for id in request.data.get("id"):
-        try:
-            gameObj      = Game.objects.get(id = id)
-            try:
-                GameInteraction.objects.get(game = gameObj, user = request.user, in_library = True)
-                na_list[id]  = "Game already available in library"
-            except GameInteraction.DoesNotExist:
-                try:
-                    price                 = Decimal(str(gameObj.get_price()))
-                    total                += price
-                    gameBoughtObj         = GameInteraction.objects.create(user = request.user, game = gameObj, purchase_date = datetime.now(), purchase_price = price)
-                    games_bought.append(gameBoughtObj)
-                    transaction_ids[id]   = gameBoughtObj.get_transaction_id()
-                    if use_wallet:
-                        if balance - price >= 0:
-                            balance -= price
-                            WalletTransaction.objects.create(wallet= wallet, amount=price, payment_type = 3)
-                        else:
-                            raise ValueError(f"not enough fund in wallet, need Rs {abs(balance - price)} please reacharge and continue")
-
-                except IntegrityError as e:
-                    raise Exception("model integrity error")
-
-                try:
-                    cart         = Cart.objects.get(user = request.user)
-                    cart.games.remove(gameObj)
-                except Cart.DoesNotExist:
-                    pass #nothing needed to be done as there is no cart
-
-                try:
-                    wishlist     = Wishlist.objects.get(user = request.user)
-                    wishlist.games.remove(gameObj)
-                except Wishlist.DoesNotExist:
-                    pass #nothing needed to be done as there is no wishlist
 
+    if quote is None:
+        items, na_list = price_games(request.user, request.data.get("id"))
+    else:
+        items, na_list = redeem_quote(request.user, quote)
 
-        except Game.DoesNotExist:
-            na_list[id]  = "Game not available enter valid id"
-        except ValidationError:
-            na_list[id]  = "Game not available enter valid id with correct format"
-        except UnsupportedMediaType as e:
-            return Response({"error": {"code": "unsupported_media_type", "message": str(e)}}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
-        
-    
-    response_message = f"Games requested bought successfully!" if len(transaction_ids) > 0 else "Nothing to buy"
+    if not items:
+        return transaction_ids, [], Decimal("0.00"), "Nothing to buy", na_list
+
+    purchase_date = datetime.now()
+    games_bought  = [GameInteraction(user = request.user, game = gameObj, purchase_date = purchase_date, purchase_price = price) for gameObj, price in items.values()]
+    total         = sum((price for _, price in items.values()), Decimal("0.00"))
 
-    return transaction_ids, games_bought, total, response_message, na_list
+    try:
+        games_bought = GameInteraction.objects.bulk_create(games_bought)
+        if use_wallet:
+            WalletTransaction.objects.create(wallet= wallet, amount=total, payment_type = 3)
+    except ValidationError:
+        wallet.refresh_from_db(fields=["balance"])
+        raise ValueError(f"not enough fund in wallet, need Rs {abs(wallet.balance - total)} please reacharge and continue")
+    except IntegrityError as e:
+        raise Exception("model integrity error")
+
+    for id, gameBoughtObj in zip(items, games_bought):
+        transaction_ids[id] = gameBoughtObj.get_transaction_id()
+
+    bought_ids = [gameObj.id for gameObj, _ in items.values()]
+    Cart.games.through.objects.filter(cart_id = request.user.id, game_id__in = bought_ids).delete()
+    Wishlist.games.through.objects.filter(wishlist_id = request.user.id, game_id__in = bought_ids).delete()
+
+    return transaction_ids, games_bought, total, "Games requested bought successfully!", na_list
 
 @buy_schema
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def buy(request):
     game_ids      = request.data.get("id")
+    quote_token   = request.data.get("quote_token")
     use_wallet    = True if request.data.get("use_wallet") in [1, '1', "true", True] else False
     wallet        = Wallet.objects.get(user=request.user)
+    quote         = None
 
-    if game_ids is None or game_ids == '':
-        return Response({"error":{"code":"not_null_constraint", "message":"buying ids cannot be empty"}}, status=status.HTTP_400_BAD_REQUEST)
+    if quote_token:
+        quote = cache.get(quote_key(quote_token))
+        # deleting the quote claims it, a concurrent redemption of the same token finds nothing to delete
+        if quote is None or quote["user_id"] != request.user.id or not cache.delete(quote_key(quote_token)):
+            return Response({"error":{"code":"invalid_quote", "message":"quote expired or not found, request a new quote"}}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        if game_ids is None or game_ids == '':
+            return Response({"error":{"code":"not_null_constraint", "message":"buying ids cannot be empty"}}, status=status.HTTP_400_BAD_REQUEST)
 
-    if not isinstance(game_ids, list):
-        return Response({"error": {"code":"incorrect_datatype", "message":"games should be passed as a list"}}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(game_ids, list):
+            return Response({"error": {"code":"incorrect_datatype", "message":"games should be passed as a list"}}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        transaction_ids, games_bought, total, response_message, na_list = buy_atomic(request, use_wallet, wallet)
-        username = request.user.get_username()
-        delete_cache_key("library" + username)
-        if use_wallet:
-            delete_cache_key("transaction" + username)
+        transaction_ids, games_bought, total, response_message, na_list = buy_atomic(request, use_wallet, wallet, quote)
+        user_id = request.user.id
+        invalidate_cache_tags(f"library:{user_id}", f"cart:{user_id}", f"wishlist:{user_id}", f"transaction:{user_id}")
+        invalidate_library_set(user_id)
     except ValueError as e:
+        # the quote stays redeemable after a recharge
+        if quote is not None:
+            restore_quote(quote_token, quote)
         return Response({"error": {"code": "insufficient_funds", "message": str(e)}},status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"buy endpoint failure: {str(e)}", exc_info=True)
+        if quote is not None:
+            restore_quote(quote_token, quote)
         return Response({"error":{"code":"internal_buying_point_error", "message":"internal server error"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     if len(transaction_ids) > 0:
@@ -167,7 +210,6 @@ def buy(request):
         recepients = [request.user.get_email()]
 
         mail_result, _ = mail_service(Subject, message, recepients)
-        delete_cache_key("transaction" + username)
         
         if not mail_result:
             return Response({"error":{"code":"mailer_api_failed", "message":"mailer service failed but games bought added successfully"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -178,31 +220,11 @@ def buy(request):
 @games_detail_schema
 @api_view(["GET"])
 def games_detail(request, pk):
-    if request.user.is_authenticated:
-        key = f"{CACHE_ENV}:game:{request.user.get_username()}:{str(pk)}"
-    else:
-        key = f"{CACHE_ENV}:game:anonymous_user:{str(pk)}"
+    key = tagged_cache_key(f"{CACHE_ENV}:game:detail:{str(pk)}", [f"game:{pk}"])
 
-    cached_game = cache.get(key)
-    if cached_game:
-        return Response(cached_game, status=status.HTTP_200_OK)
-            
     try:
-        game  = Game.objects.get(pk = pk) 
-        
-        gameMedia       = GamesMedia.objects.filter(game = game)
-        gameMediaSerial = GameMediaSerializer(gameMedia, many = True)
-
-        if request.user.is_authenticated:
-            gameInteractionUser           = GameInteraction.objects.filter(Q(game = game) & Q(user = request.user))
-            library_flag                  = gameInteractionUser.exists()
-
-        else:
-            library_flag                  = False
-
-
-        gameSerialData = gamesSerializer(game)
-        gameData       = gameSerialData.data
+        gameDetail   = read_through(key, lambda: game_detail_payload(pk), timeout=3600)
+        library_flag = request.user.is_authenticated and in_user_library(request.user.id, pk)
     except Game.DoesNotExist:
         return Response({"error": {"code":"do_not_exist", "message":"game object doesn't exist"}}, status=status.HTTP_404_NOT_FOUND)
     except UnsupportedMediaType as e:
@@ -212,18 +234,24 @@ def games_detail(request, pk):
         logger.error(f"game detail endpoint failure: {str(e)}", exc_info=True)
         return Response({"error":{"code":"game_detail_failed", "message":"please try back later"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    return Response({"message": f"game detail for pk {pk}", "in_library":library_flag, **gameDetail}, status=status.HTTP_200_OK)
 
-    response = Response({"message": f"game detail for pk {pk}", "in_library":library_flag, "game":gameData, "game_media":gameMediaSerial.data}, status=status.HTTP_200_OK)
+def game_detail_payload(pk):
+    game  = Game.objects.get(pk = pk) 
     
-    cache.set(key, response.data, timeout=600)
+    gameMedia       = GamesMedia.objects.filter(game = game)
+    gameMediaSerial = GameMediaSerializer(gameMedia, many = True)
 
-    return Response({"message": f"game detail for pk {pk}", "in_library":library_flag, "game":gameData, "game_media":gameMediaSerial.data}, status=status.HTTP_200_OK)
+    gameSerialData = gamesSerializer(game)
+    gameData       = gameSerialData.data
+    return {"game":gameData, "game_media":gameMediaSerial.data}
 
 @review_list_schema
 @review_create_schema
 class ReviewListCreateView(BaseListCreateView):
     model            = Review
     serializer_class = ReviewSerializer
+    cursor_ordering  = ("-created_at", "-id")
         
     def get_queryset(self):
         try:
@@ -302,8 +330,6 @@ class GameTicketCreateView(BaseListCreateView):
         if GameInteraction.objects.filter(user= request.user, game = extra_kwargs["game"]).count() > 1 and issue_type == 1:
             return Response({"error": {"code":"duplicate_transaction", "message":"user already returned this game in a previous ticket and got a refund can't process a refund again"}},status=status.HTTP_400_BAD_REQUEST)
 
-        base_key = self.model.__name__.lower()
-
         serializer = self.serializer_class(data=request.data)
 
         game_interation = extra_kwargs.pop("library_object")
@@ -314,6 +340,6 @@ class GameTicketCreateView(BaseListCreateView):
         if not serializer.is_valid():
             return Response({"error": {"code": "validation_errors", "details": serializer.errors}},status=status.HTTP_400_BAD_REQUEST)
         
-        serializer.save(user=request.user, **extra_kwargs)
-        delete_cache_key(base_key)
+        instance = serializer.save(user=request.user, **extra_kwargs)
+        invalidate_cache_tags(*instance_cache_tags(instance))
         return Response({"message": f"{self.model.__name__} has been saved successfully", self.model.__name__: serializer.data}, status=status.HTTP_201_CREATED)
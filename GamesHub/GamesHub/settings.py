@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 import dj_database_url
 import redis
 
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -284,6 +286,16 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Uploads above this size spill to a temporary file instead of being held in memory,
+# storage uploads then stream them to S3 in parts of STORAGE_UPLOAD_PART_SIZE bytes
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+STORAGE_UPLOAD_PART_SIZE    = max(int(os.getenv("STORAGE_UPLOAD_PART_SIZE", 8 * 1024 * 1024)), 5 * 1024 * 1024)
+
+# Post media is staged here until a celery worker on the same host uploads it to storage
+
+MEDIA_STAGING_DIR = os.getenv("MEDIA_STAGING_DIR", os.path.join(tempfile.gettempdir(), "gameshub_staging"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,10 +1,55 @@
-
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+from GamesHub.settings import REDIS_CLIENT, CACHE_ENV
+from redis.exceptions import RedisError
+from utills.models import BlacklistedAccessToken
+import logging
+import time
 
-class LenientJWTAuthentication(JWTAuthentication):
-    def authenticate(self, request):
+logger = logging.getLogger("gameshub")
+
+def authenticate_request(request):
+    # the token is verified and its user loaded once, middleware and DRF share the result through the request
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "_jwt_auth"):
         try:
-            return super().authenticate(request)
+            request._jwt_auth = JWTAuthentication().authenticate(request)
         except AuthenticationFailed:
-            return None
+            request._jwt_auth = None
+    return request._jwt_auth
+
+def clear_request_authentication(request):
+    request = getattr(request, "_request", request)
+    request._jwt_auth = None
+
+
+class LenientJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        return authenticate_request(request)
+
+
+def denylist_key(jti):
+    return f"{CACHE_ENV}:access_denylist:{jti}"
+
+def deny_access_token(access_token):
+    # the entry only has to live as long as the token itself could still be presented
+    try:
+        token = AccessToken(access_token)
+    except TokenError:
+        return
+    remaining = int(token["exp"] - time.time())
+    if remaining > 0:
+        REDIS_CLIENT.set(denylist_key(token["jti"]), 1, ex=remaining)
+
+def is_access_token_denied(validated_token):
+    try:
+        return bool(REDIS_CLIENT.exists(denylist_key(validated_token["jti"])))
+    except RedisError as e:
+        # without redis the blacklist table is checked instead, slower but a revoked token stays revoked
+        logger.error(f"access denylist unavailable, checking the database: {str(e)}", exc_info=True)
+        raw_token = validated_token.token
+        if isinstance(raw_token, bytes):
+            raw_token = raw_token.decode()
+        return BlacklistedAccessToken.objects.filter(access_token = raw_token).exists()
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from utills.storage_supabase import supabase
+from utills.storage_supabase import get_signed_url
 from django.utils import timezone
 
 class AppUser(AbstractUser):
@@ -15,11 +15,7 @@ class AppUser(AbstractUser):
         return self.email
     
     def get_profilePicture(self):
-        if self.profilePicture is not None:
-            profilePicture_path = self.profilePicture.split("GamesHubMedia/")[1]
-            result = supabase.storage.from_("GamesHubMedia").create_signed_url(profilePicture_path, 60)
-            return result["signedURL"]
-        return None
+        return get_signed_url(self.profilePicture, 60)
     
     def get_profilePicture_url(self):
         return self.profilePicture
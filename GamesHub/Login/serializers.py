@@ -2,10 +2,9 @@ from rest_framework.serializers import ModelSerializer
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from utills.storage_supabase import upload_file_to_supabase
+from utills.storage_supabase import upload_file_to_supabase, SignedURLListSerializer
 from rest_framework.exceptions import ValidationError
 import re
-from utills.storage_supabase import supabase
 User = get_user_model()
 
 class userSerializer(ModelSerializer):
@@ -57,14 +56,13 @@ class userSerializer(ModelSerializer):
     
 
 class UserDisplaySerializer(ModelSerializer):
-    profilePicture = serializers.SerializerMethodField()
+    profilePicture    = serializers.SerializerMethodField()
+    signed_url_fields = {"profilePicture": 60}
+
     class Meta:
-        model = User
-        fields = ['username', 'email', 'first_name', 'last_name', 'profilePicture', 'email', 'phoneNumber']
+        model                 = User
+        fields                = ['username', 'email', 'first_name', 'last_name', 'profilePicture', 'email', 'phoneNumber']
+        list_serializer_class = SignedURLListSerializer
             
     def get_profilePicture(self, obj):
-        if obj.profilePicture is not None:
-            profilePicture_path = obj.profilePicture.split("GamesHubMedia/")[1]
-            result = supabase.storage.from_("GamesHubMedia").create_signed_url(profilePicture_path, 60)
-            return result["signedURL"]
-        return None
\ No newline at end of file
+        return obj.get_profilePicture()
\ No newline at end of file
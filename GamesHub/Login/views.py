@@ -10,7 +10,10 @@ import random
 import time
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import check_password
-from utills.microservices import mail_service
+from utills.microservices import mail_service, tagged_cache_key, invalidate_cache_tags
+from utills.cache_helper import read_through
+from utills.http_client import integration
+from .auth import deny_access_token
 import requests
 import os
 from utills.models import BlacklistedAccessToken
@@ -24,7 +27,6 @@ from utills.storage_supabase import delete_from_supabase
 from django.core import signing
 from django.core.signing import BadSignature, SignatureExpired
 from drf_spectacular.utils import extend_schema
-from django.core.cache import cache
 from utills.permissions import IsSuperuser
 from Support.models import BanUser
 from GamesHub.settings import CACHE_ENV
@@ -34,21 +36,15 @@ logger = logging.getLogger("gameshub")
 User = get_user_model()
 
 EMAIL_CHECKER_API_KEY = os.getenv("EMAIL_CHECKER_API_KEY")
+email_checker         = integration("email_checker", timeout=5, max_retries=1)
 
 
 @profile_schema
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def profile(request):
-    cache_key = f"{CACHE_ENV}:user:{request.user.get_username()}"
-    cache_val = cache.get(cache_key)
-
-    if cache_val:
-        return Response(cache_val, status=status.HTTP_200_OK)
-
-    user_serial = UserDisplaySerializer(request.user).data
-    cache_val   = {"message":"user profile data", "details":user_serial}
-    cache.set(cache_key, cache_val, timeout=2592000)
+    cache_key = tagged_cache_key(f"{CACHE_ENV}:user:{request.user.get_username()}", [f"user:{request.user.id}"])
+    cache_val = read_through(cache_key, lambda: {"message":"user profile data", "details":UserDisplaySerializer(request.user).data}, timeout=2592000)
     return Response(cache_val, status=status.HTTP_200_OK)
 
 @validate_email_schema
@@ -107,7 +103,7 @@ def SignUp(request):
 
     # API to check if email ID provided is valid
     try:
-        email_check_response = requests.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={request.data.get('email')}", timeout=5)
+        email_check_response = email_checker.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={request.data.get('email')}")
         
         email_check_response = email_check_response.json()
         if not email_check_response["email_deliverability"]["is_smtp_valid"]:
@@ -289,6 +285,7 @@ def extendSession(request):
         except IndexError:
             return Response({"error":{"code":"invalid_authorization_header","message":"authorization header malformed"}}, status=status.HTTP_400_BAD_REQUEST)
         
+        deny_access_token(access_token)
         blacklist_access = BlacklistedAccessToken(access_token = access_token, blacklisted_time =  timezone.now())
         blacklist_access.save()
 
@@ -333,6 +330,7 @@ def logout(request):
         except IndexError:
             return Response({"error":{"code":"invalid_authorization_header","message":"authorization header malformed"}}, status=status.HTTP_400_BAD_REQUEST)
         
+        deny_access_token(access_token)
         blacklist_access = BlacklistedAccessToken(access_token = access_token, blacklisted_time =  timezone.now())
         blacklist_access.save()
         refresh_token.blacklist()
@@ -445,7 +443,7 @@ def update_user(request):
     # API to check if email ID provided is valid
     if "email" in request.data:
         try:
-            email_check_response = requests.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={request.data.get('email')}", timeout=5)
+            email_check_response = email_checker.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={request.data.get('email')}")
             
             email_check_response = email_check_response.json()
 
@@ -458,6 +456,7 @@ def update_user(request):
         userObjectSerial   = userSerializer(userObj, data = request.data, partial=True)
         if userObjectSerial.is_valid():
             userObjectSerial.save()
+            invalidate_cache_tags(f"user:{userObj.id}")
             if not (profile_picture_url is None or profile_picture_url == ''):
                 object_key = profile_picture_url.split("GamesHubMedia/")[-1]
                 delete_from_supabase(object_key)
@@ -601,7 +600,7 @@ def admin_user_creation(request):
         
         
         try:
-            email_check_response = requests.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={email}", timeout=5)
+            email_check_response = email_checker.get(f"https://emailreputation.abstractapi.com/v1/?api_key={EMAIL_CHECKER_API_KEY}&email={email}")
             
             email_check_response = email_check_response.json()
             if not email_check_response["email_deliverability"]["is_smtp_valid"]:
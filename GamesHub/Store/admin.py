@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Game, Cart, Wishlist, GamesMedia, Wallet, WalletTransaction, Sale
+from .models import Game, Cart, Wishlist, GamesMedia, Wallet, WalletTransaction, WalletBalanceSnapshot, Sale, Platform, Genre
 
 admin.site.register(Game)
 admin.site.register(Cart)
@@ -8,4 +8,7 @@ admin.site.register(Wishlist)
 admin.site.register(GamesMedia)
 admin.site.register(Wallet)
 admin.site.register(WalletTransaction)
-admin.site.register(Sale)
\ No newline at end of file
+admin.site.register(WalletBalanceSnapshot)
+admin.site.register(Sale)
+admin.site.register(Platform)
+admin.site.register(Genre)
\ No newline at end of file
@@ -592,7 +592,8 @@ home_get_schema = extend_schema(
             - `rating` (float, filter games with rating greater than or equal to value)
             - `platforms` (list of strings, filter by platform names)
             - `genre` (list of strings, filter by genre names)
-        - Returns paginated results with count, next, previous, and catalogue array
+        - Returns paginated results with count, next, previous, facets and catalogue array
+        - `facets` holds per genre and per platform game counts for the filtered catalogue
         - Each game object follows the `gamesSerializer` structure
     """,
     parameters=[
@@ -616,6 +617,13 @@ home_get_schema = extend_schema(
                     "count": {"type": "integer", "example": 120},
                     "next": {"type": "string", "nullable": True, "example": "http://api.example.com/home?limit=10&offset=10"},
                     "previous": {"type": "string", "nullable": True, "example": None},
+                    "facets": {
+                        "type": "object",
+                        "properties": {
+                            "genre": {"type": "object", "example": {"Action RPG": 1, "Roguelike": 1}},
+                            "platforms": {"type": "object", "example": {"PC": 2, "PS5": 1}}
+                        }
+                    },
                     "catalogue": {
                         "type": "array",
                         "items": {
@@ -662,6 +670,7 @@ home_get_schema = extend_schema(
                 "count": 2,
                 "next": None,
                 "previous": None,
+                "facets": {"genre": {"Action RPG": 1, "Roguelike": 1}, "platforms": {"PC": 2, "PS5": 1}},
                 "catalogue": [
                     {
                         "id": 1,
@@ -715,6 +724,8 @@ library_get_schema = extend_schema(
     parameters=[
         OpenApiParameter(name="limit", description="Pagination limit", required=False, type=int),
         OpenApiParameter(name="offset", description="Pagination offset", required=False, type=int),
+        OpenApiParameter(name="pagination", description="Set to `cursor` for keyset pagination", required=False, type=str),
+        OpenApiParameter(name="cursor", description="Opaque cursor taken from the next/previous link", required=False, type=str),
     ],
     responses={
         200: {
@@ -817,7 +828,11 @@ wallet_get_schema = extend_schema(
         - Requires authentication (`IsAuthenticated`)
         - Creates a wallet if one does not exist
         - Returns wallet details including balance and user
+        - Optional `at` query parameter adds the balance as of that datetime
     """,
+    parameters=[
+        OpenApiParameter(name="at", description="ISO 8601 datetime to report the balance at", required=False, type=str),
+    ],
     responses={
         200: {
             "application/json": {
@@ -972,6 +987,8 @@ wallet_transaction_get_schema = extend_schema(
     parameters=[
         OpenApiParameter(name="limit", description="Pagination limit", required=False, type=int),
         OpenApiParameter(name="offset", description="Pagination offset", required=False, type=int),
+        OpenApiParameter(name="pagination", description="Set to `cursor` for keyset pagination", required=False, type=str),
+        OpenApiParameter(name="cursor", description="Opaque cursor taken from the next/previous link", required=False, type=str),
     ],
     responses={
         200: {
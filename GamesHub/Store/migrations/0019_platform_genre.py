@@ -0,0 +1,79 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:41
+
+from django.db import migrations, models
+from django.utils.text import slugify
+import re
+
+
+def populate_dimensions(apps, schema_editor):
+    Game     = apps.get_model('Store', 'Game')
+    Platform = apps.get_model('Store', 'Platform')
+    Genre    = apps.get_model('Store', 'Genre')
+
+    for field, model, through, column in (("platforms", Platform, Game.platform_tags.through, "platform_id"), ("genre", Genre, Game.genre_tags.through, "genre_id")):
+        game_slugs = {}
+        names      = {}
+        for game_id, value in Game.objects.values_list("id", field):
+            slugs = set()
+            for name in re.split(r"[,/|]", value or ""):
+                name = name.strip()
+                slug = slugify(name)[:64]
+                if slug:
+                    names.setdefault(slug, name[:64])
+                    slugs.add(slug)
+            game_slugs[game_id] = slugs
+
+        model.objects.bulk_create([model(name=name, slug=slug) for slug, name in names.items()], ignore_conflicts=True)
+        ids = dict(model.objects.values_list("slug", "id"))
+        through.objects.bulk_create([through(**{"game_id": game_id, column: ids[slug]}) for game_id, slugs in game_slugs.items() for slug in slugs], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Store', '0018_game_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('slug', models.SlugField(max_length=64, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Platform',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('slug', models.SlugField(max_length=64, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='game_platforms_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='game_genre_trgm_idx',
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='genre_tags',
+            field=models.ManyToManyField(editable=False, related_name='games', to='Store.genre'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='platform_tags',
+            field=models.ManyToManyField(editable=False, related_name='games', to='Store.platform'),
+        ),
+        migrations.RunPython(populate_dimensions, migrations.RunPython.noop),
+    ]
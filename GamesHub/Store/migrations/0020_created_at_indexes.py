@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Store', '0019_platform_genre'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', '-created_at', '-transaction_id'], name='wallet_txn_created_at_idx'),
+        ),
+    ]
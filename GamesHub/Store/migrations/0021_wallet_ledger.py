@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def schedule_wallet_snapshots(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    interval, _      = IntervalSchedule.objects.get_or_create(every=1, period='days')
+    PeriodicTask.objects.get_or_create(name='wallet balance snapshots', defaults={'task': 'snapshot_wallet_balances', 'interval': interval})
+
+
+def unschedule_wallet_snapshots(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='snapshot_wallet_balances').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Store', '0020_created_at_indexes'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('taken_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='wallet',
+            constraint=models.CheckConstraint(condition=models.Q(('balance__gte', 0)), name='wallet_balance_non_negative'),
+        ),
+        migrations.AddField(
+            model_name='walletbalancesnapshot',
+            name='wallet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='Store.wallet'),
+        ),
+        migrations.AddIndex(
+            model_name='walletbalancesnapshot',
+            index=models.Index(fields=['wallet', '-taken_at'], name='wallet_snapshot_taken_at_idx'),
+        ),
+        migrations.RunPython(schedule_wallet_snapshots, unschedule_wallet_snapshots),
+    ]
@@ -1,11 +1,43 @@
-from django.db import models, transaction
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Sum, Case, When
 from django.core.validators import MinValueValidator, MaxValueValidator
-from utills.storage_supabase import supabase
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.contrib.postgres.indexes import GinIndex
+from utills.storage_supabase import get_signed_url
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.utils.text import slugify
+import re
 User = get_user_model()
 
+def split_dimension_values(value):
+    return [item.strip() for item in re.split(r"[,/|]", value or "") if item.strip()]
+
+def get_search_vector():
+    return SearchVector("name", weight="A", config="simple") + SearchVector("developer", weight="B", config="simple") +\
+           SearchVector("genre", weight="C", config="simple") + SearchVector("platforms", weight="C", config="simple")
+
+class Platform(models.Model):
+    name          = models.CharField(max_length=64)
+    slug          = models.SlugField(max_length=64, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+class Genre(models.Model):
+    name          = models.CharField(max_length=64)
+    slug          = models.SlugField(max_length=64, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
 class Game(models.Model):
     name          = models.CharField(max_length=256)
     publishedDate = models.DateField()
@@ -18,9 +50,17 @@ class Game(models.Model):
     rating        = models.FloatField(default=0)
     no_of_rating  = models.FloatField(default=0)
     cover_picture = models.URLField(null=True, default=None, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    platform_tags = models.ManyToManyField(Platform, editable=False, related_name="games")
+    genre_tags    = models.ManyToManyField(Genre, editable=False, related_name="games")
 
     class Meta:
         ordering = ["id"]
+        indexes  = [
+            GinIndex(fields=["search_vector"], name="game_search_vector_idx"),
+            GinIndex(fields=["name"], name="game_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["developer"], name="game_developer_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
 
     def get_id(self):
         return self.id
@@ -47,15 +87,19 @@ class Game(models.Model):
         self.rating       = rating
         self.no_of_rating = no_of_rating
 
+    def sync_dimensions(self):
+        for model, value, relation in ((Platform, self.platforms, self.platform_tags), (Genre, self.genre, self.genre_tags)):
+            names = {}
+            for name in split_dimension_values(value):
+                slug = slugify(name)[:64]
+                if slug:
+                    names.setdefault(slug, name[:64])
+
+            model.objects.bulk_create([model(name=name, slug=slug) for slug, name in names.items()], ignore_conflicts=True)
+            relation.set(model.objects.filter(slug__in=names))
+
     def get_cover_picture(self):
-        if self.cover_picture is not None:
-            try:
-                cover_picture_path = self.cover_picture.split("GamesHubMedia/")[1]
-                result = supabase.storage.from_("GamesHubMedia").create_signed_url(cover_picture_path, 900)
-                return result["signedURL"]
-            except Exception as e:
-                return None
-        return None
+        return get_signed_url(self.cover_picture, 900)
 
 class GamesMedia(models.Model):
     MEDIA_CHOICES = [
@@ -83,9 +127,7 @@ class GamesMedia(models.Model):
 
     def get_signed_url(self):
         if self.media_type != 2:
-            url_path = self.url.split("GamesHubMedia/")[1]
-            result = supabase.storage.from_("GamesHubMedia").create_signed_url(url_path, 900)
-            return result["signedURL"]
+            return get_signed_url(self.url, 900)
         return self.url
 
     def __str__(self):
@@ -105,13 +147,29 @@ class Wishlist(models.Model):
     def __str__(self):
         return "wishlist for user " + self.user.get_username()
     
+def signed_amount():
+    return Case(When(transaction_type=1, then=F("amount")), default=-F("amount"))
+
 class Wallet(models.Model):
     user          = models.OneToOneField(User, on_delete=models.CASCADE, unique=True, null=True, blank=True)
     balance       = models.DecimalField(default=Decimal('0.00'), decimal_places=2, max_digits=12)
 
+    class Meta:
+        constraints = [models.CheckConstraint(condition=Q(balance__gte=0), name="wallet_balance_non_negative")]
+
     def get_balance(self):
         return self.balance
 
+    def balance_at(self, when):
+        # nearest snapshot plus the ledger rows after it, so history never replays more than one snapshot period
+        snapshot = self.snapshots.filter(taken_at__lte=when).order_by("-taken_at").first()
+        ledger   = WalletTransaction.objects.filter(wallet=self, created_at__lte=when)
+        opening  = Decimal("0.00")
+        if snapshot is not None:
+            ledger  = ledger.filter(created_at__gt=snapshot.taken_at)
+            opening = snapshot.balance
+        return opening + (ledger.aggregate(total=Sum(signed_amount()))["total"] or Decimal("0.00"))
+
     def __str__(self):
         return f"Wallet for user {self.user.get_username()}"
 
@@ -135,25 +193,34 @@ class WalletTransaction(models.Model):
     payment_type     = models.PositiveSmallIntegerField(choices=PAYMENT_TYPE)
     transaction_id   = models.BigAutoField(primary_key=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["wallet", "-created_at", "-transaction_id"], name="wallet_txn_created_at_idx")]
+
     def get_transaction_id(self):
         return self.transaction_id
 
-    def clean(self):
-        if self.payment_type == 3 and self.wallet.balance - self.amount < 0:
-            raise ValidationError(f"Not enough money in wallet for payment of {self.amount}. Wallet balance is {self.wallet.balance}")
-
     def save(self, *args, **kwargs):
-        with transaction.atomic():
-            if self.payment_type in [1, 2]:
-                self.wallet.balance += self.amount
-                self.transaction_type = 1
-            else:
-                self.wallet.balance -= self.amount
-                self.transaction_type = 2
-            
-            self.wallet.save()
-
-            return super().save(*args, **kwargs)
+        if not self._state.adding:
+            raise ValidationError("wallet transactions are append only")
+
+        if self.payment_type in [1, 2]:
+            self.transaction_type = 1
+            delta = self.amount
+        else:
+            self.transaction_type = 2
+            delta = -self.amount
+
+        # the balance moves in one UPDATE so concurrent debits never overwrite each other and the check constraint stops overdrafts
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                Wallet.objects.filter(pk=self.wallet_id).update(balance=F("balance") + delta)
+        except IntegrityError as e:
+            if "wallet_balance_non_negative" not in str(e):
+                raise
+            raise ValidationError(f"Not enough money in wallet for payment of {self.amount}")
+
+        self.wallet.refresh_from_db(fields=["balance"])
     
     def __str__(self):
         if self.wallet.user is not None:
@@ -164,6 +231,17 @@ class WalletTransaction(models.Model):
     
 
 
+class WalletBalanceSnapshot(models.Model):
+    wallet        = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="snapshots")
+    balance       = models.DecimalField(decimal_places=2, max_digits=12)
+    taken_at      = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["wallet", "-taken_at"], name="wallet_snapshot_taken_at_idx")]
+
+    def __str__(self):
+        return f"Balance snapshot for wallet {self.wallet_id} at {self.taken_at}"
+
 class Sale(models.Model):
     sale_name           = models.CharField(max_length=32)
     description         = models.CharField(max_length=2048, default='')
@@ -172,14 +250,7 @@ class Sale(models.Model):
     cover_picture       = models.URLField(null=False)
 
     def get_cover_picture(self):
-        if self.cover_picture is not None:
-            try:
-                cover_picture_path = self.cover_picture.split("GamesHubMedia/")[1]
-                result = supabase.storage.from_("GamesHubMedia").create_signed_url(cover_picture_path, 600)
-                return result["signedURL"]
-            except Exception as e:
-                return None
-        return None
+        return get_signed_url(self.cover_picture, 600)
 
     def __str__(self):
         return self.sale_name
\ No newline at end of file
@@ -1,9 +1,8 @@
 from .models import Game, Cart, Wishlist, GamesMedia, Wallet, WalletTransaction, Sale
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
-from utills.storage_supabase import upload_file_to_supabase
+from utills.storage_supabase import upload_file_to_supabase, SignedURLListSerializer
 from rest_framework.exceptions import ValidationError
-from utills.storage_supabase import supabase
 from utills.game_media_update import get_cover_url
 from datetime import timedelta
 from django.utils import timezone
@@ -14,10 +13,12 @@ class gamesSerializer(ModelSerializer):
     cover_picture     = serializers.ImageField(write_only=True, allow_null=True, required=False, default=None)
     publishedDate     = serializers.DateField(format="%d/%m/%Y")
     cover_picture_url = serializers.SerializerMethodField()
+    signed_url_fields = {"cover_picture": 900}
 
     class Meta:
-        model = Game
-        fields = '__all__'
+        model                 = Game
+        fields                = '__all__'
+        list_serializer_class = SignedURLListSerializer
     
     def validate_cover_picture(self, cover_picture):
         name = self.initial_data.get("name")
@@ -46,10 +47,12 @@ class gamesSerializer(ModelSerializer):
 class gamesSerializerSimplified(ModelSerializer):
     price             = serializers.SerializerMethodField()
     cover_picture_url = serializers.SerializerMethodField()
+    signed_url_fields = {"cover_picture": 900}
 
     class Meta:
-        model  = Game
-        fields = ('id', 'name', 'developer', 'price', 'cover_picture_url')
+        model                 = Game
+        fields                = ('id', 'name', 'developer', 'price', 'cover_picture_url')
+        list_serializer_class = SignedURLListSerializer
     
     def get_price(self, obj):
         return obj.get_actual_price()
@@ -101,10 +104,13 @@ class WishlistSerializer(BaseStoreObjectSerializer):
         read_only_fields = ["user"]
 
 class GameMediaSerializer(ModelSerializer):
-    signed_url = serializers.SerializerMethodField()
+    signed_url        = serializers.SerializerMethodField()
+    signed_url_fields = {"url": 900}
+
     class Meta:
-        model = GamesMedia
-        fields = ('id', 'media_type', 'signed_url')
+        model                 = GamesMedia
+        fields                = ('id', 'media_type', 'signed_url')
+        list_serializer_class = SignedURLListSerializer
 
     def get_signed_url(self, obj):
         return obj.get_signed_url()
@@ -126,10 +132,12 @@ class SaleSerializer(serializers.ModelSerializer):
     sale_end_date     = serializers.DateTimeField(required=False, allow_null=True)
     games             = serializers.CharField(write_only=True, required=True, allow_null=False)
     cover_picture_url = serializers.SerializerMethodField()
+    signed_url_fields = {"cover_picture": 600}
 
     class Meta:
-        model  = Sale
-        fields = "__all__"
+        model                 = Sale
+        fields                = "__all__"
+        list_serializer_class = SignedURLListSerializer
 
     def validate(self, attrs):
         attrs["games"] = json.loads(attrs["games"])
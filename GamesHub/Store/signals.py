@@ -1,6 +1,6 @@
-from django.db.models.signals import post_delete,  pre_save
+from django.db.models.signals import post_delete,  pre_save, post_save
 from django.dispatch import receiver
-from .models import Sale, Game
+from .models import Sale, Game, get_search_vector
 from utills.storage_supabase import delete_from_supabase
 
 
@@ -26,3 +26,14 @@ def delete_old_cover_picture(sender, instance, **kwargs):
     if old_instance.cover_picture and old_instance.cover_picture != instance.cover_picture:
         object_key = old_instance.cover_picture.split("GamesHubMedia/")[-1]
         delete_from_supabase(object_key)
+
+
+SEARCH_FIELDS = {"name", "developer", "genre", "platforms"}
+
+@receiver(post_save, sender=Game)
+def update_catalogue_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+
+    sender.objects.filter(pk=instance.pk).update(search_vector=get_search_vector())
+    instance.sync_dimensions()
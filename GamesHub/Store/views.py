@@ -7,7 +7,7 @@ from rest_framework import status
 from .models import Game, Cart, Wishlist, Wallet, WalletTransaction, Sale
 from .serializers import CartSerializer, WishlistSerializer, gamesSerializerSimplified, WalletSerializer, WalletTransactionSerializer, SaleSerializer, SaleSerializerDetail
 from django.contrib.auth import get_user_model
-from utills.microservices import search, mail_service, delete_cache_key
+from utills.microservices import search, mail_service, tagged_cache_key, invalidate_cache_tags
 from .documentation import user_cart_delete_schema, user_cart_get_schema, user_cart_patch_schema, user_cart_post_schema, user_wishlist_delete_schema, user_wishlist_get_schema, user_wishlist_patch_schema, user_wishlist_post_schema,\
 featured_page_schema, home_get_schema, library_get_schema, wallet_get_schema, wallet_post_schema, wallet_transaction_get_schema, sale_get_schema, sale_post_schema, sale_detail_delete_schema, sale_detail_get_schema, sale_detail_patch_schema
 from GamesHub.settings import REDIS_CLIENT
@@ -18,12 +18,15 @@ import redis
 from django.core.cache import cache
 from rest_framework.exceptions import UnsupportedMediaType
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
 from decimal import Decimal
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from utills.email_helper import wallet_recharge_successful_email
 from rest_framework.exceptions import UnsupportedMediaType
 from rest_framework.views import exception_handler
 from rest_framework.pagination import LimitOffsetPagination
+from utills.baseviews import KeysetPagination, use_keyset_pagination
+from utills.cache_helper import read_through
 from rest_framework.parsers import MultiPartParser
 import copy
 from GamesHub.settings import CACHE_ENV
@@ -40,8 +43,11 @@ def get_cache_key(request):
 
     return f"{CACHE_ENV}:{username}:{sorted_pairs}"
 
-def get_paginated(request, objects, serializer):
-    paginator              = LimitOffsetPagination()
+def get_paginated(request, objects, serializer, ordering=None):
+    if ordering and use_keyset_pagination(request):
+        paginator          = KeysetPagination(ordering)
+    else:
+        paginator          = LimitOffsetPagination()
     paginated_transactions = paginator.paginate_queryset(objects, request)
     objectSerial           = serializer(paginated_transactions, many=True).data
     return objectSerial, paginator.get_next_link(), paginator.get_previous_link(), paginator.count
@@ -50,8 +56,8 @@ def get_paginated(request, objects, serializer):
 @api_view(["GET"])
 def Home(request):
     try:
-        gamesSerial, get_next_link, get_previous_link, count = search(request, None)
-        return Response({"message": "user catalogue", "count":count,  "next": get_next_link, "previous": get_previous_link, "catalogue":gamesSerial}, status=status.HTTP_200_OK)
+        gamesSerial, get_next_link, get_previous_link, count, facets = search(request, None)
+        return Response({"message": "user catalogue", "count":count,  "next": get_next_link, "previous": get_previous_link, "facets":facets, "catalogue":gamesSerial}, status=status.HTTP_200_OK)
     except Exception as e:
         logger.error(f"exception in store home: {str(e)}", exc_info=True)
         return Response({"error":{"code":"game_fetch_error", "message":"internal server error"}, "game":[]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -103,7 +109,7 @@ class BaseStoreObjectsView(APIView):
 
     def get(self, request):
         model_name  = self.model.__name__.lower()
-        cache_key   = f"{CACHE_ENV}:{model_name}:{get_cache_key(request)}"
+        cache_key   = tagged_cache_key(f"{CACHE_ENV}:{model_name}:{get_cache_key(request)}", [f"{model_name}:{request.user.id}"])
         model_name  = self.model.__name__.lower()
         cache_val   = cache.get(cache_key)
 
@@ -112,14 +118,13 @@ class BaseStoreObjectsView(APIView):
         
         modelObj     = self.get_object(request)
         gameObjs     = modelObj.games.all()
-        cache_vals   = get_paginated(request, gameObjs, self.paginate_serializer)
+        cache_vals   = get_paginated(request, gameObjs, self.paginate_serializer, ("id",))
         response = Response({"message":f"{model_name} for user", "next":cache_vals[1], "previous":cache_vals[2], "count":cache_vals[3], model_name:cache_vals[0]}, status=status.HTTP_200_OK)
         cache.set(cache_key, response.data, timeout=3600)
         return response
         
     def post(self, request):
         model_name     = self.model.__name__.lower()
-        cache_base_key = f"{model_name}:{request.user.get_username()}"
         if self.model.objects.filter(user = request.user).exists():
             return Response({"message":f"{model_name} already exists for user use PATCH method"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -130,14 +135,13 @@ class BaseStoreObjectsView(APIView):
         modelSerialData = self.serializer_class(data = request.data)
         if modelSerialData.is_valid():
             modelSerialData.save(user = request.user)
-            delete_cache_key(cache_base_key)
+            invalidate_cache_tags(f"{model_name}:{request.user.id}")
             return Response({"message":f"{model_name} saved successfully"}, status=status.HTTP_201_CREATED)
         else:
             return Response({"error":{"code":f"new_{model_name}_error", "details":modelSerialData.errors}}, status=status.HTTP_400_BAD_REQUEST)
     
     def patch(self, request):
         model_name  = self.model.__name__.lower()
-        cache_base_key = f"{model_name}:{request.user.get_username()}"
 
         check_response = self.check_games(request, model_name)
         if check_response is not None:
@@ -148,17 +152,16 @@ class BaseStoreObjectsView(APIView):
         modelSerialData = self.serializer_class(modelObj, data = request.data, partial = True)
         if modelSerialData.is_valid():
             modelSerialData.save()
-            delete_cache_key(cache_base_key)
+            invalidate_cache_tags(f"{model_name}:{request.user.id}")
             return Response({"message": f"{model_name} updated successfully"}, status= status.HTTP_202_ACCEPTED)
         else:
             return Response({"error":{"code":f"update_{model_name}_error", "details":modelSerialData.errors}}, status=status.HTTP_400_BAD_REQUEST)
     
     def delete(self, request):
-        cache_base_key = f"{model_name}:{request.user.get_username()}"
         model_name  = self.model.__name__.lower()
         modelObj = self.get_object(request)
         modelObj.delete()
-        delete_cache_key(cache_base_key)
+        invalidate_cache_tags(f"{model_name}:{request.user.id}")
         return Response({"message":f"{model_name} for user deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
     
 @user_cart_post_schema
@@ -190,7 +193,7 @@ def featuredPage(request):
             return Response({"message": "featured games for user", "games":{}}, status=status.HTTP_200_OK)
 
         user_featured  = list(map(lambda kv : (kv[0], kv[1]), user_featured.items()))
-        user_featured  = sorted(user_featured, key = lambda kv : kv[1], reverse=True)[:min(len(user_featured), 5)]
+        user_featured  = sorted(user_featured, key = lambda kv : int(kv[1]), reverse=True)[:min(len(user_featured), 5)]
         user_featured  = list(map(lambda v : v[0], user_featured))    
         library_games  = set(GameInteraction.objects.filter(user=request.user).values_list('game_id', flat=True))
         user_featured  = list(set(user_featured) - library_games)
@@ -209,15 +212,13 @@ def featuredPage(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def library(request):
-    cache_key              = get_cache_key(request)
-    cache_vals             = cache.get("library" + cache_key)
-    if cache_vals:
-        return Response(cache_vals, status=status.HTTP_200_OK)
+    cache_key              = tagged_cache_key("library" + get_cache_key(request), [f"library:{request.user.id}"])
+    return Response(read_through(cache_key, lambda: library_contents(request), timeout=2592000), status=status.HTTP_200_OK)
+
+def library_contents(request):
     gameInteractions       = GameInteraction.objects.filter(Q(user = request.user) & Q(in_library = True)).select_related('game').order_by('-purchase_date')
-    cache_vals             = get_paginated(request, gameInteractions, GameInteractionSerializerSimplified)
-    response = Response({"message": "library contents", "next":cache_vals[1], "previous":cache_vals[2], "count":cache_vals[3], "library":cache_vals[0]}, status=status.HTTP_200_OK)
-    cache.set("library" + cache_key, response.data, timeout=2592000)
-    return response
+    cache_vals             = get_paginated(request, gameInteractions, GameInteractionSerializerSimplified, ("-purchase_date", "-transaction_id"))
+    return {"message": "library contents", "next":cache_vals[1], "previous":cache_vals[2], "count":cache_vals[3], "library":cache_vals[0]}
 
 
 @wallet_post_schema
@@ -228,6 +229,18 @@ def wallet(request):
     if request.method == "GET":
         wallet, _ = Wallet.objects.get_or_create(user = request.user)
         walletSerial = WalletSerializer(wallet).data
+
+        if at := request.query_params.get("at"):
+            try:
+                when = parse_datetime(at)
+            except ValueError:
+                when = None
+            if when is None:
+                return Response({"error":{"code":"incorrect_data_type", "message":"at should be a valid ISO 8601 datetime"}}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+            walletSerial["balance_at"] = str(wallet.balance_at(when))
+
         return Response({"message":f"wallet for user {request.user.get_username()}", "wallet":walletSerial}, status=status.HTTP_200_OK)
     
     if request.method == "POST":
@@ -245,21 +258,14 @@ def wallet(request):
         if amount <= Decimal(str(0.00)):
             return Response({"error":"invalid_amount", "message":"for wallet recharge amount should be greater than zero"}, status=status.HTTP_400_BAD_REQUEST)
         
-        with transaction.atomic():
-            try:
-                wallet    = Wallet.objects.select_for_update().get(user = request.user)
-            except Wallet.DoesNotExist:
-                wallet, _ = Wallet.objects.get_or_create(user = request.user)
-                wallet    = Wallet.objects.select_for_update().get(user = request.user)
+        wallet, _ = Wallet.objects.get_or_create(user = request.user)
 
-            try:
-                walletTransaction = WalletTransaction.objects.create(wallet= wallet, amount=amount, payment_type = 1)
-            except IntegrityError as e:
-                raise
-            except ValidationError as e:
-                return Response({"error":{"code":"validation_error", "message":str(e.message)}}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            walletTransaction = WalletTransaction.objects.create(wallet= wallet, amount=amount, payment_type = 1)
+        except ValidationError as e:
+            return Response({"error":{"code":"validation_error", "message":str(e.message)}}, status=status.HTTP_400_BAD_REQUEST)
         
-        delete_cache_key("transaction" + username)
+        invalidate_cache_tags(f"transaction:{request.user.id}")
         Subject    = f'Wallet recharge confirmation for {username}'
         message    = wallet_recharge_successful_email({"username":username, "recharge_amount":amount, "transaction_id":walletTransaction.get_transaction_id(), "wallet_balance":wallet.get_balance()})
             
@@ -279,15 +285,15 @@ def wallet(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def wallet_transaction(request):
-    cache_key  = get_cache_key(request)
-    cache_vals = cache.get("transaction" + cache_key)
+    cache_key  = tagged_cache_key("transaction" + get_cache_key(request), [f"transaction:{request.user.id}"])
+    cache_vals = cache.get(cache_key)
     if cache_vals:
         return Response({"message":"wallet transaction details for user", "next":cache_vals[1], "previous":cache_vals[2], "count":cache_vals[3], "transactions":cache_vals[0]}, status=status.HTTP_200_OK)
     
     wallet, _              = Wallet.objects.get_or_create(user = request.user)
     wallet_transactions    = WalletTransaction.objects.filter(wallet= wallet).order_by('-created_at')
-    cache_vals             = get_paginated(request, wallet_transactions, WalletTransactionSerializer)
-    cache.set("transaction" + cache_key, cache_vals, timeout=3600)
+    cache_vals             = get_paginated(request, wallet_transactions, WalletTransactionSerializer, ("-created_at", "-transaction_id"))
+    cache.set(cache_key, cache_vals, timeout=3600)
     return Response({"message":"wallet transaction details for user", "next":cache_vals[1], "previous":cache_vals[2], "count":cache_vals[3], "transactions":cache_vals[0]}, status=status.HTTP_200_OK)
     
 
@@ -1195,6 +1195,7 @@ ticket_list_post_schema = extend_schema(
         - Requires authentication (`IsAuthenticated`)
         - Accepts multipart/form-data for optional evidence file
         - `issue_type` must NOT be passed in this endpoint (validation enforced)
+        - Blocks banned words in `description` field
     """,
     request={
         "multipart/form-data": {
@@ -1259,6 +1260,12 @@ ticket_list_post_schema = extend_schema(
             response_only=True,
             status_codes=["400"]
         ),
+        OpenApiExample(
+            name="Validation Error (Banned Word)",
+            value={"error": {"code": "validation_errors", "details": {"description": ["description cannot have banned words"]}}},
+            response_only=True,
+            status_codes=["400"]
+        ),
         OpenApiExample(
             name="Unauthorized",
             value={"error": {"code": "not_authenticated", "message": "Authentication credentials were not provided."}},
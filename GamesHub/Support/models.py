@@ -3,7 +3,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from Store.models import Game
 from django.utils import timezone
-from utills.storage_supabase import supabase
+from utills.storage_supabase import get_signed_url
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericRelation
 User = get_user_model()
@@ -65,11 +65,7 @@ class Ticket(models.Model):
     comments        = GenericRelation("Community.Comment", related_query_name="ticket")
 
     def get_evidence(self):
-        if self.evidence is not None:
-            evidence_path = self.evidence.split("GamesHubMedia/")[1]
-            result = supabase.storage.from_("GamesHubMedia").create_signed_url(evidence_path, 60)
-            return result["signedURL"]
-        return None
+        return get_signed_url(self.evidence, 60)
 
     def __str__(self):
         return f"Ticket by {self.user.get_username()}"
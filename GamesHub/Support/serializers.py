@@ -1,8 +1,8 @@
 from rest_framework.serializers import ModelSerializer, ValidationError, SerializerMethodField, FileField
 from .models import Report, Ticket
-import re
 from django.contrib.auth import get_user_model
-from utills.storage_supabase import supabase, upload_file_to_supabase
+from utills.moderation import validate_clean_text
+from utills.storage_supabase import upload_file_to_supabase, SignedURLListSerializer
 from Community.serializers import CommentSerializer
 from GamesBuzz.models import GameInteraction
 User = get_user_model()
@@ -16,11 +16,7 @@ class ReportSerializer(ModelSerializer):
         read_only_fields = ["user", "parent_object", "object_id", "content_type", "assigned_staff", "resolution_date"]
 
     def validate_body(self, value):
-        for pattern in [re.compile(r"(?i)\bass\b"), re.compile(r"(?i)\bfuck\b"), re.compile(r"(?i)\bbitch\b"), re.compile(r"(?i)\basshole\b"),]:
-            if pattern.search(value):
-                raise ValidationError("body cannot have banned words")
-        
-        return value
+        return validate_clean_text(value, "body")
 
     def update(self, instance, validated_data):
         assigned_staff = self.context.pop("assigned_staff", None)
@@ -30,12 +26,14 @@ class ReportSerializer(ModelSerializer):
         return super().update(instance, validated_data)
     
 class TicketSerializer(ReportSerializer):
-    evidence_url     = SerializerMethodField(read_only = True)
+    evidence_url      = SerializerMethodField(read_only = True)
+    signed_url_fields = {"evidence": 60}
     
     class Meta:
-        model            = Ticket
-        fields           = "__all__"
-        read_only_fields = ["user", "parent_object", "object_id", "content_type"]
+        model                 = Ticket
+        fields                = "__all__"
+        read_only_fields      = ["user", "parent_object", "object_id", "content_type"]
+        list_serializer_class = SignedURLListSerializer
 
 
     def get_evidence_url(self, obj):
@@ -46,9 +44,10 @@ class UserTicketSerializer(TicketSerializer):
     evidence      = FileField(write_only = True, allow_null=True, required=False, default=None)
 
     class Meta:
-        model            = Ticket
-        fields           = ["id", "issue_type", "status", "description", "evidence", "evidence_url", "comments"]
-        read_only_fields = ["status", "id"]
+        model                 = Ticket
+        fields                = ["id", "issue_type", "status", "description", "evidence", "evidence_url", "comments"]
+        read_only_fields      = ["status", "id"]
+        list_serializer_class = SignedURLListSerializer
 
 
     def validate_evidence(self, evidence):
@@ -60,6 +59,9 @@ class UserTicketSerializer(TicketSerializer):
             raise ValidationError("Only following files (JPEG, PNG, GIF, WEBP, JPG, PDF) are allowed.")
 
         return evidence
+
+    def validate_description(self, value):
+        return validate_clean_text(value, "description")
     
 
     def upload_evidence(self, validated_data, ticket):
@@ -89,26 +91,28 @@ class UserTicketSerializer(TicketSerializer):
         return CommentSerializer(comments, many=True).data
 
 class AdminUserDisplaySerializer(ModelSerializer):
-    profilePicture = SerializerMethodField()
+    profilePicture    = SerializerMethodField()
+    signed_url_fields = {"profilePicture": 60}
+
     class Meta:
-        model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profilePicture', 'email', 'phoneNumber']
+        model                 = User
+        fields                = ['id', 'username', 'email', 'first_name', 'last_name', 'profilePicture', 'email', 'phoneNumber']
+        list_serializer_class = SignedURLListSerializer
             
     def get_profilePicture(self, obj):
-        if obj.profilePicture is not None:
-            profilePicture_path = obj.profilePicture.split("GamesHubMedia/")[1]
-            result = supabase.storage.from_("GamesHubMedia").create_signed_url(profilePicture_path, 60)
-            return result["signedURL"]
-        return None
+        return obj.get_profilePicture()
 
 
 class UserTicketResolveSerializer(ModelSerializer):
-    comments      = SerializerMethodField()
-    evidence_url     = SerializerMethodField(read_only = True)
+    comments          = SerializerMethodField()
+    evidence_url      = SerializerMethodField(read_only = True)
+    signed_url_fields = {"evidence": 60}
+
     class Meta:
-        model            = Ticket
-        fields           = ["assigned_staff", "issue_type", "status", "description", "created_at", "admin_comment", "evidence_url", "comments"]
-        read_only_fields = ["issue_type", "description", "created_at", "assigned_staff"]
+        model                 = Ticket
+        fields                = ["assigned_staff", "issue_type", "status", "description", "created_at", "admin_comment", "evidence_url", "comments"]
+        read_only_fields      = ["issue_type", "description", "created_at", "assigned_staff"]
+        list_serializer_class = SignedURLListSerializer
 
     
     def update(self, instance, validated_data):
@@ -20,7 +20,7 @@ from utills.microservices import mail_service
 from Community.serializers import CommentSerializer
 from django.db import transaction
 from GamesBuzz.models import GameInteraction
-from utills.microservices import delete_cache_key
+from utills.microservices import invalidate_cache_tags, instance_cache_tags, invalidate_library_set
 from decimal import Decimal
 import logging
 from .documentation import post_report_create_schema, comment_report_create_schema, game_report_create_schema, review_report_create_schema, report_list_schema, report_assign_get_schema, report_assign_patch_schema, report_resolve_get_schema, report_resolve_patch_schema,\
@@ -349,13 +349,11 @@ class TicketResolveView(BaseRetrieveUpdateDestroyView):
                 game_interation.in_library = False
                 game_interation.save()
 
-                try:
-                    wallet    = Wallet.objects.select_for_update().get(user = ticket.user)
-                except Wallet.DoesNotExist:
-                    wallet, _ = Wallet.objects.get_or_create(user = ticket.user)
-                    wallet    = Wallet.objects.select_for_update().get(user = ticket.user)
+                wallet, _ = Wallet.objects.get_or_create(user = ticket.user)
 
                 WalletTransaction.objects.create(wallet= wallet, amount=Decimal(str(purchase_price)), payment_type = 2)
+                invalidate_cache_tags(f"library:{ticket.user_id}", f"transaction:{ticket.user_id}")
+                transaction.on_commit(lambda: invalidate_library_set(ticket.user_id))
                 message    = ticket_refund_email({"username": ticket.user.get_username(), "ticket_id":ticket.id, "issue_type":ticket.get_issue_type_display(), 'description':ticket.description, 'refund_amount':purchase_price, 'wallet_balance':wallet.get_balance()})
         
             except GameInteraction.DoesNotExist:
@@ -376,8 +374,6 @@ class TicketResolveView(BaseRetrieveUpdateDestroyView):
         serializer = self.get_serializer(instance, data=request.data, partial=True, context={'request_user': request.user})
         serializer.is_valid(raise_exception=True)
         
-        cache_key   = self.get_cache_key(self, request, *args, **kwargs)
-
         self.perform_update(serializer)
-        delete_cache_key(cache_key)
+        invalidate_cache_tags(*instance_cache_tags(instance))
         return Response({"message": f"{self.model.__name__} updated successfully","data": serializer.data}, status=status.HTTP_202_ACCEPTED)
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Constants, BlacklistedAccessToken, UpvoteDownvoteControl
+from .models import Constants, BlacklistedAccessToken, UpvoteDownvoteControl, EmailOutbox, VoteFlush
 # Register your models here.
 
 admin.site.register(Constants)
 admin.site.register(BlacklistedAccessToken)
-admin.site.register(UpvoteDownvoteControl)
\ No newline at end of file
+admin.site.register(UpvoteDownvoteControl)
+admin.site.register(EmailOutbox)
+admin.site.register(VoteFlush)
@@ -1,15 +1,21 @@
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import LimitOffsetPagination, BasePagination
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.cache import cache
 from rest_framework.exceptions import NotFound
-from .microservices import delete_cache_key
+from .microservices import tagged_cache_key, invalidate_cache_tags, instance_cache_tags
+from .cache_helper import read_through
 from .permissions import IsOwnerOrReadOnly
 from rest_framework.exceptions import ValidationError as RestValidationError
-from .microservices import delete_cache_key
+from django.core.exceptions import ValidationError as DjangoValidationError
 from GamesHub.settings import CACHE_ENV
+from django.db.models import Q
+import base64
+import hashlib
+import json
 
 
 class CustomPagination(LimitOffsetPagination):
@@ -25,10 +31,128 @@ class CustomPagination(LimitOffsetPagination):
         })
 
 
+def use_keyset_pagination(request):
+    return request.query_params.get("pagination") == "cursor" or "cursor" in request.query_params
+
+
+def get_cached_count(queryset, timeout=300):
+    # totals only need to be roughly current, so one COUNT(*) serves every page for a few minutes
+    sql, params = queryset.order_by().query.sql_with_params()
+    cache_key   = f"{CACHE_ENV}:count:{hashlib.md5(f'{sql}:{params}'.encode()).hexdigest()}"
+    count       = cache.get(cache_key)
+
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    limit_query_param  = "limit"
+    default_limit      = 10
+    max_limit          = 100
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+        self.fields   = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get_field(self, model, name):
+        return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            return list(cursor["p"]), bool(cursor["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("invalid cursor")
+
+    def encode_cursor(self, instance, reverse):
+        position = [self.get_field(instance, name).value_to_string(instance) for name, _ in self.fields]
+        token    = base64.urlsafe_b64encode(json.dumps({"p": position, "r": int(reverse)}).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def position_filter(self, model, position, reverse):
+        # row comparison (a, b) < (x, y) spelt out as a < x OR (a = x AND b < y) so the composite index is used
+        filters = Q()
+        equal   = {}
+        try:
+            for (name, descending), value in zip(self.fields, position, strict=True):
+                value   = self.get_field(model, name).to_python(value)
+                lookup  = "lt" if descending != reverse else "gt"
+                filters |= Q(**equal, **{f"{name}__{lookup}": value})
+                equal[name] = value
+        except (ValueError, DjangoValidationError):
+            raise NotFound("invalid cursor")
+        return filters
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request      = request
+        self.limit        = self.get_limit(request)
+        position, reverse = self.decode_cursor(request)
+        self.count        = get_cached_count(queryset)
+
+        queryset = queryset.order_by(*[("-" if descending != reverse else "") + name for name, descending in self.fields])
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(queryset.model, position, reverse))
+
+        results  = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results  = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        self.has_next     = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.page         = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], True)
+
+    def get_paginated_response(self, data):
+        model_name = getattr(self, 'model_name', 'results').lower() + 's'
+
+        return Response({
+            "message": f"{model_name.lower()} for the request",
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            model_name: data
+        })
+
+
 class BaseListCreateView(ListCreateAPIView):
     pagination_class   = CustomPagination
+    cursor_ordering    = None
     cache_timeout      = 3600
     permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.cursor_ordering and use_keyset_pagination(self.request):
+                self._paginator = KeysetPagination(self.cursor_ordering)
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
     
     def handle_exception(self, exc):
         response = super().handle_exception(exc)
@@ -50,18 +174,20 @@ class BaseListCreateView(ListCreateAPIView):
             cache_key = f"{CACHE_ENV}:{base_key}:{path}:{parent_pk}:{user_id}:{sorted_pairs}"
         else:
             cache_key = f"{CACHE_ENV}:{base_key}:{path}:{user_id}:{sorted_pairs}"
-        cached_page = cache.get(cache_key)
-
-        if cached_page is not None:
-            return Response(cached_page)
+        cache_key   = tagged_cache_key(cache_key, self.get_cache_tags(*args, **kwargs))
+        return Response(read_through(cache_key, self.get_page_data, self.cache_timeout))
 
+    def get_page_data(self):
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
-        response = self.get_paginated_response(serializer.data)
-        cache.set(cache_key, response.data, self.cache_timeout)
-        return response
+        return self.get_paginated_response(serializer.data).data
     
+    def get_cache_tags(self, *args, **kwargs):
+        base_key  = self.model.__name__.lower()
+        parent_pk = kwargs.get("pk")
+        return [f"{base_key}:list:{parent_pk}"] if parent_pk else [f"{base_key}:list"]
+
     def get_queryset(self):
         return self.model.objects.all().order_by("-created_at")
 
@@ -72,16 +198,14 @@ class BaseListCreateView(ListCreateAPIView):
         return super().paginate_queryset(queryset)
 
     def create(self, request, *args, **kwargs):
-        base_key = self.model.__name__.lower()
-
         extra_kwargs = self.get_extra_save_kwargs(request, *args, **kwargs)
         serializer = self.serializer_class(data=request.data)
         
         if not serializer.is_valid():
             return Response({"error": {"code": "validation_errors", "details": serializer.errors}},status=status.HTTP_400_BAD_REQUEST)
         
-        serializer.save(user=request.user, **extra_kwargs)
-        delete_cache_key(base_key)
+        instance = serializer.save(user=request.user, **extra_kwargs)
+        invalidate_cache_tags(*instance_cache_tags(instance))
         return Response({"message": f"{self.model.__name__} has been saved successfully", self.model.__name__: serializer.data}, status=status.HTTP_201_CREATED)
 
 class BaseRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
@@ -93,7 +217,7 @@ class BaseRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
         user_id   = self.request.user.id
         base_key  = self.model.__name__.lower()
         parent_pk = kwargs.get("pk")
-        return f"{CACHE_ENV}:{base_key}:{parent_pk}:{user_id}"
+        return tagged_cache_key(f"{CACHE_ENV}:{base_key}:{parent_pk}:{user_id}", [f"{base_key}:{parent_pk}"])
 
     def retrieve(self, request, *args, **kwargs):
         cache_key   = self.get_cache_key(self, *args, **kwargs)
@@ -116,17 +240,15 @@ class BaseRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(instance, data=request.data, partial=True, context={'request_user': request.user})
         serializer.is_valid(raise_exception=True)
         
-        cache_key   = self.get_cache_key(self, *args, **kwargs)
-
         self.perform_update(serializer)
-        delete_cache_key(cache_key)
+        invalidate_cache_tags(*instance_cache_tags(instance))
         return Response({"message": f"{self.model.__name__} updated successfully","data": serializer.data}, status=status.HTTP_202_ACCEPTED)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
+        tags = instance_cache_tags(instance)
         self.perform_destroy(instance)        
-        cache_key   = self.get_cache_key(self, *args, **kwargs)
-        delete_cache_key(cache_key)
+        invalidate_cache_tags(*tags)
         return Response({"message": f"{self.model.__name__} deleted successfully"},status=status.HTTP_204_NO_CONTENT)
     
     def handle_exception(self, exc):
@@ -1,16 +1,34 @@
-from  .microservices import mail_service
-from GamesHub.celery import app
+from  .microservices import mail_service, invalidate_cache_tags
+from .mailer import drain_outbox
+from .game_media_update import ingest_gamemedia, media_job_key, MEDIA_JOB_TIMEOUT
+from .ranking import rebuild_rankings
+from .votes import counter_lock, flush_vote_deltas, reconcile_vote_counts
 from .models import BlacklistedAccessToken
+from django.core.cache import cache
+from GamesHub.celery import app
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from django.utils import timezone
-from Store.models import Game
+from Store.models import Game, Wallet, WalletTransaction, WalletBalanceSnapshot, signed_amount
+from django.db.models import Exists, OuterRef, Subquery, Value, Sum, F
+from decimal import Decimal
+from django.db.models.functions import Coalesce
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.contrib.auth import get_user_model
 from GamesHub import settings
 from .email_helper import promotional_email, account_deletion_confirmation_email, unblock_user_email
 from datetime import date
 from Support.models import BanUser
+from Community.models import PostMedia
+from .storage_supabase import upload_staged_file, discard_staged_file, delete_from_supabase, get_object_path, list_stale_objects
+from .presigned_uploads import UPLOAD_PREFIX, CONFIRM_WINDOW
+import logging
+
+logger = logging.getLogger("gameshub")
 User = get_user_model()
 
+PENDING_MEDIA_GRACE  = timedelta(minutes=10)
+PENDING_MEDIA_EXPIRY = timedelta(days=1)
+
 @app.task(name='send_daily_promotional_email')
 def send_daily_promotional_email():
     userObjs = User.objects.filter(wishlist__isnull=False)
@@ -79,4 +97,131 @@ def unblock_banned_users():
         if not mail_result:
             return "mailer service failed"
 
-    return "Unblocked blocked users of more than 30 days"
\ No newline at end of file
+    return "Unblocked blocked users of more than 30 days"
+
+@app.task(name="snapshot_wallet_balances")
+def snapshot_wallet_balances():
+    # the lag keeps transactions that are still committing on the far side of the snapshot
+    taken_at = timezone.now() - timedelta(minutes=5)
+    last_snapshot = WalletBalanceSnapshot.objects.filter(wallet = OuterRef("pk"), taken_at__lte = taken_at).order_by("-taken_at")
+    ledger        = WalletTransaction.objects.filter(wallet = OuterRef("pk"), created_at__gt = OuterRef("since"), created_at__lte = taken_at)
+    movement      = ledger.order_by().values("wallet").annotate(total = Sum(signed_amount())).values("total")
+    # latest snapshot and the ledger rows since it are summed in the same query for every wallet
+    wallets       = Wallet.objects.annotate(since   = Coalesce(Subquery(last_snapshot.values("taken_at")[:1]), Value(datetime(1970, 1, 1, tzinfo=dt_timezone.utc))),
+                                            opening = Coalesce(Subquery(last_snapshot.values("balance")[:1]), Value(Decimal("0.00"))))\
+                                  .filter(Exists(ledger))\
+                                  .annotate(closing = F("opening") + Subquery(movement))\
+                                  .values_list("id", "closing")
+
+    snapshots = [WalletBalanceSnapshot(wallet_id = wallet_id, balance = closing, taken_at = taken_at) for wallet_id, closing in wallets.iterator()]
+    WalletBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+    return f"{len(snapshots)} wallet balance snapshots taken"
+
+@app.task(name="drain_email_outbox")
+def drain_email_outbox():
+    return drain_outbox()
+
+@app.task(name="ingest_game_media")
+def ingest_game_media(job_id, game_ids):
+    key = media_job_key(job_id)
+    job = cache.get(key) or {"job_id": job_id, "total": len(game_ids), "processed": 0, "details": {}}
+    job.update(status="running", started_at=timezone.now().isoformat())
+    cache.set(key, job, MEDIA_JOB_TIMEOUT)
+
+    def progress(details):
+        job.update(processed=len(details), details=details)
+        cache.set(key, job, MEDIA_JOB_TIMEOUT)
+
+    try:
+        details = ingest_gamemedia(game_ids, progress=progress)
+    except Exception as e:
+        logger.error(f"game media ingestion job {job_id} failed: {str(e)}", exc_info=True)
+        job.update(status="failed", finished_at=timezone.now().isoformat())
+        cache.set(key, job, MEDIA_JOB_TIMEOUT)
+        raise
+
+    job.update(status="completed", processed=len(details), details=details, finished_at=timezone.now().isoformat())
+    cache.set(key, job, MEDIA_JOB_TIMEOUT)
+
+    return f"media ingested for {len(details)} games"
+
+@app.task(name="upload_post_media", bind=True, max_retries=5, default_retry_delay=30)
+def upload_post_media(self, post_id):
+    uploaded = 0
+    error    = None
+
+    for media in PostMedia.objects.filter(post_id=post_id, status=1):
+        try:
+            public_url = upload_staged_file(media.staged_path, f"Posts/{post_id}/Media")
+        except FileNotFoundError:
+            PostMedia.objects.filter(id=media.id, status=1).update(status=3, staged_path="")
+            continue
+        except Exception as e:
+            logger.error(f"post media upload failed for post {post_id}: {str(e)}", exc_info=True)
+            error = e
+            continue
+
+        # media replaced while this upload was running is orphaned in storage, so it is removed again
+        if not PostMedia.objects.filter(id=media.id, status=1).update(url=public_url, status=2, staged_path=""):
+            delete_from_supabase(get_object_path(public_url))
+            continue
+        uploaded += 1
+
+    if uploaded:
+        invalidate_cache_tags(f"post:{post_id}", "post:list")
+
+    if error is not None:
+        if self.request.retries >= self.max_retries:
+            for media in PostMedia.objects.filter(post_id=post_id, status=1):
+                discard_staged_file(media.staged_path)
+            PostMedia.objects.filter(post_id=post_id, status=1).update(status=3, staged_path="")
+            return f"{uploaded} media uploaded for post {post_id}, the rest failed"
+        raise self.retry(exc=error)
+
+    return f"{uploaded} media uploaded for post {post_id}"
+
+@app.task(name="retry_pending_post_media")
+def retry_pending_post_media():
+    # picks up media whose upload task was never queued or got lost, and gives up on media stuck for a day
+    now      = timezone.now()
+    expired  = PostMedia.objects.filter(status=1, queued_at__lte=now - PENDING_MEDIA_EXPIRY)
+    for media in expired:
+        discard_staged_file(media.staged_path)
+    expired.update(status=3, staged_path="")
+
+    post_ids = list(PostMedia.objects.filter(status=1, queued_at__lte=now - PENDING_MEDIA_GRACE).values_list("post_id", flat=True).distinct())
+    for post_id in post_ids:
+        upload_post_media.delay(post_id)
+    return f"upload requeued for {len(post_ids)} posts"
+
+
+@app.task(name="delete_unconfirmed_uploads")
+def delete_unconfirmed_uploads():
+    # an upload token cannot be confirmed after CONFIRM_WINDOW, so anything older under the prefix is never attached
+    stale_keys = list_stale_objects(f"{UPLOAD_PREFIX}/", timezone.now() - timedelta(seconds=CONFIRM_WINDOW))
+    for object_key in stale_keys:
+        delete_from_supabase(object_key)
+    return f"{len(stale_keys)} unconfirmed uploads deleted"
+
+
+@app.task(name="rebuild_community_rankings")
+def rebuild_community_rankings():
+    return f"{rebuild_rankings()} posts ranked"
+
+
+@app.task(name="flush_vote_counts")
+def flush_vote_counts():
+    with counter_lock() as lock:
+        if lock is None:
+            return "vote counters are being written by another run"
+        return f"{flush_vote_deltas()} vote counters flushed"
+
+@app.task(name="reconcile_vote_counts")
+def reconcile_votes():
+    with counter_lock() as lock:
+        if lock is None:
+            return "vote counters are being written by another run"
+        # deltas are flushed first so only the last few seconds of votes are still in flight
+        flush_vote_deltas()
+        return f"{reconcile_vote_counts(lock)} vote counters reconciled"
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db import connections
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+
+logger       = logging.getLogger("gameshub")
+redis_client = cache.client.get_client()
+
+LOCK_TIMEOUT   = 10
+LOCK_POLL      = 0.05
+STALE_TIMEOUT  = 300
+EARLY_BETA     = 1.0
+
+_release_lock = redis_client.register_script("""
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+""")
+
+
+def raw_cache_key(key):
+    # keys used through the raw redis client get the same prefix and version cache.get/set would add
+    return cache.make_key(key)
+
+def _lock_key(key):
+    return raw_cache_key(f"{key}:lock")
+
+def acquire_lock(key):
+    token = uuid.uuid4().hex
+    if redis_client.set(_lock_key(key), token, nx=True, ex=LOCK_TIMEOUT):
+        return token
+    return None
+
+def release_lock(key, token):
+    _release_lock(keys=[_lock_key(key)], args=[token])
+
+def store(key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value   = compute()
+    delta   = time.monotonic() - started
+    cache.set(key, {"value": value, "expires_at": time.time() + timeout, "delta": delta}, timeout + stale_timeout)
+    return value
+
+def refresh_in_background(key, compute, timeout, stale_timeout, token):
+    def run():
+        try:
+            store(key, compute, timeout, stale_timeout)
+        except Exception as e:
+            logger.error(f"background cache refresh failed for {key}: {str(e)}", exc_info=True)
+        finally:
+            release_lock(key, token)
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+def should_refresh(entry):
+    # probabilistic early expiration: the closer to expiry and the slower the recompute, the likelier one caller refreshes early
+    return time.time() - entry["delta"] * EARLY_BETA * math.log(random.random() or 1e-12) >= entry["expires_at"]
+
+def read_through(key, compute, timeout, stale_timeout=STALE_TIMEOUT):
+    entry = cache.get(key)
+
+    if entry is not None:
+        if should_refresh(entry):
+            token = acquire_lock(key)
+            if token is not None:
+                refresh_in_background(key, compute, timeout, stale_timeout, token)
+        return entry["value"]
+
+    # single flight on a cold key: one caller computes, the rest wait for its result
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        token = acquire_lock(key)
+        if token is not None:
+            try:
+                return store(key, compute, timeout, stale_timeout)
+            finally:
+                release_lock(key, token)
+
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+        if time.monotonic() >= deadline:
+            return compute()
@@ -0,0 +1,147 @@
+from drf_spectacular.utils import extend_schema, OpenApiExample
+
+presign_upload_schema = extend_schema(
+    methods=["POST"],
+    summary="Request Direct Upload URL",
+    description="""
+        Issues a presigned S3 PUT URL so a client uploads media straight to storage instead of through the API.
+
+        - Requires authentication (`IsAuthenticated`)
+        - `purpose` decides the folder, allowed content types and size limit:
+            - `post_media`: own post, images up to 1 MB or `video/mp4` up to 10 MB, at most 3 per post
+            - `profile_picture`: own profile, images up to 1 MB, `target_id` not needed
+            - `ticket_evidence`: own ticket, images or PDF up to 1 MB
+            - `game_cover` / `sale_cover`: staff only, images up to 5 MB
+        - PUT the file to `upload_url` with the returned headers within `expires_in` seconds
+        - Then call `uploads/confirm` with `upload_token` to attach the file
+        - `upload_url` points to a temporary key, files that are not confirmed within an hour are deleted
+    """,
+    request={
+        "application/json": {
+            "type": "object",
+            "properties": {
+                "purpose": {"type": "string", "enum": ["post_media", "profile_picture", "ticket_evidence", "game_cover", "sale_cover"]},
+                "target_id": {"type": "integer", "description": "ID of the post, ticket, game or sale the file belongs to"},
+                "filename": {"type": "string", "description": "Original file name"},
+                "content_type": {"type": "string", "example": "image/png"},
+                "size": {"type": "integer", "description": "File size in bytes"}
+            },
+            "required": ["purpose", "filename", "content_type"]
+        }
+    },
+    responses={
+        201: {"application/json": {"type": "object"}},
+        400: {"application/json": {"type": "object"}},
+        404: {"application/json": {"type": "object"}},
+        409: {"application/json": {"type": "object"}},
+        415: {"application/json": {"type": "object"}},
+        503: {"application/json": {"type": "object"}}
+    },
+    examples=[
+        OpenApiExample(
+            name="Upload URL Issued",
+            value={
+                "message": "upload url issued",
+                "upload_url": "https://supabase.storage/storage/v1/s3/GamesHubMedia/Posts/5/Media/20250701101500_clip.mp4?X-Amz-Signature=...",
+                "method": "PUT",
+                "headers": {"Content-Type": "video/mp4"},
+                "upload_token": "eyJrZXkiOiJQb3N0cy81L01lZGlhLzIwMjUwNzAxMTAxNTAwX2NsaXAubXA0In0:1uW...",
+                "expires_in": 900
+            },
+            response_only=True,
+            status_codes=["201"]
+        ),
+        OpenApiExample(
+            name="Invalid Purpose",
+            value={"error": {"code": "invalid_purpose", "message": "purpose should be one of post_media, profile_picture, ticket_evidence, game_cover, sale_cover"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
+        OpenApiExample(
+            name="File Too Large",
+            value={"error": {"code": "file_too_large", "message": "file size must not exceed 10 MB"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
+        OpenApiExample(
+            name="Target Not Found",
+            value={"error": {"code": "upload_target_not_found", "message": "target does not exist or you are not allowed to upload to it"}},
+            response_only=True,
+            status_codes=["404"]
+        ),
+        OpenApiExample(
+            name="Upload Limit Reached",
+            value={"error": {"code": "upload_limit_reached", "message": "Only three media files can be uploaded."}},
+            response_only=True,
+            status_codes=["409"]
+        ),
+        OpenApiExample(
+            name="Unsupported Media Type",
+            value={"error": {"code": "unsupported_media_type", "message": "content_type should be one of image/jpeg, image/png, image/gif, image/webp"}},
+            response_only=True,
+            status_codes=["415"]
+        )
+    ]
+)
+
+
+confirm_upload_schema = extend_schema(
+    methods=["POST"],
+    summary="Confirm Direct Upload",
+    description="""
+        Attaches a file uploaded through a presigned URL to its post, profile, ticket, game or sale.
+
+        - Requires authentication (`IsAuthenticated`), by the same user that requested the upload URL
+        - Verifies the object exists and matches the approved size and content type, otherwise it is deleted
+        - The checked file is copied out of the temporary upload key, so later PUTs to `upload_url` have no effect
+        - Each upload token can be confirmed once, within an hour of being issued
+    """,
+    request={
+        "application/json": {
+            "type": "object",
+            "properties": {
+                "upload_token": {"type": "string", "description": "Token returned by uploads/presign"}
+            },
+            "required": ["upload_token"]
+        }
+    },
+    responses={
+        200: {"application/json": {"type": "object"}},
+        400: {"application/json": {"type": "object"}},
+        404: {"application/json": {"type": "object"}},
+        409: {"application/json": {"type": "object"}},
+        503: {"application/json": {"type": "object"}}
+    },
+    examples=[
+        OpenApiExample(
+            name="Upload Confirmed",
+            value={"message": "upload confirmed", "purpose": "post_media", "target_id": 5},
+            response_only=True,
+            status_codes=["200"]
+        ),
+        OpenApiExample(
+            name="Invalid Token",
+            value={"error": {"code": "invalid_upload_token", "message": "upload token is invalid or expired"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
+        OpenApiExample(
+            name="Not Uploaded Yet",
+            value={"error": {"code": "upload_not_found", "message": "file has not been uploaded yet"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
+        OpenApiExample(
+            name="Upload Mismatch",
+            value={"error": {"code": "invalid_upload", "message": "uploaded file does not match the approved size or content type"}},
+            response_only=True,
+            status_codes=["400"]
+        ),
+        OpenApiExample(
+            name="Already Confirmed",
+            value={"error": {"code": "upload_already_confirmed", "message": "this upload has already been confirmed"}},
+            response_only=True,
+            status_codes=["409"]
+        )
+    ]
+)
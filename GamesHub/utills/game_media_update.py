@@ -1,14 +1,20 @@
 import os
-import requests
-import time
-from django.core.files.base import ContentFile
+from django.core.files.base import File
+from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from Store.models import Game, GamesMedia
 import re
 from .storage_supabase import upload_file_to_supabase
+from .http_client import integration
+from GamesHub.settings import CACHE_ENV
 import mimetypes
+import tempfile
 from urllib.parse import quote_plus
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict
+import logging
+
+logger = logging.getLogger("gameshub")
 
 
 IGDB_CLIENT_ID = os.getenv("IGDB_CLIENT_ID")
@@ -18,101 +24,157 @@ IGDB_HEADERS = {
     "Authorization": f"Bearer {IGDB_ACCESS_TOKEN}",
 }
 
+# igdb queries are POSTed but read only, so they are safe to retry
+igdb      = integration("igdb", timeout=(3.05, 10), headers=IGDB_HEADERS)
+igdb_cdn  = integration("igdb_images", timeout=(3.05, 15), pool_maxsize=16)
+
+IGDB_MULTIQUERY_LIMIT = 10
+GAMES_PER_MULTIQUERY  = IGDB_MULTIQUERY_LIMIT // 2
+MEDIA_CONCURRENCY     = int(os.getenv("MEDIA_INGEST_CONCURRENCY", 8))
+DOWNLOAD_SPOOL_SIZE   = 256 * 1024
+MEDIA_JOB_TIMEOUT     = 60*60*24
+
+def media_job_key(job_id):
+    return f"{CACHE_ENV}:media_job:{job_id}"
+
 def download_image(url, game_name, num):
     try:
-        r = requests.get("https:" + url, stream=True, timeout=15)
-        r.raise_for_status()
-
-        content_type = r.headers.get('Content-Type', '').split(';')[0].strip()
-        
-        extension = mimetypes.guess_extension(content_type) or '.jpg'
-        
-        if extension not in ['.jpg', '.jpeg', '.png', '.webp', '.gif']:
-            extension = '.jpg'
+        with igdb_cdn.get("https:" + url, stream=True) as r:
+            r.raise_for_status()
+
+            content_type = r.headers.get('Content-Type', '').split(';')[0].strip()
+            
+            extension = mimetypes.guess_extension(content_type) or '.jpg'
+            
+            if extension not in ['.jpg', '.jpeg', '.png', '.webp', '.gif']:
+                extension = '.jpg'
+
+            # the body is piped to a spooled file in chunks, large images go to disk instead of memory
+            spooled = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE)
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                spooled.write(chunk)
+            spooled.seek(0)
 
         filename = f"{game_name}_{num}{extension}"
-        return ContentFile(r.content, name=filename) 
+        return File(spooled, name=filename) 
 
     except Exception as e:
         return None
 
-def get_igdb_screenshots(game_name):
-    query = f'fields screenshots.url, screenshots.width, screenshots.height; where name ~ *"{game_name}"*; limit 5;'
-    resp = requests.post("https://api.igdb.com/v4/games", headers=IGDB_HEADERS, data=query)
-    if not resp.ok:
-        return []
-    data = resp.json()
-    if not data:
-        return []
-    
-    urls = []
-    for game in data:
-        for ss in game.get('screenshots', []):
-            if ss.get('width', 0) > ss.get('height', 0):
-                urls.append(ss['url'].replace('t_thumb', 't_screenshot_huge'))
-                if len(urls) >= 5:
-                    return urls
-                
-    return urls
-
-def get_youtube_trailer(game_name):
-    query = f'''
-    fields videos.video_id;
-    where name ~ *"{game_name}"* & videos.video_id != null;
-    limit 1;
-    '''
-    resp = requests.post("https://api.igdb.com/v4/games", headers=IGDB_HEADERS, data=query)
-    if not resp.ok:
-        return None
-    data = resp.json()
-    if not data:
-        return None
-    video_id = data[0].get("videos", [{}])[0].get("video_id")
-    return f"https://www.youtube.com/watch?v={video_id}" if video_id else None
-
-def populate_gamemedia(game):
-    logs = {}
-    
-    game_name = game.get_name()
+def igdb_string(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
 
-    logs["game_processed"] = game_name
+def lookup_media_batch(games):
+    # one multiquery resolves screenshots and the trailer for up to 5 games in a single round trip,
+    # each game keeps its own screenshot and trailer sub-query with the filters and limits they had
+    queries = "".join(
+        f'query games "s{game.id}" {{ fields screenshots.url, screenshots.width, screenshots.height; where name ~ *"{igdb_string(game.get_name())}"*; limit 5; }};'
+        f'query games "t{game.id}" {{ fields videos.video_id; where name ~ *"{igdb_string(game.get_name())}"* & videos.video_id != null; limit 1; }};'
+        for game in games
+    )
+    resp = igdb.post("https://api.igdb.com/v4/multiquery", data=queries, retry=True)
+    resp.raise_for_status()
+
+    media = {game.id: ([], None) for game in games}
+    for query in resp.json():
+        kind, game_id = query["name"][0], int(query["name"][1:])
+        urls, trailer = media[game_id]
+        results       = query.get("result", [])
+        if kind == "s":
+            for match in results:
+                for ss in match.get("screenshots", []):
+                    if len(urls) < 5 and ss.get("width", 0) > ss.get("height", 0):
+                        urls.append(ss["url"].replace("t_thumb", "t_screenshot_huge"))
+        elif results:
+            video_id = results[0].get("videos", [{}])[0].get("video_id")
+            trailer  = f"https://www.youtube.com/watch?v={video_id}" if video_id else None
+        media[game_id] = (urls, trailer)
+
+    return media
+
+def upload_screenshot(game_name, num, img_url):
+    screenshot = download_image(img_url, game_name, num)
+    if not screenshot:
+        return None
+    safe_path = re.sub(r'[^a-zA-Z0-9\-_/\.]', '', game_name)
+    with screenshot:
+        return upload_file_to_supabase(screenshot, f"{safe_path}/Screen_Shots")
 
-    added = 0
+def save_gamemedia(game, trailer_url, screenshot_urls):
+    logs = {"game_processed": game.get_name()}
 
-    trailer_url = get_youtube_trailer(game.name)
     if trailer_url:
         obj, created = GamesMedia.objects.get_or_create(
             game=game,
             media_type=2,
             defaults={"url": trailer_url}
         )
+        logs["game_trailer"] = "added" if created else "updated"
 
-        logs["game_trailer"] = "updated"
-
-        if created:
-            logs["game_trailer"] = "added"
-
-    
-    screenshot_urls = get_igdb_screenshots(game_name)
-    
-    for i, img_url in enumerate(screenshot_urls):
-        file_content = download_image(img_url, game_name, i)
-        safe_path  = re.sub(r'[^a-zA-Z0-9\-_/\.]', '', game_name)
-        screenshot = file_content
-
-        if screenshot:
-            public_url = upload_file_to_supabase(screenshot, f"{safe_path}/Screen_Shots")
-        else:
-            continue
-    
-        GamesMedia(game = game, media_type = 1, url = public_url).save()
-
-        added += 1
+    added = 0
+    try:
+        for public_url in screenshot_urls:
+            GamesMedia(game = game, media_type = 1, url = public_url).save()
+            added += 1
+    except ValidationError as e:
+        logs["error"] = " ".join(e.messages)
 
     logs["screenshots_added"] = added
 
     return logs
 
+def ingest_gamemedia(game_ids, concurrency=MEDIA_CONCURRENCY, progress=None):
+    details = {}
+    found   = Game.objects.in_bulk(game_ids)
+    games   = []
+    for id in dict.fromkeys(game_ids):
+        if id in found:
+            games.append(found[id])
+        else:
+            details[id] = f"game obj with id {id} does not exist"
+
+    def finish(game_id, logs):
+        details[game_id] = logs
+        if progress:
+            progress(details)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        lookups = {pool.submit(lookup_media_batch, games[i:i + GAMES_PER_MULTIQUERY]): games[i:i + GAMES_PER_MULTIQUERY] for i in range(0, len(games), GAMES_PER_MULTIQUERY)}
+        media   = {}
+        for future in as_completed(lookups):
+            try:
+                media.update(future.result())
+            except Exception as e:
+                logger.error(f"igdb media lookup failed for {len(lookups[future])} games: {str(e)}", exc_info=True)
+                for game in lookups[future]:
+                    finish(game.id, "igdb lookup failed")
+
+        games     = [game for game in games if game.id in media]
+        uploads   = {pool.submit(upload_screenshot, game.get_name(), num, url): (game.id, num) for game in games for num, url in enumerate(media[game.id][0])}
+        remaining = Counter(game_id for game_id, _ in uploads.values())
+        uploaded  = defaultdict(list)
+        by_id     = {game.id: game for game in games}
+
+        # database writes stay on this thread, a game is saved as soon as its last upload lands
+        for game in games:
+            if not remaining[game.id]:
+                finish(game.id, save_gamemedia(game, media[game.id][1], []))
+
+        for future in as_completed(uploads):
+            game_id, num = uploads[future]
+            try:
+                public_url = future.result()
+                if public_url:
+                    uploaded[game_id].append((num, public_url))
+            except Exception as e:
+                logger.error(f"screenshot upload failed for game {game_id}: {str(e)}", exc_info=True)
+
+            remaining[game_id] -= 1
+            if not remaining[game_id]:
+                finish(game_id, save_gamemedia(by_id[game_id], media[game_id][1], [url for _, url in sorted(uploaded[game_id])]))
+
+    return details
+
 
 # def get_cover_url(game_name):
 #     query = f'fields cover.url; where name = "{game_name}"; limit 1;'
@@ -131,10 +193,10 @@ def populate_gamemedia(game):
 
 def get_cover_url(game_name):
     query = f'fields cover; where name = "{game_name}"; limit 1;'
-    resp = requests.post(
+    resp = igdb.post(
         "https://api.igdb.com/v4/games",
-        headers=IGDB_HEADERS,
-        data=query
+        data=query,
+        retry=True
     )
     if not resp.ok or not resp.json():
         return None
@@ -144,10 +206,10 @@ def get_cover_url(game_name):
         return None
     
     cover_query = f'fields url; where id = {cover_id};'
-    cover_resp = requests.post(
+    cover_resp = igdb.post(
         "https://api.igdb.com/v4/covers",
-        headers=IGDB_HEADERS,
-        data=cover_query
+        data=cover_query,
+        retry=True
     )
     if not cover_resp.ok or not cover_resp.json():
         return None
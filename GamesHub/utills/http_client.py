@@ -0,0 +1,236 @@
+from requests.adapters import HTTPAdapter
+from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+from collections import deque
+import requests
+import httpx
+import threading
+import logging
+import random
+import time
+
+logger = logging.getLogger("gameshub")
+
+DEFAULT_TIMEOUT   = (3.05, 10)
+RETRY_STATUSES    = {429, 502, 503, 504}
+IDEMPOTENT        = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+SLOW_CALL_SECONDS = 2
+LATENCY_SAMPLES   = 512
+TRANSPORT_ERRORS  = (OSError, BotoConnectionError, HTTPClientError, httpx.TransportError)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+def error_status(exc):
+    # sdks carry the http status in different places: botocore in a response dict,
+    # requests and httpx on a response object, storage3 as a status attribute
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    elif response is not None:
+        status = getattr(response, "status_code", None)
+    else:
+        status = getattr(exc, "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+def is_outage(exc):
+    # only an unreachable, timed out or failing service counts against the breaker. a 4xx such
+    # as a missing key is the caller's mistake and shows the service is answering
+    status = error_status(exc)
+    if status is not None:
+        return status >= 500 or status == 429
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+class RetryBudget:
+    # retries are allowed only while they stay under a fraction of recent traffic, so an
+    # outage does not multiply the load on a service that is already struggling
+    def __init__(self, ratio=0.2, min_retries=3, window=10):
+        self.ratio       = ratio
+        self.min_retries = min_retries
+        self.window      = window
+        self.started     = time.monotonic()
+        self.requests    = 0
+        self.retries     = 0
+
+    def roll(self):
+        if time.monotonic() - self.started >= self.window:
+            self.started  = time.monotonic()
+            self.requests = 0
+            self.retries  = 0
+
+    def record_request(self):
+        self.roll()
+        self.requests += 1
+
+    def try_spend(self):
+        self.roll()
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.failures          = 0
+        self.opened_at         = None
+        self.trial_running     = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        # half open lets a single trial call through, its outcome closes or reopens the circuit
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures      = 0
+        self.opened_at     = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures     += 1
+        self.trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class Integration:
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT, max_retries=2, backoff=0.2, pool_maxsize=10,
+                 failure_threshold=5, reset_timeout=30, retry_ratio=0.2, headers=None):
+        self.name        = name
+        self.timeout     = timeout
+        self.max_retries = max_retries
+        self.backoff     = backoff
+        self.breaker     = CircuitBreaker(failure_threshold, reset_timeout)
+        self.budget      = RetryBudget(retry_ratio)
+        self.lock        = threading.Lock()
+        self.latencies   = deque(maxlen=LATENCY_SAMPLES)
+        self.counters    = {"calls": 0, "failures": 0, "retries": 0, "short_circuited": 0}
+
+        # keep-alive pools are per host inside the adapter, retries are handled here so they respect the budget
+        adapter      = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def before_call(self):
+        with self.lock:
+            if not self.breaker.allow():
+                self.counters["short_circuited"] += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self.budget.record_request()
+
+    def after_call(self, started, failed):
+        elapsed = time.monotonic() - started
+        with self.lock:
+            self.counters["calls"] += 1
+            self.latencies.append(elapsed)
+            if failed:
+                self.counters["failures"] += 1
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if elapsed >= SLOW_CALL_SECONDS:
+            logger.warning(f"slow {self.name} call took {elapsed:.2f}s")
+
+    def can_retry(self, attempt):
+        if attempt >= self.max_retries:
+            return False
+        with self.lock:
+            if not self.budget.try_spend():
+                return False
+            self.counters["retries"] += 1
+        time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+        return True
+
+    def request(self, method, url, retry=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        retry   = method.upper() in IDEMPOTENT if retry is None else retry
+        attempt = 0
+
+        while True:
+            self.before_call()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                self.after_call(started, failed=True)
+                if retry and self.can_retry(attempt):
+                    attempt += 1
+                    continue
+                raise
+
+            failed = response.status_code >= 500 or response.status_code == 429
+            self.after_call(started, failed)
+            if failed and retry and response.status_code in RETRY_STATUSES and self.can_retry(attempt):
+                attempt += 1
+                continue
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def track(self, func, *args, **kwargs):
+        # for sdk clients (boto3, supabase) that own their connections and retries but
+        # should still share the breaker and latency metrics
+        self.before_call()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.after_call(started, failed=is_outage(e))
+            raise
+        self.after_call(started, failed=False)
+        return result
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counters  = dict(self.counters)
+            state     = self.breaker.state
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 1)
+
+        return {**counters, "circuit": state, "p50_ms": percentile(0.5), "p95_ms": percentile(0.95), "max_ms": percentile(1)}
+
+
+_integrations      = {}
+_integrations_lock = threading.Lock()
+
+def integration(name, **options):
+    with _integrations_lock:
+        if name not in _integrations:
+            _integrations[name] = Integration(name, **options)
+        return _integrations[name]
+
+def integration_metrics():
+    with _integrations_lock:
+        integrations = list(_integrations.values())
+    return {client.name: client.metrics() for client in integrations}
@@ -0,0 +1,70 @@
+from celery import current_app
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from .models import EmailOutbox
+from .http_client import integration, CircuitOpenError
+import requests
+import logging
+import os
+
+logger = logging.getLogger("gameshub")
+
+FLASK_MAILER_API_KEY = os.getenv("FLASK_MAILER_API_KEY")
+MAILER_URL           = "https://gameshubmailer.pythonanywhere.com/mailer"
+BATCH_SIZE           = 50
+MAX_ATTEMPTS         = 6
+LEASE_TIMEOUT        = timedelta(minutes=5)
+
+# the outbox already retries with backoff, so the client only fails fast and trips its breaker
+mailer = integration("mailer", timeout=(5, 15), max_retries=0, headers={"Content-Type": "application/json", "API-Key": FLASK_MAILER_API_KEY or ""})
+
+
+def enqueue_email(subject, body, recipients):
+    # the row commits or rolls back with the caller's transaction, delivery starts only once it is visible
+    EmailOutbox.objects.create(subject=subject, body=body, recipients=recipients)
+    # the kick is only a shortcut, with the broker down the minute drain still delivers the row
+    transaction.on_commit(lambda: current_app.send_task("drain_email_outbox"), robust=True)
+
+def deliver_email(email):
+    response = mailer.post(MAILER_URL, json={"Subject": email.subject, "Recepient": email.recipients, "Body": email.body})
+    if response.status_code != 200:
+        raise requests.HTTPError(f"mailer responded with {response.status_code}")
+
+def claim_batch():
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(EmailOutbox.objects.select_for_update(skip_locked=True).filter(status=1, next_attempt_at__lte=now).order_by("next_attempt_at")[:BATCH_SIZE])
+        # a lease keeps other workers off these rows while they are being sent outside the transaction
+        EmailOutbox.objects.filter(id__in=[email.id for email in emails]).update(next_attempt_at=now + LEASE_TIMEOUT)
+    return emails
+
+def record_failure(email, error):
+    email.attempts  += 1
+    email.last_error = str(error)[:2048]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 3
+        logger.error(f"email {email.id} moved to dead letter after {email.attempts} attempts: {email.last_error}")
+    else:
+        email.next_attempt_at = timezone.now() + timedelta(seconds=min(30 * 2 ** email.attempts, 3600))
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+def drain_outbox():
+    sent = failed = 0
+    while emails := claim_batch():
+        for index, email in enumerate(emails):
+            try:
+                deliver_email(email)
+            except CircuitOpenError:
+                # the mailer is known to be down, hand the rest back without burning their attempts
+                pending = [item.id for item in emails[index:]]
+                EmailOutbox.objects.filter(id__in=pending).update(next_attempt_at=timezone.now() + timedelta(seconds=mailer.breaker.reset_timeout))
+                return f"{sent} emails sent, {failed} failed, {len(pending)} deferred while the mailer circuit is open"
+            except Exception as e:
+                record_failure(email, e)
+                failed += 1
+                continue
+            EmailOutbox.objects.filter(id=email.id).update(status=2, sent_at=timezone.now(), attempts=email.attempts + 1)
+            sent += 1
+
+    return f"{sent} emails sent, {failed} failed"
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from utills.moderation import compile_words
+import random
+import string
+import timeit
+import re
+
+
+class Command(BaseCommand):
+    help = "Times the banned word filter on 4 KB bodies against growing word lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[4, 100, 1000, 5000])
+        parser.add_argument("--body-size", type=int, default=4096)
+        parser.add_argument("--runs", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng   = random.Random(42)
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(max(options["sizes"]))]
+        vocab = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2000)]
+
+        body = ""
+        while len(body) < options["body_size"]:
+            body += rng.choice(vocab) + " "
+        body = body[:options["body_size"]]
+
+        self.stdout.write(f"{'words':>8} {'trie (ms)':>12} {'per word (ms)':>15}")
+        for size in options["sizes"]:
+            pattern  = compile_words(words[:size])
+            per_word = [re.compile(rf"(?i)\b{re.escape(word)}\b") for word in words[:size]]
+
+            trie_ms  = timeit.timeit(lambda: list(pattern.finditer(body)), number=options["runs"]) / options["runs"] * 1000
+            naive_ms = timeit.timeit(lambda: [p.search(body) for p in per_word], number=max(options["runs"] // 10, 1)) / max(options["runs"] // 10, 1) * 1000
+
+            self.stdout.write(f"{size:>8} {trie_ms:>12.3f} {naive_ms:>15.3f}")
@@ -1,138 +1,178 @@
 from rest_framework.pagination import LimitOffsetPagination
 from Store.models import Game
+from GamesBuzz.models import GameInteraction
 from Store.serializers import gamesSerializer
-import requests
-import os
 from django.core.cache import cache
-from django.db.models import Q, F
-from .models import UpvoteDownvoteControl
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, F, Count, Value
+from django.utils.text import slugify
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from .votes import requested_vote, apply_vote
+from .cache_helper import read_through, raw_cache_key
+from .mailer import enqueue_email
 from GamesHub.settings import CACHE_ENV
+import re
 
 redis_client = cache.client.get_client()
 
-def delete_cache_key(base_key):
-    keys = list(redis_client.scan_iter(f":1:{CACHE_ENV}:{base_key}*"))
+def cache_tag_key(tag):
+    return f"{CACHE_ENV}:tag:{tag}"
+
+def tagged_cache_key(key, tags):
+    # entries are keyed under the current generation of every tag they depend on
+    versions = cache.get_many([cache_tag_key(tag) for tag in tags])
+    return f"{key}:" + ".".join(str(versions.get(cache_tag_key(tag), 0)) for tag in tags)
+
+def invalidate_cache_tags(*tags):
+    # bumping a generation orphans the entries built on it, they age out on their own timeout
+    with redis_client.pipeline(transaction=False) as pipe:
+        for tag in set(tags):
+            pipe.incr(raw_cache_key(cache_tag_key(tag)))
+        pipe.execute()
+
+def instance_cache_tags(instance):
+    base_key = instance.__class__.__name__.lower()
+    tags     = [f"{base_key}:{instance.pk}", f"{base_key}:list"]
+
+    if getattr(instance, "content_type_id", None) is not None:
+        parent_key = ContentType.objects.get_for_id(instance.content_type_id).model
+        tags      += [f"{base_key}:list:{instance.object_id}", f"{parent_key}:{instance.object_id}", f"{parent_key}:list"]
+    elif getattr(instance, "game_id", None) is not None:
+        tags      += [f"{base_key}:list:{instance.game_id}"]
+
+    return tags
+
+
+LIBRARY_SET_TIMEOUT = 86400
+
+def library_set_key(user_id):
+    return raw_cache_key(f"{CACHE_ENV}:library_set:{user_id}")
+
+def library_generation_key(user_id):
+    return raw_cache_key(f"{CACHE_ENV}:library_gen:{user_id}")
+
+# the rebuilt set is only written if no purchase or refund bumped the generation while it was being read
+_store_library_set = redis_client.register_script("""
+if (redis.call("get", KEYS[2]) or "") ~= ARGV[1] then
+    return 0
+end
+redis.call("sadd", KEYS[1], unpack(ARGV, 3))
+redis.call("expire", KEYS[1], ARGV[2])
+return 1
+""")
+
+def in_user_library(user_id, game_id):
+    # one small set of owned game ids per user instead of a cached detail page per user and game
+    key = library_set_key(user_id)
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(key)
+        pipe.sismember(key, game_id)
+        pipe.get(library_generation_key(user_id))
+        exists, member, generation = pipe.execute()
+
+    if exists:
+        return bool(member)
+
+    game_ids = list(GameInteraction.objects.filter(user_id = user_id, in_library = True).values_list("game_id", flat=True))
+    _store_library_set(keys=[key, library_generation_key(user_id)], args=[(generation or b"").decode(), LIBRARY_SET_TIMEOUT, 0, *game_ids])
+    return int(game_id) in game_ids
+
+def invalidate_library_set(user_id):
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.incr(library_generation_key(user_id))
+        pipe.expire(library_generation_key(user_id), 2 * LIBRARY_SET_TIMEOUT)
+        pipe.delete(library_set_key(user_id))
+        pipe.execute()
+
+def catalogue_search_query(text):
+    # every word is matched as a prefix against the weighted name/developer/genre/platforms vector
+    tokens = re.findall(r"\w+", text.lower())
+    if not tokens:
+        return None
+    return SearchQuery(" & ".join(f"{token}:*" for token in tokens), search_type="raw", config="simple")
+
+def catalogue_facets(games):
+    # genre and platform counts for the filtered catalogue come back from one grouped union query
+    game_ids        = games.values("id")
+    genre_counts    = Game.genre_tags.through.objects.filter(game__in = game_ids).values(facet = F("genre__name")).annotate(facet_type = Value("genre"), count = Count("game_id"))
+    platform_counts = Game.platform_tags.through.objects.filter(game__in = game_ids).values(facet = F("platform__name")).annotate(facet_type = Value("platforms"), count = Count("game_id"))
+
+    facets = {"genre": {}, "platforms": {}}
+    for row in genre_counts.union(platform_counts, all=True):
+        facets[row["facet_type"]][row["facet"]] = row["count"]
+
+    return facets
+
+def catalogue_page(request, game_ids):
+    paginator = LimitOffsetPagination()
+    filters   = Q()
+    rank      = None
+
+    if game_ids:
+        filters &= Q(id__in = game_ids)
+
+    if name := request.query_params.get('name'):
+        name         = name.strip()
+        search_query = catalogue_search_query(name)
+        # trigram word similarity on name keeps misspelt titles matching
+        if search_query is not None:
+            filters &= Q(search_vector = search_query) | Q(name__trigram_word_similar = name)
+            rank     = SearchRank(F("search_vector"), search_query) + TrigramWordSimilarity(name, "name")
+        else:
+            filters &= Q(name__trigram_word_similar = name)
+            rank     = TrigramWordSimilarity(name, "name")
+    if published_date := request.query_params.get('publishedDate'):
+        filters &= Q(publishedDate__lte = published_date.strip())
+    if price:= request.query_params.get('price'):
+        try:
+            filters &= Q(price__lte = float(price.strip()))
+        except:
+            pass # not needed as invalid data item
+    if developer := request.query_params.get('developer'):
+        filters &= Q(developer__icontains = developer.strip())
+    if discount := request.query_params.get('discount'):
+        try:
+            filters &= Q(discount__gte= float(discount.strip()))
+        except:
+            pass # not needed as invalid data item
+    if rating := request.query_params.get('rating'):
+        try:
+            filters &= Q(rating__gte = float(rating.strip()))
+        except:
+            pass # not needed as invalid data item
 
-    if keys:
-        redis_client.delete(*keys)
-    
-    if base_key == "comment":
-        delete_cache_key("post")
-        delete_cache_key("ticket")
+    games = Game.objects.filter(filters)
+    # each requested platform/genre is its own indexed join so a game has to carry all of them
+    for p in request.GET.getlist('platforms'):
+        games = games.filter(platform_tags__slug = slugify(p.strip()))
+    for g in request.GET.getlist('genre'):
+        games = games.filter(genre_tags__slug = slugify(g.strip()))
 
+    if rank is not None:
+        gameObjs = games.annotate(rank = rank).order_by('-rank', 'id')
+    else:
+        gameObjs = games.order_by('id')
+    paginated_games = paginator.paginate_queryset(gameObjs, request)
+    gamesSerial = gamesSerializer(paginated_games, many=True)
+    gamesSerial = gamesSerial.data
+    return gamesSerial, paginator.get_next_link(), paginator.get_previous_link(), paginator.count, catalogue_facets(games)
 
 # Microservice for Search
 def search(request, game_ids):
-    path_key = request.path
+    if game_ids:
+        return catalogue_page(request, game_ids)
 
-    paginator = LimitOffsetPagination()
-    cache_key   = f"{CACHE_ENV}:game:{path_key}:CACHED_GAMES"
-    cached_vals = cache.get(cache_key)
-
-    if not request.GET and cached_vals and not game_ids:
-        cache_vals = cached_vals
-    elif not request.GET and not cached_vals:
-        if game_ids is None:
-            gameObjs = Game.objects.all().order_by('id')
-        else:
-            gameObjs = Game.objects.filter(id__in = game_ids).order_by('id')
-        paginated_games = paginator.paginate_queryset(gameObjs, request)
-        gamesSerial = gamesSerializer(paginated_games, many=True)
-        gamesSerial = gamesSerial.data
-        cache_vals  = gamesSerial, paginator.get_next_link(), paginator.get_previous_link(), paginator.count
-        if not game_ids:
-            cache.set(cache_key, cache_vals, timeout=600)
-    else:
-        query_params = request.GET.dict()
-        sorted_pairs = str(sorted(tuple(query_params.items()), key=lambda x: x[1].lower()))
-        cache_key   = f"{CACHE_ENV}:game:{path_key}:{sorted_pairs}"
-        cached_vals = cache.get(cache_key)
+    sorted_pairs = str(sorted((key, sorted(values)) for key, values in request.GET.lists()))
+    cache_key    = tagged_cache_key(f"{CACHE_ENV}:game:{request.path}:{sorted_pairs}", ["catalogue"])
+    return read_through(cache_key, lambda: catalogue_page(request, None), timeout=600)
 
-        if cached_vals:
-            cache_vals = cached_vals
-        else:
-            filters = Q()
-
-            if game_ids:
-                filter &= Q(id__in = game_ids)
-
-            if name := request.query_params.get('name'):
-                filters &= Q(name__icontains = name.strip())
-            if published_date := request.query_params.get('publishedDate'):
-                filters &= Q(publishedDate__lte = published_date.strip())
-            if price:= request.query_params.get('price'):
-                try:
-                    filters &= Q(price__lte = float(price.strip()))
-                except:
-                    pass # not needed as invalid data item
-            if developer := request.query_params.get('developer'):
-                filters &= Q(developer__icontains = developer.strip())
-            if discount := request.query_params.get('discount'):
-                try:
-                    filters &= Q(discount__gte= float(discount.strip()))
-                except:
-                    pass # not needed as invalid data item
-            if rating := request.query_params.get('rating'):
-                try:
-                    filters &= Q(rating__gte = float(rating.strip()))
-                except:
-                    pass # not needed as invalid data item
-            if len(request.GET.getlist('platforms')) != 0:
-                for p in request.GET.getlist('platforms'):
-                    filters &= Q(platforms__icontains=p.strip())
-            if len(request.GET.getlist('genre')) != 0:
-                for g in request.GET.getlist('genre'):
-                    filters &= Q(genre__icontains=g.strip())
-
-            gameObjs = Game.objects.filter(filters).order_by('id')
-            paginated_games = paginator.paginate_queryset(gameObjs, request)
-            gamesSerial = gamesSerializer(paginated_games, many=True)
-            gamesSerial = gamesSerial.data
-            cache_vals  = gamesSerial, paginator.get_next_link(), paginator.get_previous_link(), paginator.count
-            if not game_ids:
-                cache.set(cache_key, cache_vals, timeout=600)
-
-    return cache_vals
-
-
-FLASK_MAILER_API_KEY = os.getenv("FLASK_MAILER_API_KEY")
 
 # Microservice for Email servive
 def mail_service(Subject, message, recepients):
-    if False: #Logic to use django method if web service hosting platfors allow SMTP traffic
-        try:
-            send_mail(
-                subject=Subject,
-                message='',
-                html_message= message,
-                from_email='GamesHub <gameshub.test@gmail.com>',
-                recipient_list=[recepients],
-                fail_silently=False,
-                )
-            
-            return True, "Email sent successfully"
-        except:
-            return False, "Email sending failed"
-    else:
+    # mails go through the outbox so a slow mailer never holds up the request that triggered them
+    enqueue_email(Subject, message, recepients)
+    return True, "Email queued successfully"
 
-            url = "https://gameshubmailer.pythonanywhere.com/mailer"
-            headers = {
-                "Content-Type": "application/json",
-                "API-Key": FLASK_MAILER_API_KEY
-            }
-            payload = {
-                "Subject": Subject,
-                "Recepient": recepients,
-                "Body": message
-            }
-
-            response = requests.post(url, json=payload, headers=headers)
-            
-            if response.status_code == 200:
-                return True, "Email sent successfully"
-            else:
-                return False, "Email sending failed"
-            
 
 def validate_vote_value(attrs, model):
     upvote = attrs.get(f"upvote_{model}")
@@ -146,41 +186,15 @@ def validate_vote_value(attrs, model):
     return False
 
 
-def update_voting_field(instance, validated_data, content_type, model, request_user, model_obj):
+def update_voting_field(instance, validated_data, content_type, model, request_user):
+    vote = requested_vote(validated_data, model)
+    if vote is None:
+        return instance
+    return apply_vote(instance, content_type, request_user, vote)
 
-    upvote_downvote, created  = UpvoteDownvoteControl.objects.get_or_create(user=request_user,content_type=content_type,object_id=instance.id)
-
-    if created:
-        if validated_data.get(f"upvote_{model}") in ['1', 1, True, "true"]:
-            upvote_downvote.set_vote_type(True)
-            upvote_downvote.save()
-            model_obj.update(upvote=F('upvote') + 1)
-        if validated_data.get(f"downvote_{model}") in ['1', 1, True, "true"]:
-            upvote_downvote.set_vote_type(False)
-            upvote_downvote.save()
-            model_obj.update(downvote=F('downvote') + 1)
-    else:
-        vote_type   = upvote_downvote.get_vote_type()
-
-        if validated_data.get(f"upvote_{model}") in ['1', 1, True, "true"] and not vote_type:
-            upvote_downvote.set_vote_type(True)
-            upvote_downvote.save()
-            model_obj.update(upvote=F('upvote') + 1, downvote=F('downvote') - 1)
-        if validated_data.get(f"downvote_{model}") in ['1', 1, True, "true"] and vote_type:
-            upvote_downvote.set_vote_type(False)
-            upvote_downvote.save()
-            model_obj.update(upvote=F('upvote') - 1, downvote=F('downvote') + 1)
-        
-        if validated_data.get(f"upvote_{model}") in ['1', 1, True, "true"] and vote_type:
-            upvote_downvote.delete()
-            model_obj.update(upvote=F('upvote') - 1)
-        
-        if validated_data.get(f"downvote_{model}") in ['1', 1, True, "true"] and not vote_type:
-            upvote_downvote.delete()
-            model_obj.update(downvote=F('downvote') - 1)
-
-
-    instance.refresh_from_db(fields=['upvote', 'downvote'])
-    return instance
+def strip_vote_fields(validated_data, model):
+    validated_data.pop(f"upvote_{model}", None)
+    validated_data.pop(f"downvote_{model}", None)
+    return validated_data
     
 
@@ -2,10 +2,11 @@ from django.http import HttpResponseRedirect
 from django.urls import resolve, reverse, Resolver404
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.models import AnonymousUser
-from .models import BlacklistedAccessToken
-from GamesHub.settings import REDIS_CLIENT
-from rest_framework_simplejwt.authentication import JWTAuthentication
-import re
+from Login.auth import is_access_token_denied, authenticate_request, clear_request_authentication
+from .view_tracking import record_view
+import logging
+
+logger = logging.getLogger("gameshub")
 
 class EndpointRedirectMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -22,31 +23,31 @@ class AccessRestrictionMiddleware(MiddlewareMixin):
     def process_request(self, request):
         try:
             if 'HTTP_AUTHORIZATION' in request.META:
-                if BlacklistedAccessToken.objects.filter(access_token = request.META['HTTP_AUTHORIZATION'].split(' ')[1]).exists():
+                user_auth_tuple = authenticate_request(request)
+                if user_auth_tuple is not None and is_access_token_denied(user_auth_tuple[1]):
                     del request.META['HTTP_AUTHORIZATION']
+                    clear_request_authentication(request)
                     request.user = AnonymousUser()
                     return None
         except Exception as e:
-            pass
+            # a token that cannot be checked is not trusted, the request goes on unauthenticated
+            logger.error(f"access token check failed: {str(e)}", exc_info=True)
+            request.META.pop('HTTP_AUTHORIZATION', None)
+            clear_request_authentication(request)
+            request.user = AnonymousUser()
 
 class UserTrackingMiddleware(MiddlewareMixin):
-    def process_request(self, request):
+    def process_response(self, request, response):
         try:
-            jwt_auth = JWTAuthentication()
-
-            user_auth_tuple = jwt_auth.authenticate(request)
-            if user_auth_tuple is not None:
-                user, auth = user_auth_tuple
-                
-            if user.is_authenticated and "/detail/" in request.path:
-                match = re.search(r"(?<=detail/)\d+(?=/|$)", request.path)
-                
-                game_id = int(match.group())
-                user    = user.get_username()
-                
-                REDIS_CLIENT.hincrby(user, game_id, 1)
-                REDIS_CLIENT.expire(user, 60*60*24*30)
+            match = request.resolver_match
+            if response.status_code == 200 and match is not None and match.route.endswith("detail/<int:pk>"):
+                user_auth_tuple = authenticate_request(request)
+                if user_auth_tuple is not None:
+                    user, auth = user_auth_tuple
+                    record_view(user.get_username(), match.kwargs["pk"])
 
         except Exception as e:
             pass
+
+        return response
         
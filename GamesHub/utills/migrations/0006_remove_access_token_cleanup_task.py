@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:05
+
+from django.db import migrations
+
+
+def remove_cleanup_task(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='delete_expired_access_tokens').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0005_alter_upvotedownvotecontrol_upvotedownvote'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_cleanup_task, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def schedule_outbox_drain(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    interval, _      = IntervalSchedule.objects.get_or_create(every=1, period='minutes')
+    PeriodicTask.objects.get_or_create(name='email outbox drain', defaults={'task': 'drain_email_outbox', 'interval': interval})
+
+
+def unschedule_outbox_drain(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='drain_email_outbox').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0006_remove_access_token_cleanup_task'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=256)),
+                ('body', models.TextField()),
+                ('recipients', models.JSONField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'pending'), (2, 'sent'), (3, 'dead_letter')], default=1)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx')],
+            },
+        ),
+        migrations.RunPython(schedule_outbox_drain, unschedule_outbox_drain),
+    ]
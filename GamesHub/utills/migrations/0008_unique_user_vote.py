@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    # get_or_create races left some users with several vote rows for one object, the latest
+    # row is kept and the counters of every affected object are recounted from what is left
+    Vote        = apps.get_model('utills', 'UpvoteDownvoteControl')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    duplicates  = Vote.objects.values('user_id', 'content_type_id', 'object_id').annotate(latest=Max('id'), total=Count('id')).filter(total__gt=1)
+    affected    = set()
+
+    for row in list(duplicates):
+        Vote.objects.filter(user_id=row['user_id'], content_type_id=row['content_type_id'], object_id=row['object_id']).exclude(id=row['latest']).delete()
+        affected.add((row['content_type_id'], row['object_id']))
+
+    for content_type_id, object_id in affected:
+        content_type = ContentType.objects.get(id=content_type_id)
+        try:
+            model = apps.get_model(content_type.app_label, content_type.model)
+        except LookupError:
+            continue
+        votes = Vote.objects.filter(content_type_id=content_type_id, object_id=object_id)
+        model.objects.filter(id=object_id).update(upvote=votes.filter(upvotedownvote=True).count(), downvote=votes.filter(upvotedownvote=False).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('utills', '0007_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_votes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='upvotedownvotecontrol',
+            constraint=models.UniqueConstraint(fields=('user', 'content_type', 'object_id'), name='unique_user_vote'),
+        ),
+    ]
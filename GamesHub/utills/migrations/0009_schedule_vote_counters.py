@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:50
+
+from django.db import migrations
+
+
+def schedule_vote_counters(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    flush_every, _   = IntervalSchedule.objects.get_or_create(every=30, period='seconds')
+    daily, _         = IntervalSchedule.objects.get_or_create(every=1, period='days')
+    PeriodicTask.objects.get_or_create(name='vote counter flush', defaults={'task': 'flush_vote_counts', 'interval': flush_every})
+    PeriodicTask.objects.get_or_create(name='vote counter reconciliation', defaults={'task': 'reconcile_vote_counts', 'interval': daily})
+
+
+def unschedule_vote_counters(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task__in=['flush_vote_counts', 'reconcile_vote_counts']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0008_unique_user_vote'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_vote_counters, unschedule_vote_counters),
+    ]
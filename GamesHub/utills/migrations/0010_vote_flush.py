@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0009_schedule_vote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteFlush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(max_length=32, unique=True)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
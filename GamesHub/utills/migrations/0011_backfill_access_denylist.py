@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:10
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_access_denylist(apps, schema_editor):
+    # tokens logged out before the denylist moved to redis stay revoked for the rest of their lifetime
+    from Login.auth import deny_access_token
+    BlacklistedAccessToken = apps.get_model('utills', 'BlacklistedAccessToken')
+    since                  = timezone.now() - settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+    for access_token in BlacklistedAccessToken.objects.filter(blacklisted_time__gt=since).values_list('access_token', flat=True).iterator():
+        deny_access_token(access_token)
+
+
+def schedule_access_token_cleanup(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    hourly, _        = IntervalSchedule.objects.get_or_create(every=1, period='hours')
+    PeriodicTask.objects.get_or_create(name='expired access token cleanup', defaults={'task': 'delete_expired_access_tokens', 'interval': hourly})
+
+
+def unschedule_access_token_cleanup(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='delete_expired_access_tokens').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0010_vote_flush'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_access_denylist, migrations.RunPython.noop),
+        migrations.RunPython(schedule_access_token_cleanup, unschedule_access_token_cleanup),
+    ]
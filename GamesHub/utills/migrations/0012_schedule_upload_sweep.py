@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+def schedule_upload_sweep(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask     = apps.get_model('django_celery_beat', 'PeriodicTask')
+    hourly, _        = IntervalSchedule.objects.get_or_create(every=1, period='hours')
+    PeriodicTask.objects.get_or_create(name='unconfirmed upload cleanup', defaults={'task': 'delete_unconfirmed_uploads', 'interval': hourly})
+
+
+def unschedule_upload_sweep(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(task='delete_unconfirmed_uploads').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utills', '0011_backfill_access_denylist'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_upload_sweep, unschedule_upload_sweep),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 User = get_user_model()
 
 class Constants(models.Model):
@@ -17,10 +18,39 @@ class Constants(models.Model):
     def __str__(self):
         return self.variable
     
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = [
+        (1, 'pending'),
+        (2, 'sent'),
+        (3, 'dead_letter')
+        ]
+    subject          = models.CharField(max_length=256)
+    body             = models.TextField()
+    recipients       = models.JSONField()
+    status           = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=1)
+    attempts         = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at  = models.DateTimeField(default=timezone.now)
+    last_error       = models.TextField(blank=True, default="")
+    created_at       = models.DateTimeField(auto_now_add=True)
+    sent_at          = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="email_outbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.get_status_display()} email {self.subject}"
+
 class BlacklistedAccessToken(models.Model):
     access_token         = models.CharField(max_length=1024)
     blacklisted_time     = models.DateTimeField()
 
+class VoteFlush(models.Model):
+    batch            = models.CharField(max_length=32, unique=True)
+    applied_at       = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"vote flush {self.batch}"
+
 class UpvoteDownvoteControl(models.Model):
     user           = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
     content_type   = models.ForeignKey(ContentType,on_delete=models.CASCADE)
@@ -28,6 +58,9 @@ class UpvoteDownvoteControl(models.Model):
     parent_object  = GenericForeignKey("content_type", "object_id")
     upvotedownvote = models.BooleanField(default=None, null=True, blank=True)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "content_type", "object_id"], name="unique_user_vote")]
+
     def get_vote_type(self):
         return self.upvotedownvote
     
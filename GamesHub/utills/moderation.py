@@ -0,0 +1,83 @@
+from rest_framework.serializers import ValidationError
+import threading
+import logging
+import time
+import os
+import re
+
+logger = logging.getLogger("gameshub")
+
+BANNED_WORDS_FILE = os.getenv("BANNED_WORDS_FILE", os.path.join(os.path.dirname(__file__), "wordlists", "banned_words.txt"))
+RELOAD_INTERVAL   = 30
+DEFAULT_WORDS     = ("ass", "fuck", "bitch", "asshole")
+
+_state = {"pattern": None, "mtime": None, "checked_at": None}
+_lock  = threading.Lock()
+
+
+def trie_pattern(words):
+    # words sharing a prefix share a branch, so the regex engine tests each position
+    # against one character class at a time instead of thousands of alternatives
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        if "" in node and len(node) == 1:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if optional else group
+
+    return build(trie)
+
+def compile_words(words):
+    words = {word.strip().lower() for word in words if word.strip()}
+    if not words:
+        return None
+    return re.compile(r"(?<!\w)" + trie_pattern(words) + r"(?!\w)", re.IGNORECASE)
+
+def load_words(path):
+    with open(path, encoding="utf-8") as word_file:
+        return [line for line in word_file if not line.startswith("#")]
+
+def get_pattern():
+    now = time.monotonic()
+    if _state["checked_at"] is not None and now - _state["checked_at"] < RELOAD_INTERVAL:
+        return _state["pattern"]
+
+    with _lock:
+        if _state["checked_at"] is not None and now - _state["checked_at"] < RELOAD_INTERVAL:
+            return _state["pattern"]
+        try:
+            mtime = os.path.getmtime(BANNED_WORDS_FILE)
+            # the list is only recompiled when the file changed since the last load
+            if mtime != _state["mtime"]:
+                _state["pattern"] = compile_words(load_words(BANNED_WORDS_FILE))
+                _state["mtime"]   = mtime
+        except OSError as e:
+            logger.error(f"banned word list could not be loaded: {str(e)}", exc_info=True)
+            # the last good list is kept, before any load the built-in words stand in for it
+            if _state["pattern"] is None:
+                _state["pattern"] = compile_words(DEFAULT_WORDS)
+        _state["checked_at"] = now
+
+    return _state["pattern"]
+
+def find_banned_words(text):
+    pattern = get_pattern()
+    if pattern is None or not text:
+        return []
+    return [(match.start(), match.end(), match.group()) for match in pattern.finditer(text)]
+
+def validate_clean_text(value, field):
+    pattern = get_pattern()
+    if pattern is not None and value and pattern.search(value):
+        raise ValidationError(f"{field} cannot have banned words")
+    return value
@@ -0,0 +1,89 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from Community.models import Post, PostMedia
+from Store.models import Game, Sale
+from Support.models import Ticket
+from .storage_supabase import delete_from_supabase, get_object_path
+from .microservices import invalidate_cache_tags
+import re
+
+IMAGE_TYPES    = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+MB             = 1024 * 1024
+PRESIGN_EXPIRY = 900
+CONFIRM_WINDOW = 3600
+MAX_POST_MEDIA = 3
+UPLOAD_PREFIX  = "uploads"
+
+
+def safe_path(name):
+    return re.sub(r'[^a-zA-Z0-9\-_/\.]', '', name)
+
+def delete_replaced(url):
+    if url:
+        transaction.on_commit(lambda: delete_from_supabase(get_object_path(url)))
+
+
+def resolve_post(user, target_id):
+    post = Post.objects.filter(id=target_id, user=user).first()
+    if post is None:
+        return None
+    if post.media.exclude(status=3).count() >= MAX_POST_MEDIA:
+        raise ValidationError("Only three media files can be uploaded.")
+    return post, f"Posts/{post.id}/Media"
+
+def attach_post_media(post, url):
+    with transaction.atomic():
+        Post.objects.select_for_update().get(id=post.id)
+        if post.media.exclude(status=3).count() >= MAX_POST_MEDIA:
+            raise ValidationError("Only three media files can be uploaded.")
+        PostMedia.objects.create(post=post, url=url, status=2)
+    invalidate_cache_tags(f"post:{post.id}", "post:list")
+
+def resolve_profile_picture(user, target_id):
+    return user, "ProfilePicture"
+
+def attach_profile_picture(user, url):
+    old_url             = user.profilePicture
+    user.profilePicture = url
+    user.save(update_fields=["profilePicture"])
+    delete_replaced(old_url)
+    invalidate_cache_tags(f"user:{user.id}")
+
+def resolve_ticket(user, target_id):
+    ticket = Ticket.objects.filter(id=target_id, user=user).first()
+    if ticket is None:
+        return None
+    return ticket, f"evidence/{ticket.pk}"
+
+def attach_ticket_evidence(ticket, url):
+    old_url         = ticket.evidence
+    ticket.evidence = url
+    ticket.save(update_fields=["evidence"])
+    delete_replaced(old_url)
+    invalidate_cache_tags(f"ticket:{ticket.pk}", "ticket:list")
+
+def resolve_game(user, target_id):
+    game = Game.objects.filter(id=target_id).first() if user.is_staff else None
+    if game is None:
+        return None
+    return game, f"{safe_path(game.name)}/cover_picture"
+
+def resolve_sale(user, target_id):
+    sale = Sale.objects.filter(id=target_id).first() if user.is_staff else None
+    if sale is None:
+        return None
+    return sale, f"Sale/{safe_path(sale.sale_name)}"
+
+def attach_cover_picture(obj, url):
+    # the pre_save signal on Game and Sale removes the replaced cover from storage
+    obj.cover_picture = url
+    obj.save(update_fields=["cover_picture"])
+
+
+UPLOAD_TARGETS = {
+    "post_media":      {"max_sizes": {**{t: 1 * MB for t in IMAGE_TYPES}, "video/mp4": 10 * MB}, "resolve": resolve_post, "attach": attach_post_media},
+    "profile_picture": {"max_sizes": {t: 1 * MB for t in IMAGE_TYPES}, "resolve": resolve_profile_picture, "attach": attach_profile_picture},
+    "ticket_evidence": {"max_sizes": {t: 1 * MB for t in IMAGE_TYPES + ["application/pdf"]}, "resolve": resolve_ticket, "attach": attach_ticket_evidence},
+    "game_cover":      {"max_sizes": {t: 5 * MB for t in IMAGE_TYPES}, "resolve": resolve_game, "attach": attach_cover_picture},
+    "sale_cover":      {"max_sizes": {t: 5 * MB for t in IMAGE_TYPES}, "resolve": resolve_sale, "attach": attach_cover_picture},
+}
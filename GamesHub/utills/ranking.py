@@ -0,0 +1,162 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from GamesHub.settings import CACHE_ENV
+from .cache_helper import raw_cache_key
+from collections import Counter
+from datetime import timedelta
+import logging
+import math
+import time
+
+logger       = logging.getLogger("gameshub")
+redis_client = cache.client.get_client()
+
+HOT_EPOCH       = 1700000000
+HOT_DECAY       = 45000
+HOT_WINDOW_DAYS = 30
+COMMENT_WEIGHT  = 2
+BUCKET_SECONDS  = 3600
+TRENDING_WINDOW = 24
+TRENDING_DECAY  = 0.85
+BUCKET_TTL      = (TRENDING_WINDOW + 1) * BUCKET_SECONDS
+RANKED_SORTS    = ("hot", "trending")
+RESTORE_GUARD   = 300
+
+
+def rank_key(name):
+    return raw_cache_key(f"{CACHE_ENV}:rank:{name}")
+
+def current_bucket():
+    return int(time.time() // BUCKET_SECONDS)
+
+def bucket_of(moment):
+    return int(moment.timestamp() // BUCKET_SECONDS)
+
+def hot_score(upvote, downvote, comments, created_at):
+    # age is folded in as a growing offset instead of decaying every score, so a post's
+    # score only changes when it is voted or commented on and can be updated in place
+    score = upvote - downvote + COMMENT_WEIGHT * comments
+    order = math.log10(max(abs(score), 1))
+    sign  = (score > 0) - (score < 0)
+    return round(sign * order + (created_at.timestamp() - HOT_EPOCH) / HOT_DECAY, 7)
+
+def update_post_rank(post_id, upvote, downvote, comments, created_at, activity=0):
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zadd(rank_key("hot"), {post_id: hot_score(upvote, downvote, comments, created_at)})
+        if activity:
+            bucket = rank_key(f"posts:{current_bucket()}")
+            pipe.zincrby(bucket, activity, post_id)
+            pipe.expire(bucket, BUCKET_TTL)
+            pipe.zincrby(rank_key("trending"), activity, post_id)
+        pipe.execute()
+
+def remove_post_rank(post_id):
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrem(rank_key("hot"), post_id)
+        pipe.zrem(rank_key("trending"), post_id)
+        pipe.execute()
+
+def record_hashtags(tags, amount=1):
+    if not tags:
+        return
+    bucket = rank_key(f"tags:{current_bucket()}")
+    with redis_client.pipeline(transaction=False) as pipe:
+        for tag in tags:
+            pipe.zincrby(bucket, amount, tag)
+            pipe.zincrby(rank_key("tags:trending"), amount, tag)
+        pipe.expire(bucket, BUCKET_TTL)
+        pipe.execute()
+
+def read_ranked_post_ids(sort, offset, limit):
+    key = rank_key(sort)
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrevrange(key, offset, offset + limit - 1)
+        pipe.zcard(key)
+        ids, count = pipe.execute()
+    return [int(post_id) for post_id in ids], count
+
+def ranked_post_ids(sort, offset, limit):
+    ids, count = read_ranked_post_ids(sort, offset, limit)
+    if count == 0 and restore_rankings():
+        ids, count = read_ranked_post_ids(sort, offset, limit)
+    return ids, count
+
+def trending_hashtags(limit=10):
+    key  = rank_key("tags:trending")
+    tags = redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+    if not tags and restore_rankings():
+        tags = redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+    return [(tag.decode(), round(score, 2)) for tag, score in tags]
+
+def rebuild_trending(name, target):
+    # hourly buckets are merged with geometrically smaller weights the older they are
+    now     = current_bucket()
+    buckets = {rank_key(f"{name}:{now - age}"): TRENDING_DECAY ** age for age in range(TRENDING_WINDOW)}
+    with redis_client.pipeline() as pipe:
+        pipe.delete(rank_key(target))
+        pipe.zunionstore(rank_key(target), buckets)
+        pipe.execute()
+
+def replace_hot_scores(scores):
+    staging = rank_key("hot:rebuild")
+    items   = list(scores.items())
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(staging)
+        for i in range(0, len(items), 1000):
+            pipe.zadd(staging, dict(items[i:i + 1000]))
+        pipe.execute()
+
+    if items:
+        redis_client.rename(staging, rank_key("hot"))
+    else:
+        redis_client.delete(rank_key("hot"))
+
+def seed_trending_buckets():
+    # the hourly buckets only live in redis. when none are left they are refilled from what sql
+    # still has: new posts, their hashtags and comments. votes carry no timestamp and are not replayed
+    Post    = apps.get_model("Community", "Post")
+    Comment = apps.get_model("Community", "Comment")
+    since   = timezone.now() - timedelta(seconds=TRENDING_WINDOW * BUCKET_SECONDS)
+    posts   = Post.objects.filter(created_at__gte=since)
+    through = Post.hashtags.through
+
+    activity = Counter((bucket_of(created_at), post_id) for post_id, created_at in posts.values_list("id", "created_at").iterator())
+    activity.update((bucket_of(created_at), post_id) for post_id, created_at in Comment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post), object_id__in=Post.objects.values("id"), created_at__gte=since).values_list("object_id", "created_at").iterator())
+    tags = Counter((bucket_of(created_at), tag) for tag, created_at in through.objects.filter(post__created_at__gte=since).values_list("hashtags__tag", "post__created_at").iterator())
+
+    with redis_client.pipeline(transaction=False) as pipe:
+        for name, counts in (("posts", activity), ("tags", tags)):
+            for (bucket, member), amount in counts.items():
+                pipe.zincrby(rank_key(f"{name}:{bucket}"), amount, member)
+            for bucket in {bucket for bucket, _ in counts}:
+                pipe.expire(rank_key(f"{name}:{bucket}"), BUCKET_TTL)
+        pipe.execute()
+
+def rebuild_rankings():
+    # votes and comments update the sorted sets in place, this rebuild trims posts that
+    # aged out of the hot window and repairs anything an incremental update missed
+    Post   = apps.get_model("Community", "Post")
+    since  = timezone.now() - timedelta(days=HOT_WINDOW_DAYS)
+    posts  = Post.objects.filter(created_at__gte=since).annotate(comment_count=Count("comments")).values_list("id", "upvote", "downvote", "comment_count", "created_at")
+    scores = {post_id: hot_score(upvote, downvote, comments, created_at) for post_id, upvote, downvote, comments, created_at in posts.iterator(chunk_size=2000)}
+    replace_hot_scores(scores)
+
+    now = current_bucket()
+    if not redis_client.exists(*[rank_key(f"{name}:{now - age}") for name in ("posts", "tags") for age in range(TRENDING_WINDOW)]):
+        seed_trending_buckets()
+    rebuild_trending("posts", "trending")
+    rebuild_trending("tags", "tags:trending")
+    return len(scores)
+
+def restore_rankings():
+    # after a deploy or a redis flush the sorted sets are empty until the next scheduled rebuild,
+    # so the first ranked read rebuilds them. the guard keeps a quiet site from rebuilding on every read
+    if not cache.add(f"{CACHE_ENV}:rank:restore", 1, RESTORE_GUARD):
+        return False
+    logger.warning("community rankings were empty, rebuilding them")
+    rebuild_rankings()
+    return True
@@ -1,13 +1,29 @@
 import boto3
 import os
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from datetime import datetime
 from supabase import create_client
+from supabase.lib.client_options import SyncClientOptions
+from django.core.cache import cache
+from django.db.models.manager import BaseManager
+from rest_framework.serializers import ListSerializer
+from GamesHub.settings import CACHE_ENV, STORAGE_UPLOAD_PART_SIZE, MEDIA_STAGING_DIR
+from django.core.files import File
+from .http_client import integration
+import threading
+import uuid
+import logging
+import time
 import re
 
+logger = logging.getLogger("gameshub")
+
 SUPABASE_URL = "https://ogasrlwtvqiilymwrmmk.storage.supabase.co"
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = create_client(SUPABASE_URL, SUPABASE_KEY, options=SyncClientOptions(storage_client_timeout=10))
 
 access_key = os.getenv("SUPABASE_ACCESS_KEY_ID")
 secret_key = os.getenv("SUPABASE_SECRET_ACCESS_KEY")
@@ -20,24 +36,218 @@ s3 = boto3.client(
     aws_secret_access_key=secret_key,
     endpoint_url=endpoint_url,
     region_name="ap-south-1",
+    config=Config(
+        connect_timeout=3,
+        read_timeout=30,
+        max_pool_connections=20,
+        tcp_keepalive=True,
+        retries={"max_attempts": 3, "mode": "standard"},
+    ),
 )
 
-def upload_file_to_supabase(file_obj, folder):
-    
-    original_name = re.sub(r'[^a-zA-Z0-9\-_/\.]', '', file_obj.name)
+# files are read and sent one part at a time, so memory per upload is bounded by part size * concurrency
+transfer_config = TransferConfig(
+    multipart_threshold=STORAGE_UPLOAD_PART_SIZE,
+    multipart_chunksize=STORAGE_UPLOAD_PART_SIZE,
+    max_concurrency=2,
+    max_io_queue=4,
+)
+
+# boto3 and the supabase sdk keep their own keep-alive pools, this only shares a breaker and latency metrics
+storage = integration("supabase_storage")
+
+SIGNED_URL_EXPIRY_MARGIN = 30
+
+_signed_url_cache      = {}
+_signed_url_cache_lock = threading.Lock()
+
+def build_object_key(folder, name):
+    original_name = re.sub(r'[^a-zA-Z0-9\-_/\.]', '', name)
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     filename  = f"{timestamp}_{original_name}"
 
-    object_key = f"{folder}/{filename}"
+    return f"{folder}/{filename}"
+
+def get_object_url(object_key):
+    return f"{endpoint_url}/{bucket_name}/{object_key}"
+
+def upload_file_to_supabase(file_obj, folder):
+    
+    object_key = build_object_key(folder, file_obj.name)
 
     file_obj.seek(0)
-    s3.upload_fileobj(file_obj, bucket_name, object_key)
+    storage.track(s3.upload_fileobj, file_obj, bucket_name, object_key, Config=transfer_config)
 
-    return f"{endpoint_url}/{bucket_name}/{object_key}"
+    return get_object_url(object_key)
+
+def presign_upload(object_key, content_type, expires_in):
+    # the content type is part of the signature, so the client has to PUT exactly what was approved
+    return storage.track(
+        s3.generate_presigned_url,
+        "put_object",
+        Params={"Bucket": bucket_name, "Key": object_key, "ContentType": content_type},
+        ExpiresIn=expires_in,
+    )
+
+def get_object_metadata(object_key):
+    try:
+        head = storage.track(s3.head_object, Bucket=bucket_name, Key=object_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    return {"size": head["ContentLength"], "content_type": head.get("ContentType")}
+
+def copy_object(source_key, object_key):
+    storage.track(s3.copy_object, Bucket=bucket_name, Key=object_key, CopySource={"Bucket": bucket_name, "Key": source_key})
+
+def list_stale_objects(prefix, before):
+    keys   = []
+    params = {"Bucket": bucket_name, "Prefix": prefix}
+    while True:
+        page = storage.track(s3.list_objects_v2, **params)
+        keys.extend(item["Key"] for item in page.get("Contents", []) if item["LastModified"] < before)
+        if not page.get("IsTruncated"):
+            return keys
+        params["ContinuationToken"] = page["NextContinuationToken"]
+
+def stage_upload(file_obj):
+    # copies an upload to local disk chunk by chunk so it can be sent to storage after the request
+    os.makedirs(MEDIA_STAGING_DIR, exist_ok=True)
+    original_name = re.sub(r'[^a-zA-Z0-9\-_/\.]', '', os.path.basename(file_obj.name))
+    staged_path   = os.path.join(MEDIA_STAGING_DIR, f"{uuid.uuid4().hex}_{original_name}")
+
+    with open(staged_path, "wb") as staged:
+        for chunk in file_obj.chunks():
+            staged.write(chunk)
+
+    return staged_path
+
+def upload_staged_file(staged_path, folder):
+    original_name = os.path.basename(staged_path).split("_", 1)[1]
+    with open(staged_path, "rb") as staged:
+        public_url = upload_file_to_supabase(File(staged, name=original_name), folder)
+    discard_staged_file(staged_path)
+    return public_url
+
+def discard_staged_file(staged_path):
+    try:
+        os.remove(staged_path)
+    except FileNotFoundError:
+        pass
 
 def delete_from_supabase(object_key):
     
-    s3.delete_object(Bucket="GamesHubMedia", Key=object_key)
+    storage.track(s3.delete_object, Bucket="GamesHubMedia", Key=object_key)
 
     return None
 
+def get_object_path(url):
+    return url.split(f"{bucket_name}/")[1]
+
+def get_signed_urls(urls, expires_in=900):
+    # signed urls are reused until shortly before supabase expires them, first from
+    # this process then from redis, and whatever is left is signed in one batched call
+    paths = {}
+    for url in urls:
+        if not url or url in paths:
+            continue
+        try:
+            paths[url] = get_object_path(url)
+        except IndexError:
+            continue
+
+    signed_urls = {}
+    now         = time.time()
+
+    with _signed_url_cache_lock:
+        for url, path in paths.items():
+            entry = _signed_url_cache.get((expires_in, path))
+            if entry and entry[1] > now:
+                signed_urls[url] = entry[0]
+
+    missing = {url: path for url, path in paths.items() if url not in signed_urls}
+    if not missing:
+        return signed_urls
+
+    cache_keys = {path: f"{CACHE_ENV}:signed_url:{expires_in}:{path}" for path in missing.values()}
+    try:
+        cached_vals = cache.get_many(list(cache_keys.values()))
+    except Exception as e:
+        logger.error(f"signed url cache read failed: {str(e)}", exc_info=True)
+        cached_vals = {}
+
+    entries = {}
+    for path, cache_key in cache_keys.items():
+        entry = cached_vals.get(cache_key)
+        if entry and entry[1] > now:
+            entries[path] = tuple(entry)
+
+    to_sign = [path for path in cache_keys if path not in entries]
+    if to_sign:
+        timeout  = max(expires_in - max(SIGNED_URL_EXPIRY_MARGIN, expires_in // 10), 1)
+        deadline = now + timeout
+        signed   = {}
+        try:
+            result = storage.track(supabase.storage.from_(bucket_name).create_signed_urls, to_sign, expires_in)
+            for item in result:
+                if item.get("signedURL") and not item.get("error"):
+                    signed[item["path"]] = (item["signedURL"], deadline)
+        except Exception as e:
+            logger.error(f"batched url signing failed for {len(to_sign)} objects: {str(e)}", exc_info=True)
+
+        if signed:
+            try:
+                cache.set_many({cache_keys[path]: entry for path, entry in signed.items()}, timeout=timeout)
+            except Exception as e:
+                logger.error(f"signed url cache write failed: {str(e)}", exc_info=True)
+        entries.update(signed)
+
+    with _signed_url_cache_lock:
+        for path, entry in entries.items():
+            _signed_url_cache[(expires_in, path)] = entry
+        if len(_signed_url_cache) > 10000:
+            for key in [key for key, entry in _signed_url_cache.items() if entry[1] <= now]:
+                del _signed_url_cache[key]
+
+    for url, path in missing.items():
+        if path in entries:
+            signed_urls[url] = entries[path][0]
+
+    return signed_urls
+
+def get_signed_url(url, expires_in=900):
+    if url is None:
+        return None
+    return get_signed_urls([url], expires_in).get(url)
+
+def resolve_attribute_values(instance, source):
+    values = [instance]
+    for attr in source.split("."):
+        next_values = []
+        for value in values:
+            value = getattr(value, attr, None)
+            if isinstance(value, BaseManager):
+                next_values.extend(value.all())
+            elif value is not None:
+                next_values.append(value)
+        values = next_values
+    return values
+
+def prefetch_signed_urls(instances, signed_url_fields):
+    for source, expires_in in signed_url_fields.items():
+        urls = []
+        for instance in instances:
+            urls.extend(resolve_attribute_values(instance, source))
+        if urls:
+            get_signed_urls(urls, expires_in)
+
+
+class SignedURLListSerializer(ListSerializer):
+    # child serializers declare signed_url_fields as {"dotted.source": expires_in} so one
+    # page of objects is signed with a single batched call before rows are serialized
+    def to_representation(self, data):
+        iterable  = data.all() if isinstance(data, BaseManager) else data
+        instances = list(iterable)
+        prefetch_signed_urls(instances, getattr(self.child, "signed_url_fields", {}))
+        return super().to_representation(instances)
@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import monitor_1, monitor_2, supabase_awake_upload, supabase_awake_delete
+from .views import monitor_1, monitor_2, supabase_awake_upload, supabase_awake_delete, integration_status, presign_media_upload, confirm_media_upload
 
 urlpatterns = [
     path('monitor_one', monitor_1),
     path('monitor_two', monitor_2),
     path('supabase_upload', supabase_awake_upload),
-    path('supabase_delete', supabase_awake_delete)
+    path('supabase_delete', supabase_awake_delete),
+    path('integrations', integration_status),
+    path('uploads/presign', presign_media_upload),
+    path('uploads/confirm', confirm_media_upload)
 ]
\ No newline at end of file
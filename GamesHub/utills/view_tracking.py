@@ -0,0 +1,57 @@
+from GamesHub.settings import REDIS_CLIENT
+from collections import Counter
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger("gameshub")
+
+FLUSH_INTERVAL  = 5
+FLUSH_THRESHOLD = 500
+VIEW_TTL        = 60*60*24*30
+
+_pending      = Counter()
+_pending_lock = threading.Lock()
+_flush_event  = threading.Event()
+_flusher      = None
+
+
+def flush_views():
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, Counter()
+
+    if not pending:
+        return
+
+    # repeated views of a game collapse into one HINCRBY and every user gets a single EXPIRE
+    with REDIS_CLIENT.pipeline(transaction=False) as pipe:
+        for (username, game_id), views in pending.items():
+            pipe.hincrby(username, game_id, views)
+        for username in {username for username, _ in pending}:
+            pipe.expire(username, VIEW_TTL)
+        pipe.execute()
+
+def run_flusher():
+    while True:
+        _flush_event.wait(FLUSH_INTERVAL)
+        _flush_event.clear()
+        try:
+            flush_views()
+        except Exception as e:
+            logger.error(f"view tracking flush failed: {str(e)}", exc_info=True)
+
+def record_view(username, game_id):
+    global _flusher
+    with _pending_lock:
+        _pending[(username, game_id)] += 1
+        buffered = len(_pending)
+
+        if _flusher is None:
+            _flusher = threading.Thread(target=run_flusher, daemon=True)
+            _flusher.start()
+
+    if buffered >= FLUSH_THRESHOLD:
+        _flush_event.set()
+
+atexit.register(flush_views)
@@ -1,12 +1,25 @@
 from django.http import HttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from io import BytesIO
-from .storage_supabase import upload_file_to_supabase, delete_from_supabase
+from .storage_supabase import upload_file_to_supabase, delete_from_supabase, build_object_key, get_object_url, presign_upload, get_object_metadata, copy_object
+from .presigned_uploads import UPLOAD_TARGETS, PRESIGN_EXPIRY, CONFIRM_WINDOW, UPLOAD_PREFIX
+from .documentation import presign_upload_schema, confirm_upload_schema
+from rest_framework.permissions import IsAuthenticated
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from GamesHub.settings import CACHE_ENV
+import logging
+import uuid
 from .models import Constants
+from .permissions import IsSuperuser
+from .http_client import integration_metrics
 from drf_spectacular.utils import extend_schema
 
+logger = logging.getLogger("gameshub")
+
 # Create your views here.
 @extend_schema(exclude=True)
 @api_view(["GET"])
@@ -24,6 +37,12 @@ def monitor_1(request):
 def monitor_2(request):
     return HttpResponse("Monitor 2 good")
 
+@extend_schema(exclude=True)
+@api_view(["GET"])
+@permission_classes([IsSuperuser])
+def integration_status(request):
+    return Response(integration_metrics(), status=status.HTTP_200_OK)
+
 def supabase_awake_upload(request):
     content   = ".txt file to make supabase always available"
     file      = BytesIO(content.encode("utf-8"))
@@ -44,4 +63,130 @@ def supabase_awake_delete(request):
     obj = supabase_constant.get_value()
     delete_from_supabase(f"Internal/{obj}")
 
-    return HttpResponse("Delete successfull")
\ No newline at end of file
+    return HttpResponse("Delete successfull")
+
+def discard_object(object_key):
+    try:
+        delete_from_supabase(object_key)
+    except Exception as e:
+        logger.warning(f"could not delete {object_key}: {str(e)}")
+
+@presign_upload_schema
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def presign_media_upload(request):
+    purpose      = request.data.get("purpose")
+    content_type = request.data.get("content_type")
+    filename     = request.data.get("filename")
+    target       = UPLOAD_TARGETS.get(purpose)
+
+    if target is None:
+        return Response({"error":{"code":"invalid_purpose", "message":f"purpose should be one of {', '.join(UPLOAD_TARGETS)}"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not filename:
+        return Response({"error":{"code":"not_null_constraint", "message":"filename cannot be null"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    max_size = target["max_sizes"].get(content_type)
+    if max_size is None:
+        return Response({"error":{"code":"unsupported_media_type", "message":f"content_type should be one of {', '.join(target['max_sizes'])}"}}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    try:
+        size = int(request.data.get("size", 0))
+    except (TypeError, ValueError):
+        return Response({"error":{"code":"incorrect_datatype", "message":"size should be an integer"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    if size > max_size:
+        return Response({"error":{"code":"file_too_large", "message":f"file size must not exceed {max_size // (1024 * 1024)} MB"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        resolved = target["resolve"](request.user, request.data.get("target_id"))
+    except ValidationError as e:
+        return Response({"error":{"code":"upload_limit_reached", "message":" ".join(e.messages)}}, status=status.HTTP_409_CONFLICT)
+    except (TypeError, ValueError):
+        resolved = None
+
+    if resolved is None:
+        return Response({"error":{"code":"upload_target_not_found", "message":"target does not exist or you are not allowed to upload to it"}}, status=status.HTTP_404_NOT_FOUND)
+
+    # the client writes to a throwaway key, confirm copies the checked object to where it is served from
+    obj, _     = resolved
+    object_key = f"{UPLOAD_PREFIX}/{uuid.uuid4().hex}"
+    try:
+        upload_url = presign_upload(object_key, content_type, PRESIGN_EXPIRY)
+    except Exception as e:
+        logger.error(f"presigned upload url generation failed: {str(e)}", exc_info=True)
+        return Response({"error":{"code":"presign_failed", "message":"could not issue an upload url"}}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    upload_token = signing.dumps({"key": object_key, "purpose": purpose, "target_id": obj.pk, "user_id": request.user.id, "content_type": content_type, "filename": filename}, salt="direct_upload")
+
+    return Response({"message":"upload url issued", "upload_url":upload_url, "method":"PUT", "headers":{"Content-Type":content_type}, "upload_token":upload_token, "expires_in":PRESIGN_EXPIRY}, status=status.HTTP_201_CREATED)
+
+@confirm_upload_schema
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def confirm_media_upload(request):
+    try:
+        upload = signing.loads(request.data.get("upload_token") or "", salt="direct_upload", max_age=CONFIRM_WINDOW)
+    except signing.BadSignature:
+        return Response({"error":{"code":"invalid_upload_token", "message":"upload token is invalid or expired"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    if upload["user_id"] != request.user.id or "filename" not in upload:
+        return Response({"error":{"code":"invalid_upload_token", "message":"upload token is invalid or expired"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    # a token attaches its object once, a replayed confirm would otherwise add the same media again
+    confirm_key = f"{CACHE_ENV}:upload_confirmed:{upload['key']}"
+    if not cache.add(confirm_key, 1, CONFIRM_WINDOW):
+        return Response({"error":{"code":"upload_already_confirmed", "message":"this upload has already been confirmed"}}, status=status.HTTP_409_CONFLICT)
+
+    target = UPLOAD_TARGETS[upload["purpose"]]
+    try:
+        metadata = get_object_metadata(upload["key"])
+    except Exception as e:
+        cache.delete(confirm_key)
+        logger.error(f"upload confirmation failed: {str(e)}", exc_info=True)
+        return Response({"error":{"code":"storage_unavailable", "message":"could not verify the uploaded file"}}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    if metadata is None:
+        cache.delete(confirm_key)
+        return Response({"error":{"code":"upload_not_found", "message":"file has not been uploaded yet"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    # a presigned PUT cannot cap the body size, so oversized or mistyped objects are rejected here
+    max_size = target["max_sizes"][upload["content_type"]]
+    if metadata["size"] > max_size or metadata["content_type"] != upload["content_type"]:
+        delete_from_supabase(upload["key"])
+        return Response({"error":{"code":"invalid_upload", "message":"uploaded file does not match the approved size or content type"}}, status=status.HTTP_400_BAD_REQUEST)
+
+    object_key = None
+    try:
+        resolved = target["resolve"](request.user, upload["target_id"])
+        if resolved is None:
+            delete_from_supabase(upload["key"])
+            return Response({"error":{"code":"upload_target_not_found", "message":"target does not exist or you are not allowed to upload to it"}}, status=status.HTTP_404_NOT_FOUND)
+
+        # the presigned url stays valid after this check, so the checked object is copied to a key the
+        # client cannot write and the copy is what gets checked again and attached
+        object_key = build_object_key(resolved[1], upload["filename"])
+        copy_object(upload["key"], object_key)
+        metadata = get_object_metadata(object_key)
+        if metadata is None or metadata["size"] > max_size or metadata["content_type"] != upload["content_type"]:
+            delete_from_supabase(object_key)
+            delete_from_supabase(upload["key"])
+            return Response({"error":{"code":"invalid_upload", "message":"uploaded file does not match the approved size or content type"}}, status=status.HTTP_400_BAD_REQUEST)
+
+        target["attach"](resolved[0], get_object_url(object_key))
+    except ValidationError as e:
+        delete_from_supabase(upload["key"])
+        if object_key:
+            delete_from_supabase(object_key)
+        return Response({"error":{"code":"upload_limit_reached", "message":" ".join(e.messages)}}, status=status.HTTP_409_CONFLICT)
+    except Exception as e:
+        cache.delete(confirm_key)
+        logger.error(f"upload confirmation failed: {str(e)}", exc_info=True)
+        if object_key:
+            discard_object(object_key)
+        return Response({"error":{"code":"upload_confirm_failed", "message":"could not attach the uploaded file"}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # the upload key is left for the sweep if storage refuses the delete, the attached copy is already safe
+    discard_object(upload["key"])
+
+    return Response({"message":"upload confirmed", "purpose":upload["purpose"], "target_id":upload["target_id"]}, status=status.HTTP_200_OK)
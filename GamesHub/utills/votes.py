@@ -0,0 +1,266 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.manager import BaseManager
+from rest_framework.serializers import ListSerializer
+from django.utils import timezone
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from redis.exceptions import LockError
+from GamesHub.settings import CACHE_ENV
+from .models import UpvoteDownvoteControl, VoteFlush
+from .cache_helper import raw_cache_key
+import logging
+import uuid
+
+logger       = logging.getLogger("gameshub")
+redis_client = cache.client.get_client()
+
+TRUTHY       = ['1', 1, True, "true"]
+VOTE_MODELS  = ("Community.Post", "Community.Comment", "GamesBuzz.Review")
+PENDING_KEY  = raw_cache_key(f"{CACHE_ENV}:votes:pending")
+FLUSHING_KEY = raw_cache_key(f"{CACHE_ENV}:votes:flushing")
+LOCK_KEY     = raw_cache_key(f"{CACHE_ENV}:votes:lock")
+LOCK_TIMEOUT = 600
+FLUSH_CHUNK  = 1000
+BATCH_FIELD  = "batch"
+BATCH_EXPIRY = timedelta(days=1)
+
+# prev locks the user's vote row, then exactly one of removed (same vote again), switched
+# (opposite or empty vote) or inserted (first vote) fires, and the change to the counters is
+# returned. a concurrent first click loses on the unique index instead of inserting a second
+# row, so it changes nothing.
+VOTE_SQL = """
+    WITH prev AS (
+        SELECT id, upvotedownvote AS vote FROM {votes}
+        WHERE user_id = %(user_id)s AND content_type_id = %(content_type_id)s AND object_id = %(object_id)s
+        FOR UPDATE
+    ),
+    removed AS (
+        DELETE FROM {votes} WHERE id IN (SELECT id FROM prev WHERE vote = %(vote)s)
+        RETURNING upvotedownvote AS old_vote, NULL::boolean AS new_vote
+    ),
+    switched AS (
+        UPDATE {votes} AS v SET upvotedownvote = %(vote)s FROM prev
+        WHERE v.id = prev.id AND prev.vote IS DISTINCT FROM %(vote)s
+        RETURNING prev.vote AS old_vote, v.upvotedownvote AS new_vote
+    ),
+    inserted AS (
+        INSERT INTO {votes} (user_id, content_type_id, object_id, upvotedownvote)
+        SELECT %(user_id)s, %(content_type_id)s, %(object_id)s, %(vote)s WHERE NOT EXISTS (SELECT 1 FROM prev)
+        ON CONFLICT (user_id, content_type_id, object_id) DO NOTHING
+        RETURNING NULL::boolean AS old_vote, upvotedownvote AS new_vote
+    ),
+    changes AS (
+        SELECT old_vote, new_vote FROM removed
+        UNION ALL SELECT old_vote, new_vote FROM switched
+        UNION ALL SELECT old_vote, new_vote FROM inserted
+    )
+    SELECT COALESCE(SUM((new_vote IS TRUE)::int - (old_vote IS TRUE)::int), 0),
+           COALESCE(SUM((new_vote IS FALSE)::int - (old_vote IS FALSE)::int), 0)
+    FROM changes
+"""
+
+# counters are moved by a batch of deltas or set outright by reconciliation, one statement per chunk
+ADD_COUNTS_SQL = """
+    UPDATE {table} AS t SET upvote = GREATEST(t.upvote + v.up, 0), downvote = GREATEST(t.downvote + v.down, 0)
+    FROM (VALUES {values}) AS v(id, up, down)
+    WHERE t.{pk} = v.id
+"""
+MISMATCHED_COUNTS_SQL = """
+    SELECT t.{pk}, t.upvote, t.downvote, COALESCE(v.up, 0), COALESCE(v.down, 0)
+    FROM {table} AS t
+    LEFT JOIN (
+        SELECT object_id, COUNT(*) FILTER (WHERE upvotedownvote) AS up, COUNT(*) FILTER (WHERE NOT upvotedownvote) AS down
+        FROM {votes} WHERE content_type_id = %s GROUP BY object_id
+    ) AS v ON v.object_id = t.{pk}
+    WHERE t.upvote <> COALESCE(v.up, 0) OR t.downvote <> COALESCE(v.down, 0)
+"""
+SET_COUNTS_SQL = """
+    UPDATE {table} AS t SET upvote = v.up, downvote = v.down
+    FROM (VALUES {values}) AS v(id, up, down)
+    WHERE t.{pk} = v.id
+"""
+
+
+def requested_vote(validated_data, model):
+    if validated_data.get(f"upvote_{model}") in TRUTHY:
+        return True
+    if validated_data.get(f"downvote_{model}") in TRUTHY:
+        return False
+    return None
+
+def apply_vote(instance, content_type, user, vote):
+    # voting the same way twice takes the vote back, voting the other way switches it
+    sql = VOTE_SQL.format(votes=connection.ops.quote_name(UpvoteDownvoteControl._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"user_id": user.id, "content_type_id": content_type.id, "object_id": instance.pk, "vote": vote})
+        up, down = cursor.fetchone()
+
+    if up or down:
+        model = type(instance)
+        transaction.on_commit(lambda: record_vote_delta(model, content_type.id, instance.pk, up, down))
+    return instance
+
+
+def vote_field(content_type_id, object_id, kind):
+    return f"{content_type_id}:{object_id}:{kind}"
+
+def record_vote_delta(model, content_type_id, object_id, up, down):
+    # the hot row is left alone, the delta waits in redis for the next flush
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            if up:
+                pipe.hincrby(PENDING_KEY, vote_field(content_type_id, object_id, "u"), up)
+            if down:
+                pipe.hincrby(PENDING_KEY, vote_field(content_type_id, object_id, "d"), down)
+            pipe.execute()
+    except Exception as e:
+        logger.error(f"vote delta could not be queued, writing it directly: {str(e)}", exc_info=True)
+        model.objects.filter(pk=object_id).update(upvote=Greatest(F("upvote") + up, 0), downvote=Greatest(F("downvote") + down, 0))
+
+def pending_vote_deltas(content_type_id, object_ids):
+    fields = [vote_field(content_type_id, object_id, kind) for object_id in object_ids for kind in ("u", "d")]
+    if not fields:
+        return {}
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hmget(PENDING_KEY, fields)
+        pipe.hmget(FLUSHING_KEY, fields)
+        pending, flushing = pipe.execute()
+
+    values = [int(a or 0) + int(b or 0) for a, b in zip(pending, flushing)]
+    return {object_id: (values[2 * i], values[2 * i + 1]) for i, object_id in enumerate(object_ids)}
+
+def attach_pending_votes(instances):
+    by_model = defaultdict(list)
+    for instance in instances:
+        if not hasattr(instance, "pending_votes"):
+            by_model[type(instance)].append(instance)
+
+    for model, objs in by_model.items():
+        try:
+            deltas = pending_vote_deltas(ContentType.objects.get_for_model(model).id, [obj.pk for obj in objs])
+        except Exception as e:
+            logger.error(f"pending votes could not be read: {str(e)}", exc_info=True)
+            deltas = {}
+        for obj in objs:
+            obj.pending_votes = deltas.get(obj.pk, (0, 0))
+
+
+class PendingVotesListSerializer(ListSerializer):
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, BaseManager) else data)
+        attach_pending_votes(instances)
+        return super().to_representation(instances)
+
+class PendingVotesMixin:
+    # counters are shown as the stored value plus what is still waiting to be flushed,
+    # so a vote shows up for its voter right away
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "upvote" in data or "downvote" in data:
+            attach_pending_votes([instance])
+            up, down = instance.pending_votes
+            if "upvote" in data:
+                data["upvote"] = max(data["upvote"] + up, 0)
+            if "downvote" in data:
+                data["downvote"] = max(data["downvote"] + down, 0)
+        return data
+
+
+def write_vote_counts(model, rows, sql):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), FLUSH_CHUNK):
+            chunk  = rows[i:i + FLUSH_CHUNK]
+            values = ", ".join(["(%s, %s, %s)"] * len(chunk))
+            cursor.execute(sql.format(table=quote(model._meta.db_table), pk=quote(model._meta.pk.column), values=values), [value for row in chunk for value in row])
+
+def read_deltas(*keys):
+    deltas = defaultdict(lambda: [0, 0])
+    for key in keys:
+        for field, value in redis_client.hgetall(key).items():
+            if field.decode() == BATCH_FIELD:
+                continue
+            content_type_id, object_id, kind = field.decode().split(":")
+            deltas[(int(content_type_id), int(object_id))][0 if kind == "u" else 1] += int(value)
+    return deltas
+
+def flush_vote_deltas():
+    # pending is renamed away before it is read, new votes land in a fresh hash meanwhile.
+    # a flushing hash left by a failed run is applied first instead of being overwritten
+    if not redis_client.exists(FLUSHING_KEY):
+        if not redis_client.exists(PENDING_KEY):
+            return 0
+        redis_client.rename(PENDING_KEY, FLUSHING_KEY)
+
+    # the hash's batch id is recorded in the same transaction as the counters, so a hash whose
+    # delete was lost after the commit is recognised by the next run instead of applied twice
+    redis_client.hsetnx(FLUSHING_KEY, BATCH_FIELD, uuid.uuid4().hex)
+    batch    = redis_client.hget(FLUSHING_KEY, BATCH_FIELD).decode()
+    deltas   = read_deltas(FLUSHING_KEY)
+    by_model = defaultdict(list)
+    for (content_type_id, object_id), (up, down) in deltas.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None and (up or down):
+            by_model[model].append((object_id, up, down))
+
+    with transaction.atomic():
+        _, applied = VoteFlush.objects.get_or_create(batch=batch)
+        if applied:
+            for model, rows in by_model.items():
+                write_vote_counts(model, rows, ADD_COUNTS_SQL)
+    redis_client.delete(FLUSHING_KEY)
+    return len(deltas) if applied else 0
+
+def reconcile_vote_counts(lock=None):
+    # counters are rebuilt from the vote rows, the comparison runs in sql. the vote rows may
+    # already hold votes whose delta is still waiting in redis, so the stored value is expected
+    # to be the row count minus what is pending, and that is what gets written
+    quote = connection.ops.quote_name
+    fixed = 0
+    for label in VOTE_MODELS:
+        if lock is not None:
+            lock.reacquire()
+        model        = apps.get_model(label)
+        content_type = ContentType.objects.get_for_model(model)
+        sql          = MISMATCHED_COUNTS_SQL.format(table=quote(model._meta.db_table), pk=quote(model._meta.pk.column), votes=quote(UpvoteDownvoteControl._meta.db_table))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [content_type.id])
+            mismatched = cursor.fetchall()
+
+        pending = read_deltas(FLUSHING_KEY, PENDING_KEY)
+        rows    = []
+        for object_id, upvote, downvote, up, down in mismatched:
+            pending_up, pending_down = pending.get((content_type.id, object_id), (0, 0))
+            expected = (max(up - pending_up, 0), max(down - pending_down, 0))
+            if (upvote, downvote) != expected:
+                rows.append((object_id, *expected))
+
+        with transaction.atomic():
+            write_vote_counts(model, rows, SET_COUNTS_SQL)
+        if rows:
+            logger.warning(f"reconciled vote counts of {len(rows)} {model.__name__.lower()}s")
+        fixed += len(rows)
+
+    VoteFlush.objects.filter(applied_at__lt=timezone.now() - BATCH_EXPIRY).delete()
+    return fixed
+
+@contextmanager
+def counter_lock():
+    # flush and reconcile both read the pending hashes, they must not interleave
+    lock = redis_client.lock(LOCK_KEY, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        yield lock
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("vote counter lock expired before the run finished")